@@ -0,0 +1,88 @@
+"""
+广告规则模块 - 按公众号加载广告关键词
+
+清洗时包含任一关键词的行会被整行删除（见 data_cleaner.remove_ads_markdown）。
+关键词在 DEFAULT_AD_KEYWORDS 的基础上追加：
+- config.AD_KEYWORDS_EXTRA：对所有公众号生效
+- config.AD_RULES_DIR 下的规则文件：
+    _all.txt          对所有公众号生效
+    <公众号名>.txt     只对该公众号生效
+  每行一个关键词，空行和 # 开头的行会被忽略
+"""
+
+from pathlib import Path
+
+
+# 默认的广告关键词
+DEFAULT_AD_KEYWORDS = (
+    '扫码关注', '长按二维码', '识别二维码', '关注公众号',
+    '点击阅读原文', '阅读原文', '原文链接',
+    '限时优惠', '限时特惠', '报名链接', '点击报名',
+    '加微信', '添加微信', '微信咨询',
+    '推广', '广告', '赞助',
+    '转发朋友圈', '分享到朋友圈',
+    '点击购买', '立即购买', '马上购买',
+    '课程链接', '购买链接',
+    '跳转微信打开',  # RSS特有的
+)
+
+# 对所有公众号生效的规则文件名
+COMMON_RULES_FILE = '_all.txt'
+
+
+def load_keywords_file(filepath):
+    """
+    读取规则文件
+
+    Returns:
+        关键词列表（文件不存在时返回空列表）
+    """
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            lines = [line.strip() for line in f]
+    except FileNotFoundError:
+        return []
+    except Exception as e:
+        print(f"⚠️  读取广告规则文件失败 {filepath}: {e}")
+        return []
+
+    return [line for line in lines if line and not line.startswith('#')]
+
+
+class AdRules:
+    """按公众号组合广告关键词"""
+
+    def __init__(self, extra_keywords=None, rules_dir=None):
+        """
+        Args:
+            extra_keywords: 对所有公众号生效的额外关键词（config.AD_KEYWORDS_EXTRA）
+            rules_dir: 规则文件目录（config.AD_RULES_DIR，None表示不使用规则文件）
+        """
+        self.rules_dir = Path(rules_dir) if rules_dir else None
+        self.common = list(extra_keywords or [])
+        if self.rules_dir:
+            self.common += load_keywords_file(self.rules_dir / COMMON_RULES_FILE)
+        self._by_account = {}
+
+    def keywords_for(self, account_name):
+        """
+        某个公众号生效的关键词
+
+        Args:
+            account_name: 公众号名称（文章的 author 字段）
+
+        Returns:
+            关键词元组；没有任何额外关键词时返回None（即使用 DEFAULT_AD_KEYWORDS）
+        """
+        if account_name not in self._by_account:
+            extra = list(self.common)
+            if self.rules_dir and account_name:
+                extra += load_keywords_file(self.rules_dir / f"{account_name}.txt")
+
+            keywords = None
+            if extra:
+                # 去重，保持顺序
+                keywords = tuple(dict.fromkeys(DEFAULT_AD_KEYWORDS + tuple(extra)))
+            self._by_account[account_name] = keywords
+
+        return self._by_account[account_name]
@@ -2,106 +2,219 @@
 AI分析模块 - 使用DeepSeek/Claude/OpenAI分析文章并生成报告
 """
 
+import asyncio
+import bisect
+import hashlib
 import json
+import re
+import time
 from datetime import datetime
 from pathlib import Path
 
-try:
-    from anthropic import Anthropic
-except ImportError:
-    Anthropic = None
+from analysis_cache import AnalysisCache
+from article import Article
+from llm_client import PROVIDERS, get_client
 
-try:
-    from openai import OpenAI
-except ImportError:
-    OpenAI = None
 
+# 系统提示词
+SYSTEM_PROMPT = "你是一位资深的AI领域内容分析师和选题策划专家。请严格按照JSON格式返回分析结果。"
 
-def load_prompt_template():
-    """加载提示词模板"""
-    prompt_path = Path(__file__).parent / "docs" / "prompts" / "analyze_prompt.md"
+# 分批分析时汇总的文章数上限（按评分从高到低）
+REDUCE_TOP_ARTICLES = 30
+
+# 逐篇分析结果格式的版本号（输出格式变化时递增，使旧的逐篇分析缓存失效）
+ANALYSIS_VERSION = 1
+
+# 逐篇分析依赖的提示词文件（任一文件变化，旧的逐篇分析缓存失效）
+ANALYSIS_PROMPT_FILES = ("analyze_prompt.md", "article_prompt.md")
+
+# 汇总时列出的热点话题数上限（只统计被至少2篇文章提及的话题）
+HOT_TOPIC_LIMIT = 20
+
+# 紧凑格式中发给AI的字段（表头），正文放在每行末尾
+ARTICLE_FIELDS = ("title", "author", "url", "publish_time", "word_count", "content")
+
+_CJK_RE = re.compile(r'[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]')
+
+
+def load_prompt_template(name="analyze_prompt.md"):
+    """加载提示词模板（docs/prompts 下的文件）"""
+    prompt_path = Path(__file__).parent / "docs" / "prompts" / name
     with open(prompt_path, 'r', encoding='utf-8') as f:
         return f.read()
 
 
-def prepare_articles_data(articles):
+def prepare_articles_data(articles, compact=False, token_budget=None, max_article_tokens=None):
     """
     准备文章数据，转换为简洁的格式给AI
     
     Args:
         articles: 清洗后的文章列表
+        compact: 紧凑格式：字段名只在表头出现一次（{"fields": [...], "rows": [[...], ...]}），没有缩进和空格
+        token_budget: 整批文章数据的token预算，按 allocate_token_budget 在各篇正文之间分配
+        max_article_tokens: 单篇正文的token上限
+        （token_budget 和 max_article_tokens 都不设置时，每篇正文只取前2000字）
     
     Returns:
         格式化的JSON字符串
     """
     # 只给AI关键信息，节省token
-    simplified = []
-    for article in articles:
-        # 优先使用Markdown格式，降级到纯文本
-        content = article.get("content_markdown") or article.get("content_text", "")
-        
-        # 兼容不同的字段名（url 或 link）
-        url = article.get("url") or article.get("link", "")
-        
-        simplified.append({
-            "title": article.get("title", ""),
-            "author": article.get("author", ""),
-            "url": url,
-            "publish_time": article.get("publish_time", ""),
-            # 如果文章太长，只取前2000字
-            "content": content[:2000] + "..." if len(content) > 2000 else content,
-            "word_count": article.get("word_count", 0)
-        })
+    articles = [Article.coerce(article) for article in articles]
+    contents = [article.get("content_markdown", "") for article in articles]
+    
+    if token_budget is None and max_article_tokens is None:
+        # 如果文章太长，只取前2000字
+        contents = [content[:2000] + "..." if len(content) > 2000 else content for content in contents]
+    else:
+        # 先不带正文编码一次，剩余的预算分给各篇正文
+        overhead = estimate_tokens(_encode_articles(articles, [""] * len(articles), compact))
+        budget = float("inf") if token_budget is None else max(0, token_budget - overhead)
+        # 按JSON转义后的长度分配（换行、引号转义后更长），截断时按比例扣除转义的开销和省略号
+        raw = [estimate_tokens(content) for content in contents]
+        escaped = [estimate_tokens(json.dumps(content, ensure_ascii=False)) for content in contents]
+        caps = allocate_token_budget(escaped, budget, max_article_tokens)
+        contents = [
+            content if cap >= size else truncate_to_tokens(content, int(cap * tokens / size) - 1)
+            for content, cap, size, tokens in zip(contents, caps, escaped, raw)
+        ]
     
+    return _encode_articles(articles, contents, compact)
+
+
+def _encode_articles(articles, contents, compact):
+    """把文章和（截断后的）正文编码成JSON字符串"""
+    rows = [
+        [article.get("title", ""), article.get("author", ""), article.get("url", ""),
+         article.get("publish_time", ""), article.get("word_count", 0), content]
+        for article, content in zip(articles, contents)
+    ]
+    if compact:
+        return json.dumps({"fields": ARTICLE_FIELDS, "rows": rows}, ensure_ascii=False, separators=(",", ":"))
+    
+    simplified = [
+        {"title": title, "author": author, "url": url, "publish_time": publish_time,
+         "content": content, "word_count": word_count}
+        for title, author, url, publish_time, word_count, content in rows
+    ]
     return json.dumps(simplified, ensure_ascii=False, indent=2)
 
 
-def analyze_with_claude(articles, api_key):
+def allocate_token_budget(lengths, budget, max_tokens=None):
     """
-    使用Claude分析文章
+    在各篇正文之间分配token预算（注水法）
+    
+    从最短的文章开始，每篇最多分到"剩余预算 / 剩余篇数"：短文章完整保留，
+    省下的预算留给长文章，所有被截断的文章分到的token数相同
+    
+    Args:
+        lengths: 各篇正文的token数
+        budget: 正文的token总预算
+        max_tokens: 单篇的token上限
+    
+    Returns:
+        与 lengths 一一对应的各篇token上限
+    """
+    caps = [0] * len(lengths)
+    remaining = budget
+    left = len(lengths)
+    for index in sorted(range(len(lengths)), key=lengths.__getitem__):
+        cap = min(lengths[index], remaining / left)
+        if max_tokens is not None:
+            cap = min(cap, max_tokens)
+        caps[index] = int(cap)
+        remaining -= caps[index]
+        left -= 1
+    return caps
+
+
+def truncate_to_tokens(text, max_tokens):
+    """
+    把文本截断到约 max_tokens 个token（按 estimate_tokens 估算），尽量在段落末尾截断
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    
+    # 前k个字符的token数 = 中文字数 + 其他字符数 // 4，二分查找满足预算的最长前缀
+    cjk_positions = [match.start() for match in _CJK_RE.finditer(text)]
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        cjk = bisect.bisect_left(cjk_positions, mid)
+        if cjk + (mid - cjk) // 4 + 1 <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    
+    # 截断点前面不远处有换行时，在换行处截断，避免留下半句话
+    cut = text.rfind("\n", 0, low)
+    if cut < low * 0.9:
+        cut = low
+    return text[:cut].rstrip() + "..."
+
+
+def estimate_tokens(text):
+    """
+    估算文本的token数（中文约1字1个token，其他字符约4个1个token，宁多勿少）
+    """
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk) // 4 + 1
+
+
+def split_token_batches(articles, batch_tokens, encoding=None):
+    """
+    按token预算把文章分批（保持原顺序，单篇超出预算时单独成批）
     
     Args:
         articles: 清洗后的文章列表
-        api_key: Claude API密钥
+        batch_tokens: 每批文章数据的token上限
+        encoding: prepare_articles_data 的编码参数（见 batch_encoding）
     
     Returns:
-        分析报告的JSON数据
+        文章列表的列表
+    """
+    batches = []
+    batch = []
+    used = 0
+    for article in articles:
+        tokens = estimate_tokens(prepare_articles_data([article], **batch_encoding(encoding, batch_tokens)))
+        if batch and used + tokens > batch_tokens:
+            batches.append(batch)
+            batch = []
+            used = 0
+        batch.append(article)
+        used += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def batch_encoding(encoding, batch_tokens):
+    """
+    分批分析时每批的编码参数：设置了 token_budget 时，每批的预算不超过 batch_tokens
     """
-    # 加载提示词模板
+    encoding = dict(encoding or {})
+    if encoding.get("token_budget") is not None:
+        encoding["token_budget"] = min(encoding["token_budget"], batch_tokens)
+    return encoding
+
+
+def build_analyze_prompt(articles, encoding=None):
+    """单次分析的提示词：全部文章放进 docs/prompts/analyze_prompt.md"""
     prompt_template = load_prompt_template()
     
     # 准备数据
-    articles_json = prepare_articles_data(articles)
+    articles_json = prepare_articles_data(articles, **(encoding or {}))
     account_names = set([a["author"] for a in articles])
     
     # 替换模板变量
     prompt = prompt_template.replace("{article_count}", str(len(articles)))
     prompt = prompt.replace("{account_count}", str(len(account_names)))
     prompt = prompt.replace("{articles_data}", articles_json)
-    
-    # 调用Claude API
-    client = Anthropic(api_key=api_key)
-    
-    print("正在调用Claude API分析...")
-    print(f"文章数量: {len(articles)}")
-    print(f"预计token数: ~{len(prompt)//4}")
-    
-    response = client.messages.create(
-        model="claude-3-5-sonnet-20241022",
-        max_tokens=8000,
-        temperature=0.7,  # 保持一定创造性
-        messages=[
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
-    )
-    
-    # 解析返回的JSON
-    result_text = response.content[0].text
-    
-    # 清理可能的代码块标记
+    return prompt
+
+
+def parse_json_response(result_text):
+    """解析模型返回的JSON（去掉可能的代码块标记）"""
     result_text = result_text.strip()
     if result_text.startswith("```json"):
         result_text = result_text[7:]
@@ -109,18 +222,72 @@ def analyze_with_claude(articles, api_key):
         result_text = result_text[3:]
     if result_text.endswith("```"):
         result_text = result_text[:-3]
-    result_text = result_text.strip()
+    return json.loads(result_text.strip())
+
+
+async def _call_llm(client, prompt, max_tokens=8000):
+    """
+    调用大模型并解析返回的JSON
     
+    Args:
+        client: llm_client.LLMClient
+        prompt: 用户提示词
+        max_tokens: 最大输出token数
+    
+    Returns:
+        (解析后的JSON, 输入token数, 输出token数)
+    """
+    result_text, input_tokens, output_tokens = await client.complete(
+        prompt, system=SYSTEM_PROMPT, max_tokens=max_tokens
+    )
     try:
-        report = json.loads(result_text)
-        print("✅ AI分析完成")
-        return report
+        return parse_json_response(result_text), input_tokens, output_tokens
     except json.JSONDecodeError as e:
         print(f"❌ JSON解析失败: {e}")
-        print(f"原始返回内容:\n{result_text}")
+        print(f"原始返回内容:\n{result_text[:500]}...")
         raise
 
 
+async def analyze_single(articles, client, encoding=None):
+    """
+    单次分析：全部文章放进一次调用
+    
+    Args:
+        articles: 清洗后的文章列表
+        client: llm_client.LLMClient
+        encoding: prepare_articles_data 的编码参数，如 {"compact": True, "token_budget": 60000}
+    
+    Returns:
+        分析报告的JSON数据
+    """
+    prompt = build_analyze_prompt(articles, encoding)
+    
+    print(f"🚀 正在调用 {client.provider} API 分析（{client.model}）...")
+    print(f"📊 文章数量: {len(articles)}")
+    print(f"💰 预计token数: ~{estimate_tokens(prompt)}")
+    
+    report, input_tokens, output_tokens = await _call_llm(client, prompt)
+    print("✅ AI分析完成")
+    print(f"💰 Token使用: 输入{input_tokens}, 输出{output_tokens}")
+    return report
+
+
+def analyze_with_claude(articles, api_key, model=None, base_url=None):
+    """
+    使用Claude分析文章
+    
+    Args:
+        articles: 清洗后的文章列表
+        api_key: Claude API密钥
+        model: 模型名称（默认见 llm_client.PROVIDERS，main.py 传入 config.CLAUDE_MODEL）
+        base_url: API地址
+    
+    Returns:
+        分析报告的JSON数据
+    """
+    return asyncio.run(analyze_single(articles, get_client("claude", api_key, model, base_url)))
+
+
 def analyze_with_deepseek(articles, api_key, base_url="https://api.deepseek.com", model="deepseek-chat"):
     """
     使用DeepSeek分析文章（推荐：便宜好用）
@@ -134,125 +301,289 @@ def analyze_with_deepseek(articles, api_key, base_url="https://api.deepseek.com"
     Returns:
         分析报告的JSON数据
     """
-    if OpenAI is None:
-        raise ImportError("需要安装openai库: pip install openai")
+    return asyncio.run(analyze_single(articles, get_client("deepseek", api_key, model, base_url)))
+
+
+def analyze_with_openai(articles, api_key, base_url="https://api.openai.com/v1", model="gpt-4o-mini"):
+    """
+    使用OpenAI分析文章（备选方案）
     
-    # 加载提示词模板
-    prompt_template = load_prompt_template()
+    Args:
+        articles: 清洗后的文章列表
+        api_key: OpenAI API密钥
+        base_url: API地址（可用于代理）
+        model: 模型名称
     
-    # 准备数据
-    articles_json = prepare_articles_data(articles)
-    account_names = set([a["author"] for a in articles])
+    Returns:
+        分析报告的JSON数据
+    """
+    return asyncio.run(analyze_single(articles, get_client("openai", api_key, model, base_url)))
+
+
+async def analyze_batch(batch, batch_index, batch_count, client, encoding=None):
+    """
+    map：分析一批文章，返回中间结果（逐篇评分、候选选题、热点话题），见 docs/prompts/map_prompt.md
+    """
+    prompt = load_prompt_template("map_prompt.md")
+    prompt = prompt.replace("{batch_index}", str(batch_index))
+    prompt = prompt.replace("{batch_count}", str(batch_count))
+    prompt = prompt.replace("{article_count}", str(len(batch)))
+    prompt = prompt.replace("{articles_data}", prepare_articles_data(batch, **(encoding or {})))
+    
+    partial, input_tokens, output_tokens = await _call_llm(client, prompt, max_tokens=4000)
+    print(f"   ✅ 第 {batch_index}/{batch_count} 批完成（{len(batch)} 篇, 输入{input_tokens}, 输出{output_tokens} token）")
+    return partial
+
+
+def merge_partial_results(partials, articles):
+    """
+    合并各批的中间结果，作为汇总提示词的输入
     
-    # 替换模板变量
-    prompt = prompt_template.replace("{article_count}", str(len(articles)))
-    prompt = prompt.replace("{account_count}", str(len(account_names)))
-    prompt = prompt.replace("{articles_data}", articles_json)
+    Returns:
+        (汇总输入, 高价值文章数)
+    """
+    # 以输入的文章为准，忽略模型编造的链接
+    known_urls = {article.get("url") for article in articles}
+    
+    scored = {}
+    for partial in partials:
+        for item in partial.get("articles", []):
+            if item.get("url") in known_urls:
+                scored[item["url"]] = item
+    
+    ranked = sorted(scored.values(), key=lambda item: item.get("score") or 0, reverse=True)
+    high_value_count = sum(1 for item in ranked if (item.get("score") or 0) >= 7)
+    
+    merged = {
+        "articles": ranked[:REDUCE_TOP_ARTICLES],
+        "topic_candidates": [topic for partial in partials for topic in partial.get("topic_candidates", [])],
+        "hot_topics": [topic for partial in partials for topic in partial.get("hot_topics", [])],
+    }
+    return merged, high_value_count
+
+
+async def analyze_articles_mapreduce(articles, client, batch_tokens=12000, encoding=None):
+    """
+    分批分析：按token预算分批并发分析（map），再汇总成日报（reduce）
     
-    # 调用DeepSeek API（兼容OpenAI格式）
-    client = OpenAI(api_key=api_key, base_url=base_url)
+    文章多时单次调用受上下文窗口和输出长度限制，且一次大调用耗时最长；
+    分批后每次调用的输入都在预算内，各批并发执行（并发数受客户端的并发上限控制），汇总调用只看中间结果
     
-    print("🚀 正在调用DeepSeek API分析...")
-    print(f"📊 文章数量: {len(articles)}")
-    print(f"💰 预计token数: ~{len(prompt)//4}")
+    Args:
+        articles: 清洗后的文章列表
+        client: llm_client.LLMClient
+        batch_tokens: 每批文章数据的token上限
+        encoding: prepare_articles_data 的编码参数（token_budget 按批计算，不超过 batch_tokens）
     
-    try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "你是一位资深的AI领域内容分析师和选题策划专家。请严格按照JSON格式返回分析结果。"
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=8000,
-            response_format={"type": "json_object"}  # 强制JSON输出
-        )
-        
-        # 解析返回的JSON
-        result_text = response.choices[0].message.content
-        
+    Returns:
+        分析报告的JSON数据（与单次分析的格式相同）
+    """
+    batches = split_token_batches(articles, batch_tokens, encoding)
+    encoding = batch_encoding(encoding, batch_tokens)
+    print(f"🧩 分批分析: {len(articles)} 篇文章分成 {len(batches)} 批（每批约 {batch_tokens} token），"
+          f"最多 {client.max_concurrency} 批并发")
+    
+    async def run(index, batch):
         try:
-            report = json.loads(result_text)
-            print("✅ DeepSeek分析完成")
-            print(f"💰 Token使用: 输入{response.usage.prompt_tokens}, 输出{response.usage.completion_tokens}")
-            return report
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON解析失败: {e}")
-            print(f"原始返回内容:\n{result_text[:500]}...")
-            raise
-            
-    except Exception as e:
-        print(f"❌ DeepSeek API调用失败: {e}")
-        raise
+            return await analyze_batch(batch, index, len(batches), client, encoding)
+        except Exception as e:
+            print(f"   ⚠️  第 {index}/{len(batches)} 批分析失败: {e}")
+            return None
+    
+    results = await asyncio.gather(*(run(index, batch) for index, batch in enumerate(batches, 1)))
+    partials = [partial for partial in results if partial is not None]
+    
+    if not partials:
+        raise RuntimeError("所有批次都分析失败")
+    
+    print("🧮 正在汇总各批结果...")
+    return await reduce_report(partials, articles, client)
 
 
-def analyze_with_openai(articles, api_key, base_url="https://api.openai.com/v1", model="gpt-4o-mini"):
+async def reduce_report(partials, articles, client):
     """
-    使用OpenAI分析文章（备选方案）
+    reduce：把中间结果汇总成日报，见 docs/prompts/reduce_prompt.md
     
     Args:
+        partials: 中间结果列表（格式见 docs/prompts/map_prompt.md）
         articles: 清洗后的文章列表
-        api_key: OpenAI API密钥
-        base_url: API地址（可用于代理）
-        model: 模型名称
+        client: llm_client.LLMClient
     
     Returns:
         分析报告的JSON数据
     """
-    if OpenAI is None:
-        raise ImportError("需要安装openai库: pip install openai")
+    merged, high_value_count = merge_partial_results(partials, articles)
+    account_count = len({article.get("author") for article in articles})
+    
+    prompt = load_prompt_template("reduce_prompt.md")
+    prompt = prompt.replace("{article_count}", str(len(articles)))
+    prompt = prompt.replace("{account_count}", str(account_count))
+    prompt = prompt.replace("{partial_results}", json.dumps(merged, ensure_ascii=False, indent=2))
+    
+    report, input_tokens, output_tokens = await _call_llm(client, prompt)
+    print(f"✅ 汇总完成（输入{input_tokens}, 输出{output_tokens} token）")
+    
+    # 统计数据直接计算，不依赖模型
+    report["statistics"] = {
+        "total_articles": len(articles),
+        "accounts_count": account_count,
+        "high_value_count": high_value_count,
+    }
+    return report
+
+
+def analysis_fingerprint(provider, model, encoding=None):
+    """
+    逐篇分析的指纹，用于逐篇分析缓存（analysis_cache.py）的自动失效
     
-    # 加载提示词模板
-    prompt_template = load_prompt_template()
+    包含提示词文件内容（ANALYSIS_PROMPT_FILES）、提供商、模型、文章编码参数和 ANALYSIS_VERSION
+    """
+    parts = [str(ANALYSIS_VERSION), provider, model]
+    parts.extend(load_prompt_template(name) for name in ANALYSIS_PROMPT_FILES)
+    if encoding:
+        parts.append(json.dumps(encoding, sort_keys=True))
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+async def analyze_article(article, client, encoding=None):
+    """
+    逐篇分析一篇文章，见 docs/prompts/article_prompt.md
     
-    # 准备数据
-    articles_json = prepare_articles_data(articles)
-    account_names = set([a["author"] for a in articles])
+    Returns:
+        {"score", "value_point", "meets_criteria", "reason", "topics", "topic_idea"}
+    """
+    prompt = load_prompt_template("article_prompt.md")
+    prompt = prompt.replace("{article_data}", prepare_articles_data([article], **(encoding or {})))
+    analysis, _, _ = await _call_llm(client, prompt, max_tokens=1000)
+    return analysis
+
+
+def analyses_to_partial(articles, analyses):
+    """
+    把逐篇分析结果整理成中间结果的格式（与分批分析的 map 输出相同），交给 reduce_report 汇总
     
-    # 替换模板变量
-    prompt = prompt_template.replace("{article_count}", str(len(articles)))
-    prompt = prompt.replace("{account_count}", str(len(account_names)))
-    prompt = prompt.replace("{articles_data}", articles_json)
+    Args:
+        articles: 文章列表
+        analyses: 与 articles 一一对应的逐篇分析结果（分析失败的为None）
+    """
+    items = []
+    topic_candidates = []
+    topic_urls = {}
+    for article, analysis in zip(articles, analyses):
+        if not analysis:
+            continue
+        url = article.get("url")
+        items.append({
+            "url": url,
+            "title": article.get("title"),
+            "source": article.get("author"),
+            "score": analysis.get("score"),
+            "value_point": analysis.get("value_point"),
+            "meets_criteria": analysis.get("meets_criteria", []),
+            "reason": analysis.get("reason"),
+        })
+        if analysis.get("topic_idea"):
+            topic_candidates.append(dict(analysis["topic_idea"], reference_urls=[url]))
+        for topic in analysis.get("topics") or []:
+            topic_urls.setdefault(topic, []).append(url)
     
-    # 调用OpenAI API
-    client = OpenAI(api_key=api_key, base_url=base_url)
-    
-    print("正在调用OpenAI API分析...")
-    
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {
-                "role": "system",
-                "content": "你是一位资深的AI内容分析师。请严格按照JSON格式返回结果。"
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
-        temperature=0.7,
-        max_tokens=8000,
-        response_format={"type": "json_object"}  # 强制JSON输出
-    )
+    hot_topics = sorted(
+        ({"topic_name": topic, "urls": urls} for topic, urls in topic_urls.items() if len(urls) >= 2),
+        key=lambda topic: len(topic["urls"]), reverse=True
+    )[:HOT_TOPIC_LIMIT]
+    
+    return {"articles": items, "topic_candidates": topic_candidates, "hot_topics": hot_topics}
+
+
+async def analyze_articles_cached(articles, client, db_path="data/cache/analysis_cache.db", max_entries=20000,
+                                  encoding=None):
+    """
+    逐篇分析 + 汇总：每篇文章只分析一次（按 URL + 正文缓存），日报由一次汇总调用生成
+    
+    文章在24小时窗口内会出现在多次运行中，缓存后每次运行只有新文章需要调用模型，
+    汇总调用只看逐篇分析结果（评分、价值点、话题），不再发送正文
+    
+    Args:
+        articles: 清洗后的文章列表
+        client: llm_client.LLMClient（并发分析的文章数受它的并发上限控制）
+        db_path: 逐篇分析缓存的SQLite文件
+        max_entries: 逐篇分析缓存最多保存的文章数
+        encoding: prepare_articles_data 的编码参数（每篇单独编码，token_budget 即单篇的预算）
+    
+    Returns:
+        分析报告的JSON数据（与单次分析的格式相同）
+    """
+    articles = [Article.coerce(article) for article in articles]
+    cache = AnalysisCache(db_path, analysis_fingerprint(client.provider, client.model, encoding), max_entries)
+    try:
+        keys = [cache.make_key(article.get("url"), article.get("content_markdown")) for article in articles]
+        cached = cache.get_many(keys)
+        
+        pending = {}
+        for key, article in zip(keys, articles):
+            if key not in cached:
+                pending.setdefault(key, article)
+        print(f"📦 逐篇分析缓存: 命中 {len(articles) - len(pending)} 篇, 需要分析 {len(pending)} 篇")
+        
+        async def run(key, article):
+            try:
+                return key, await analyze_article(article, client, encoding)
+            except Exception as e:
+                print(f"   ⚠️  逐篇分析失败: {article.get('title')} - {e}")
+                return key, None
+        
+        results = await asyncio.gather(*(run(key, article) for key, article in pending.items()))
+        fresh = {key: analysis for key, analysis in results if analysis}
+        
+        cache.put_many({key: (pending[key].get("url"), analysis) for key, analysis in fresh.items()})
+    finally:
+        cache.close()
     
-    # 解析返回的JSON
-    result_text = response.choices[0].message.content
+    analyses = [cached.get(key) or fresh.get(key) for key in keys]
+    if not any(analyses):
+        raise RuntimeError("所有文章都分析失败")
+    
+    print("🧮 正在汇总逐篇分析结果...")
+    return await reduce_report([analyses_to_partial(articles, analyses)], articles, client)
+
+
+def summarize_articles(articles, target_tokens=800, cache_file=None, max_entries=50000):
+    """
+    发给AI之前先在本地做抽取式摘要（summarizer.py），用摘要代替正文
+    
+    Args:
+        articles: 清洗后的文章列表（不会被修改）
+        target_tokens: 每篇摘要的目标token数（更短的文章保留全文）
+        cache_file: 摘要缓存的SQLite文件（None表示不缓存）
+        max_entries: 摘要缓存最多保存的文章数
     
+    Returns:
+        文章列表的副本，content_markdown 换成摘要（word_count 仍是原文字数）
+    """
+    from summarizer import Summarizer
+    
+    articles = [Article.coerce(article) for article in articles]
+    summarizer = Summarizer(target_tokens, cache_file, max_entries)
     try:
-        report = json.loads(result_text)
-        print("✅ AI分析完成")
-        return report
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON解析失败: {e}")
-        print(f"原始返回内容:\n{result_text}")
-        raise
+        start = time.perf_counter()
+        digests = summarizer.summarize_many(
+            [(article.get("title", ""), article.get("content_markdown", "")) for article in articles]
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        summarizer.close()
+    
+    summarized = []
+    for article, digest in zip(articles, digests):
+        copy = Article.from_dict(article.to_dict())
+        copy["content_markdown"] = digest
+        summarized.append(copy)
+    
+    before = sum(estimate_tokens(article.get("content_markdown", "")) for article in articles)
+    after = sum(estimate_tokens(digest) for digest in digests)
+    print(f"📝 本地摘要: 正文 ~{before} → ~{after} token（新计算 {summarizer.misses} 篇, "
+          f"缓存命中 {summarizer.hits} 篇, 耗时 {elapsed:.2f}s）")
+    return summarized
 
 
 def analyze_articles(articles, ai_provider="deepseek", api_key=None, **kwargs):
@@ -263,7 +594,16 @@ def analyze_articles(articles, ai_provider="deepseek", api_key=None, **kwargs):
         articles: 清洗后的文章列表
         ai_provider: "deepseek", "claude" 或 "openai"
         api_key: API密钥
-        **kwargs: 额外参数（如base_url, model等）
+        **kwargs: 额外参数（如base_url, model等）；
+            client_options: LLMClient 的超时、重试、并发上限等参数，如 {"read_timeout": 180, "max_concurrency": 4}；
+            map_reduce: 分批分析参数，如 {"batch_tokens": 12000}，
+            文章数据超出一批的预算时使用 analyze_articles_mapreduce（None表示始终单次分析）；
+            analysis_cache: 逐篇分析缓存参数，如 {"db_path": "data/cache/analysis_cache.db"}，
+            设置后使用 analyze_articles_cached（优先于 map_reduce）；
+            article_encoding: 文章数据的编码参数，如 {"compact": True, "token_budget": 60000, "max_article_tokens": 4000}，
+            见 prepare_articles_data（None表示缩进的JSON，每篇正文取前2000字）；
+            summarizer: 本地摘要参数，如 {"target_tokens": 800, "cache_file": "data/cache/summary_cache.db"}，
+            设置后先用 summarize_articles 把正文换成摘要再分析（None表示发送正文）
     
     Returns:
         分析报告的JSON数据
@@ -278,21 +618,28 @@ def analyze_articles(articles, ai_provider="deepseek", api_key=None, **kwargs):
     today = datetime.now().strftime("%Y-%m-%d")
     
     ai_provider = ai_provider.lower()
+    if ai_provider not in PROVIDERS:
+        raise ValueError(f"不支持的AI提供商: {ai_provider}. 支持: deepseek, claude, openai")
+    
+    client = get_client(
+        ai_provider, api_key,
+        model=kwargs.get("model"),
+        base_url=kwargs.get("base_url"),
+        **(kwargs.get("client_options") or {})
+    )
+    
+    if kwargs.get("summarizer"):
+        articles = summarize_articles(articles, **kwargs["summarizer"])
     
-    if ai_provider == "deepseek":
-        base_url = kwargs.get("base_url", "https://api.deepseek.com")
-        model = kwargs.get("model", "deepseek-chat")
-        report = analyze_with_deepseek(articles, api_key, base_url, model)
-    elif ai_provider == "claude":
-        if Anthropic is None:
-            raise ImportError("需要安装anthropic库: pip install anthropic")
-        report = analyze_with_claude(articles, api_key)
-    elif ai_provider == "openai":
-        base_url = kwargs.get("base_url", "https://api.openai.com/v1")
-        model = kwargs.get("model", "gpt-4o-mini")
-        report = analyze_with_openai(articles, api_key, base_url, model)
+    encoding = kwargs.get("article_encoding")
+    analysis_cache = kwargs.get("analysis_cache")
+    map_reduce = kwargs.get("map_reduce")
+    if analysis_cache:
+        report = asyncio.run(analyze_articles_cached(articles, client, encoding=encoding, **analysis_cache))
+    elif map_reduce and len(split_token_batches(articles, map_reduce.get("batch_tokens", 12000), encoding)) > 1:
+        report = asyncio.run(analyze_articles_mapreduce(articles, client, encoding=encoding, **map_reduce))
     else:
-        raise ValueError(f"不支持的AI提供商: {ai_provider}. 支持: deepseek, claude, openai")
+        report = asyncio.run(analyze_single(articles, client, encoding))
     
     # 确保日期字段正确
     report["date"] = today
@@ -309,7 +656,7 @@ if __name__ == "__main__":
             "author": "陈老师AI进化论",
             "url": "http://example.com/1",
             "publish_time": "2025-12-28 10:00:00",
-            "content_text": "最近很多朋友问我，ChatGPT到底怎么用才能真正提升效率...",
+            "content_markdown": "最近很多朋友问我，ChatGPT到底怎么用才能真正提升效率...",
             "word_count": 2500
         },
         {
@@ -317,7 +664,7 @@ if __name__ == "__main__":
             "author": "ai瑞斯白-n8n版",
             "url": "http://example.com/2",
             "publish_time": "2025-12-28 15:30:00",
-            "content_text": "今天教大家用N8N搭建一个智能助手...",
+            "content_markdown": "今天教大家用N8N搭建一个智能助手...",
             "word_count": 3200
         }
     ]
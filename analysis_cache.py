@@ -0,0 +1,81 @@
+"""
+单篇分析缓存模块 - 按文章缓存AI的逐篇分析结果（SQLite）
+
+文章在24小时窗口内会被多次运行重复分析：
+- 键 = sha256(分析指纹 + URL + content_markdown)，值 = 逐篇分析结果（评分、价值点、话题标签等，JSON）
+- 分析指纹由 ai_analyzer.analysis_fingerprint() 计算（提示词文件内容 + 提供商 + 模型），
+  修改 docs/prompts/analyze_prompt.md 或逐篇提示词后，旧结果自动失效并在打开时清除
+- 条目数超过上限时按最近使用时间淘汰
+"""
+
+import hashlib
+import json
+
+from keyed_store import KeyedStore
+
+
+class AnalysisCache:
+    """逐篇分析结果的持久化缓存"""
+
+    def __init__(self, db_path, fingerprint, max_entries=20000):
+        """
+        Args:
+            db_path: SQLite文件路径
+            fingerprint: 分析指纹（不同指纹的缓存互不可见）
+            max_entries: 最多缓存的文章数
+        """
+        self.db_path = db_path
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._store = KeyedStore(
+            db_path, 'analyses', [('url', 'TEXT'), ('analysis', 'TEXT')], fingerprint, max_entries
+        )
+        # 提示词或模型变了，旧结果全部作废
+        if self._store.purged:
+            print(f"   ♻️  分析提示词已变化，清除 {self._store.purged} 条旧的逐篇分析")
+
+    def make_key(self, url, content):
+        """
+        计算缓存键
+
+        Args:
+            url: 文章链接
+            content: 文章正文（content_markdown）
+        """
+        digest = hashlib.sha256(self.fingerprint.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update((url or '').encode('utf-8'))
+        digest.update(b'\0')
+        digest.update((content or '').encode('utf-8'))
+        return digest.hexdigest()
+
+    def get_many(self, keys):
+        """
+        批量查询
+
+        Returns:
+            {key: 分析结果dict}（只包含命中的键）
+        """
+        keys = set(keys)
+        found = {key: json.loads(analysis) for key, (_, analysis) in self._store.get_many(keys).items()}
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries):
+        """
+        批量写入，并在超出容量时淘汰最久未使用的条目
+
+        Args:
+            entries: {key: (url, 分析结果dict)}
+        """
+        self._store.put_many({
+            key: (url, json.dumps(analysis, ensure_ascii=False))
+            for key, (url, analysis) in entries.items()
+        })
+
+    def close(self):
+        self._store.close()
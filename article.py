@@ -0,0 +1,165 @@
+"""
+文章记录 - 各模块之间传递的文章对象
+
+用 __slots__ 固定字段，比每篇文章一个dict省内存（见 benchmark.py memory），字段名也不会写错。
+同时兼容原来的dict写法（article['url']、article.get('summary')、'word_count' in article），
+旧字段名 link / published 会映射到 url / publish_time_raw。
+和dict一样按值比较（可以与dict比较），因此也和dict一样不可哈希，不能放进set或作为dict的键。
+
+字段:
+    title, author, url, guid          标题、公众号名称、链接、RSS guid
+    publish_time_raw, publish_time    RSS原始发布时间、格式化后的发布时间
+    publish_ts                        发布时间戳（秒，可能为None）
+    summary                           摘要
+    content_html                      原始HTML（体积最大，转换为Markdown后可以用 drop_html() 释放）
+    content_markdown, word_count      清洗后写入
+    reposted_by                       近似去重后写入（转载了这篇文章的其他公众号）
+"""
+
+from typing import List, Optional
+
+
+_MISSING = object()
+
+
+class Article:
+    """文章记录（未赋值的字段视为不存在，与dict缺少这个键的行为一致）"""
+
+    __slots__ = (
+        'title', 'author', 'url', 'guid',
+        'publish_time_raw', 'publish_time', 'publish_ts',
+        'summary', 'content_html',
+        'content_markdown', 'word_count', 'reposted_by',
+    )
+
+    # 字段类型（只有注解、不赋值，与 __slots__ 不冲突）
+    title: str
+    author: str
+    url: str
+    guid: str
+    publish_time_raw: str
+    publish_time: str
+    publish_ts: Optional[float]
+    summary: str
+    content_html: str
+    content_markdown: str
+    word_count: int
+    reposted_by: List[str]
+
+    FIELDS = __slots__
+
+    # 旧代码/外部数据中的字段名
+    ALIASES = {
+        'link': 'url',
+        'published': 'publish_time_raw',
+    }
+
+    def __init__(self, title='', author='', url='', guid='', publish_time_raw='', publish_time='',
+                 publish_ts=None, summary='', content_html='', **cleaned):
+        """
+        Args:
+            cleaned: 清洗阶段的字段（content_markdown、word_count、reposted_by），可选
+        """
+        self.title = title
+        self.author = author
+        self.url = url
+        self.guid = guid
+        self.publish_time_raw = publish_time_raw
+        self.publish_time = publish_time
+        self.publish_ts = publish_ts
+        self.summary = summary
+        self.content_html = content_html
+        for key, value in cleaned.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        从dict创建（如读取的JSON），识别旧字段名，忽略未知字段
+
+        Args:
+            data: 文章字典
+        """
+        article = cls.__new__(cls)
+        for key, value in data.items():
+            field = cls.ALIASES.get(key, key)
+            if field in cls.FIELDS:
+                setattr(article, field, value)
+        return article
+
+    @classmethod
+    def coerce(cls, article):
+        """Article原样返回，dict转换为Article"""
+        return article if isinstance(article, cls) else cls.from_dict(article)
+
+    def to_dict(self):
+        """转换为dict（只包含已赋值的字段），用于保存JSON"""
+        return {field: getattr(self, field) for field in self.FIELDS if hasattr(self, field)}
+
+    def drop_html(self):
+        """释放原始HTML"""
+        self.pop('content_html', None)
+
+    # ---- 兼容dict的访问方式 ----
+
+    @classmethod
+    def _field(cls, key):
+        field = cls.ALIASES.get(key, key)
+        if field not in cls.FIELDS:
+            raise KeyError(key)
+        return field
+
+    def __getitem__(self, key):
+        value = getattr(self, self._field(key), _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        setattr(self, self._field(key), value)
+
+    def __contains__(self, key):
+        field = self.ALIASES.get(key, key)
+        return field in self.FIELDS and hasattr(self, field)
+
+    def get(self, key, default=None):
+        field = self.ALIASES.get(key, key)
+        if field not in self.FIELDS:
+            return default
+        return getattr(self, field, default)
+
+    def pop(self, key, default=_MISSING):
+        field = self._field(key)
+        value = getattr(self, field, _MISSING)
+        if value is _MISSING:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        delattr(self, field)
+        return value
+
+    def keys(self):
+        return [field for field in self.FIELDS if hasattr(self, field)]
+
+    def items(self):
+        return self.to_dict().items()
+
+    # 字段可变，按值比较的对象不能作为集合元素或dict的键（与原来的dict一致），需要时用 url 去重
+    __hash__ = None
+
+    def __eq__(self, other):
+        if isinstance(other, Article):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Article(title={self.get('title')!r}, author={self.get('author')!r}, url={self.get('url')!r})"
+
+
+def json_default(obj):
+    """json.dump 的 default 参数：把Article序列化为dict"""
+    if isinstance(obj, Article):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
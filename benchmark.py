@@ -0,0 +1,617 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+性能基准测试
+
+用法:
+    python benchmark.py clean --workers 1 2 4 8            # 并行清洗的加速比
+    python benchmark.py clean --corpus data/raw_articles.json
+    python benchmark.py markdown --archive latest          # 各转换后端的速度和输出一致性
+    python benchmark.py ads --join 20                      # 广告过滤：合并正则与逐行逐关键词对比
+    python benchmark.py wordcount --fuzz 100000            # 字数统计：与旧实现的耗时和结果一致性
+    python benchmark.py memory --count 100000              # 文章记录：dict 与 Article 的每篇内存占用
+    python benchmark.py tokens --budgets 30000 60000       # 发给AI的文章数据：各编码格式的token数
+    python benchmark.py summarize --target-tokens 800      # 本地摘要：token数、耗时和内容覆盖率
+    python benchmark.py llm                                # 大模型客户端：并发上限、重试、错误传递（模拟服务）
+
+markdown / ads / wordcount 同时校验新实现与旧实现的输出完全一致，llm 校验大模型客户端的行为，
+校验不通过时以非零状态退出（可用于CI）
+
+语料默认使用合成的公众号风格文章；真实数据可以用
+--corpus 指定 main.py 保存的 raw_articles.json（config.SAVE_RAW_DATA = True），
+或用 --archive 读取 RSS原文归档（config.FEED_ARCHIVE_DIR，见 feed_archive.py）
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+
+from ad_rules import DEFAULT_AD_KEYWORDS
+from ai_analyzer import estimate_tokens, prepare_articles_data, truncate_to_tokens
+from article import Article
+from data_cleaner import (HTML_BACKENDS, calculate_word_count_markdown, clean_html_to_markdown,
+                          convert_article_html, convert_articles_html, remove_ads_markdown)
+
+
+def make_synthetic_article(seed):
+    """生成一篇公众号风格的HTML文章（段落、加粗、列表、图片、引导关注等）"""
+    rng = random.Random(seed)
+    words = ["AI", "大模型", "提示词", "工作流", "Claude", "智能体", "效率", "自动化",
+             "产品经理", "变现", "实战", "工具", "数据", "用户", "增长", "n8n"]
+    
+    parts = ['<section style="margin:0;padding:0">']
+    for i in range(rng.randint(20, 60)):
+        sentence = "，".join("".join(rng.choices(words, k=rng.randint(2, 5))) for _ in range(rng.randint(2, 6)))
+        kind = rng.random()
+        if kind < 0.1:
+            parts.append(f'<h2><span style="color:#333">第{i}部分：{sentence[:20]}</span></h2>')
+        elif kind < 0.2:
+            items = "".join(f"<li><p>{w}：{sentence[:30]}</p></li>" for w in rng.sample(words, 3))
+            parts.append(f"<ul>{items}</ul>")
+        elif kind < 0.3:
+            parts.append(f'<p><img data-src="https://mmbiz.qpic.cn/{seed}_{i}.png" '
+                         f'src="https://img-proxy/{seed}_{i}.png" alt="图片"></p>')
+        elif kind < 0.35:
+            parts.append(f"<blockquote><p>{sentence}</p></blockquote>")
+        else:
+            parts.append(f'<p style="line-height:1.75"><span>{sentence}，'
+                         f'<strong>{rng.choice(words)}</strong>是关键。</span></p>')
+    parts.append("<p>扫码关注公众号，获取更多AI干货</p><p>微信：ai_helper_2025</p>")
+    parts.append("<script>var a = 1;</script></section>")
+    return "".join(parts)
+
+
+def load_archive_articles(manifest='latest', archive_dir='data/archive'):
+    """从RSS原文归档中读取所有文章（不做时间过滤）"""
+    from feed_archive import FeedArchive
+    from feed_stream import extract_articles_streaming
+    
+    archive = FeedArchive(archive_dir)
+    articles = []
+    for bid, feed in archive.load_manifest(manifest)['feeds'].items():
+        feed_articles, _ = extract_articles_streaming(archive.load(feed['sha256']), feed['name'], filter_24h=False)
+        articles.extend(feed_articles)
+    return articles
+
+
+def load_archive_corpus(manifest='latest', archive_dir='data/archive'):
+    """从RSS原文归档中读取所有文章的HTML（不做时间过滤）"""
+    return [a['content_html'] for a in load_archive_articles(manifest, archive_dir) if a['content_html']]
+
+
+def load_corpus(corpus_path=None, count=300, archive=None, archive_dir='data/archive'):
+    """
+    加载测试语料
+    
+    Returns:
+        HTML内容列表
+    """
+    if archive:
+        htmls = load_archive_corpus(archive, archive_dir)
+        print(f"📚 语料: RSS原文归档 {archive}（{len(htmls)} 篇）")
+        return htmls
+    
+    if corpus_path:
+        with open(corpus_path, 'r', encoding='utf-8') as f:
+            articles = json.load(f)
+        htmls = [a.get('content_html', '') for a in articles if a.get('content_html')]
+        print(f"📚 语料: {corpus_path}（{len(htmls)} 篇）")
+        return htmls
+    
+    htmls = [make_synthetic_article(i) for i in range(count)]
+    print(f"📚 语料: 合成文章 {len(htmls)} 篇")
+    return htmls
+
+
+def bench_clean(args):
+    """并行清洗：不同进程数的耗时和加速比，并校验输出与串行完全一致"""
+    htmls = load_corpus(args.corpus, args.count, args.archive, args.archive_dir)
+    print(f"🖥️  CPU核数: {os.cpu_count()}")
+    
+    start = time.perf_counter()
+    expected = [convert_article_html(html) for html in htmls]
+    baseline = time.perf_counter() - start
+    print(f"\n串行: {baseline:.2f}s")
+    
+    print(f"\n{'进程数':>6} {'耗时':>8} {'加速比':>8} {'输出一致':>8}")
+    for workers in args.workers:
+        start = time.perf_counter()
+        result = convert_articles_html(htmls, workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>6} {elapsed:>7.2f}s {baseline / elapsed:>7.2f}x {'✅' if result == expected else '❌':>8}")
+
+
+def bench_markdown(args):
+    """
+    各HTML→Markdown转换后端：耗时，以及与旧流程（markdownify）输出是否一致
+    
+    Returns:
+        所有后端的输出是否都与旧流程一致
+    """
+    htmls = load_corpus(args.corpus, args.count, args.archive, args.archive_dir)
+    
+    outputs = {}
+    timings = {}
+    for backend in HTML_BACKENDS:
+        start = time.perf_counter()
+        outputs[backend] = [clean_html_to_markdown(html, backend=backend) for html in htmls]
+        timings[backend] = time.perf_counter() - start
+    
+    golden = outputs['markdownify']
+    baseline = timings['markdownify']
+    
+    print(f"\n{'后端':<12} {'耗时':>8} {'加速比':>8} {'与旧流程一致':>12}")
+    for backend in HTML_BACKENDS:
+        same = sum(1 for a, b in zip(outputs[backend], golden) if a == b)
+        print(f"{backend:<12} {timings[backend]:>7.2f}s {baseline / timings[backend]:>7.2f}x {same:>7}/{len(htmls)}")
+    
+    # 打印第一处不一致，便于排查
+    consistent = True
+    for backend in HTML_BACKENDS:
+        for html, a, b in zip(htmls, outputs[backend], golden):
+            if a != b:
+                print(f"\n⚠️  {backend} 输出不一致示例:\n--- 旧流程 ---\n{b[:500]}\n--- {backend} ---\n{a[:500]}")
+                consistent = False
+                break
+    return consistent
+
+
+def legacy_remove_ads_markdown(markdown_text, keywords=DEFAULT_AD_KEYWORDS):
+    """旧版广告过滤（逐行、逐个关键词查找，再跑两个正则），作为对照"""
+    lines = markdown_text.split('\n')
+    cleaned_lines = []
+    
+    for line in lines:
+        has_ad = False
+        for keyword in keywords:
+            if keyword in line:
+                has_ad = True
+                break
+        
+        if re.search(r'微信[：:]\s*[a-zA-Z0-9_-]+', line):
+            has_ad = True
+        if re.search(r'电话[：:]\s*\d{11}', line):
+            has_ad = True
+        
+        if not has_ad:
+            cleaned_lines.append(line)
+    
+    return '\n'.join(cleaned_lines)
+
+
+# 边界情况：末行是广告、连续广告行、空行、跨行的"微信："、\r、全角空格
+AD_EDGE_CASES = [
+    "",
+    "广告",
+    "正文\n广告",
+    "正文\n\n广告",
+    "广告\n",
+    "广告\n正文\n推广\n赞助",
+    "微信：\nabc\n正文",
+    "微信：\u3000abc\n电话: 13800138000\n电话：13800138000\r\n正文",
+    "\n\n正文\n阅读原文\n\n",
+]
+
+
+def bench_ads(args):
+    """
+    广告过滤：合并正则与旧版逐行逐关键词查找的耗时，并校验删除的行完全一致
+    
+    Returns:
+        输出是否完全一致
+    """
+    htmls = load_corpus(args.corpus, args.count, args.archive, args.archive_dir)
+    markdowns = [clean_html_to_markdown(html) for html in htmls]
+    
+    # 把多篇拼成长文章
+    texts = ['\n'.join(markdowns[i:i + args.join]) for i in range(0, len(markdowns), args.join)]
+    print(f"📄 长文章: {len(texts)} 篇，平均 {sum(map(len, texts)) // max(1, len(texts))} 字符")
+    
+    extra = tuple(args.keywords)
+    keywords = tuple(dict.fromkeys(DEFAULT_AD_KEYWORDS + extra))
+    
+    mismatches = 0
+    for text in texts + AD_EDGE_CASES:
+        if remove_ads_markdown(text, keywords) != legacy_remove_ads_markdown(text, keywords):
+            mismatches += 1
+            if mismatches == 1:
+                print(f"\n⚠️  输出不一致示例:\n{text[:500]!r}")
+    
+    timings = {}
+    for name, func in (('逐行逐关键词', legacy_remove_ads_markdown), ('合并正则', remove_ads_markdown)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for text in texts:
+                func(text, keywords)
+        timings[name] = time.perf_counter() - start
+    
+    baseline = timings['逐行逐关键词']
+    print(f"\n{'实现':<10} {'耗时':>8} {'加速比':>8}")
+    for name, elapsed in timings.items():
+        print(f"{name:<10} {elapsed:>7.3f}s {baseline / elapsed:>7.2f}x")
+    print(f"\n输出一致: {'✅' if not mismatches else f'❌（{mismatches} 篇不一致）'}")
+    return not mismatches
+
+
+def legacy_calculate_word_count_markdown(markdown_text):
+    """旧版字数统计（12次整篇正则替换），作为对照"""
+    if not markdown_text:
+        return 0
+    
+    text = re.sub(r'^#+\s+', '', markdown_text, flags=re.MULTILINE)
+    text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
+    text = re.sub(r'__([^_]+)__', r'\1', text)
+    text = re.sub(r'\*([^*]+)\*', r'\1', text)
+    text = re.sub(r'_([^_]+)_', r'\1', text)
+    text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
+    text = re.sub(r'!\[([^\]]*)\]\([^\)]+\)', '', text)
+    text = re.sub(r'^\s*[\*\-\+]\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^>\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'```[^\n]*\n.*?```', '', text, flags=re.DOTALL)
+    text = re.sub(r'`([^`]+)`', r'\1', text)
+    
+    text_no_space = re.sub(r'\s+', '', text)
+    return len(text_no_space)
+
+
+# 随机拼接Markdown片段，覆盖标记之间的各种组合（跨行的加粗、标题后接列表、没有闭合的标记等）
+WORD_COUNT_FUZZ_TOKENS = [
+    '*', '**', '_', '__', '#', '# ', '\n', '\n\n', ' ', '\t', '\u3000', '\x85',
+    '[', ']', '(', ')', '![', '](', '-', '+', '.', '1.', '12. ', '>', '> ', '`', '```',
+    'a', '中文', '\\*',
+]
+
+
+def bench_wordcount(args):
+    """
+    字数统计：新旧实现的耗时，并在语料和随机拼接的Markdown上校验结果完全一致
+    
+    Returns:
+        结果是否完全一致
+    """
+    htmls = load_corpus(args.corpus, args.count, args.archive, args.archive_dir)
+    markdowns = [remove_ads_markdown(clean_html_to_markdown(html)) for html in htmls]
+    
+    rng = random.Random(0)
+    fuzz = [
+        ''.join(rng.choices(WORD_COUNT_FUZZ_TOKENS, k=rng.randint(0, 40)))
+        for _ in range(args.fuzz)
+    ]
+    
+    consistent = True
+    for name, texts in (('语料', markdowns), ('随机拼接', fuzz)):
+        mismatches = [t for t in texts if calculate_word_count_markdown(t) != legacy_calculate_word_count_markdown(t)]
+        print(f"{name}: {len(texts)} 篇，结果一致 {'✅' if not mismatches else f'❌（{len(mismatches)} 篇不一致）'}")
+        if mismatches:
+            print(f"   示例: {mismatches[0][:200]!r}")
+            consistent = False
+    
+    timings = {}
+    for name, func in (('逐步替换', legacy_calculate_word_count_markdown), ('跳过+切分', calculate_word_count_markdown)):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for text in markdowns:
+                func(text)
+        timings[name] = time.perf_counter() - start
+    
+    baseline = timings['逐步替换']
+    per_article = args.repeat * max(1, len(markdowns))
+    print(f"\n{'实现':<10} {'每篇耗时':>10} {'加速比':>8}")
+    for name, elapsed in timings.items():
+        print(f"{name:<10} {elapsed / per_article * 1e6:>8.1f}us {baseline / elapsed:>7.2f}x")
+    return consistent
+
+
+def make_article_fields(count):
+    """生成 count 篇文章的字段值（各篇的字符串互不共享，与真实数据一致）"""
+    fields = []
+    for i in range(count):
+        pub = f"Mon, {i % 28 + 1:02d} Sep 2025 {i % 24:02d}:{i % 60:02d}:00 +0800"
+        fields.append({
+            'title': f"第{i}篇：用AI工作流把周报时间从2小时缩短到10分钟",
+            'author': f"公众号{i % 500}",
+            'url': f"https://mp.weixin.qq.com/s/{i:022d}",
+            'guid': f"https://mp.weixin.qq.com/s/{i:022d}",
+            'publish_time_raw': pub,
+            'publish_time': f"2025-09-{i % 28 + 1:02d} {i % 24:02d}:{i % 60:02d}:00",
+            'publish_ts': 1756684800.0 + i,
+            'summary': f"摘要{i}：大模型、提示词和自动化工具的实战经验",
+            'content_html': f"<p>正文{i}</p>",
+            'content_markdown': f"正文{i}",
+            'word_count': 500 + i % 3000,
+        })
+    return fields
+
+
+def measure_records(fields, factory):
+    """用 factory 创建所有记录，返回记录本身占用的字节数（字段值事先已生成，不计入）"""
+    records = [None] * len(fields)
+    tracemalloc.start()
+    for i, values in enumerate(fields):
+        records[i] = factory(values)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def bench_memory(args):
+    """文章记录的内存占用：dict 与 __slots__ 的 Article 对比（字段值相同，只比较记录本身）"""
+    fields = make_article_fields(args.count)
+    sizes = {
+        'dict': measure_records(fields, dict),
+        'Article': measure_records(fields, lambda values: Article(**values)),
+    }
+    
+    print(f"文章数: {args.count}")
+    print(f"\n{'记录':<10} {'每篇':>8} {'总计':>10}")
+    for name, size in sizes.items():
+        print(f"{name:<10} {size / args.count:>6.0f} B {size / 1024 / 1024:>7.1f} MB")
+    saved = sizes['dict'] - sizes['Article']
+    print(f"{'节省':<10} {saved / args.count:>6.0f} B {saved / 1024 / 1024:>7.1f} MB ({saved / sizes['dict']:.0%})")
+    
+    # 字段一致性：Article 与 dict 的 to_dict / JSON 结果相同
+    same = all(Article(**values).to_dict() == values for values in fields[:1000])
+    print(f"\nto_dict 与原始字典一致: {'✅' if same else '❌'}")
+
+
+def load_cleaned_articles(corpus_path=None, count=300, archive=None, archive_dir='data/archive'):
+    """
+    加载测试语料并转换为Markdown（保留标题、公众号、链接等字段，合成文章使用公众号风格的字段值）
+    
+    Returns:
+        Article列表（包含content_markdown和word_count）
+    """
+    if archive:
+        articles = load_archive_articles(archive, archive_dir)
+        print(f"📚 语料: RSS原文归档 {archive}（{len(articles)} 篇）")
+    elif corpus_path:
+        with open(corpus_path, 'r', encoding='utf-8') as f:
+            articles = [Article.from_dict(a) for a in json.load(f)]
+        print(f"📚 语料: {corpus_path}（{len(articles)} 篇）")
+    else:
+        articles = [
+            Article(
+                title=f"第{i}篇：用AI工作流把周报时间从2小时缩短到10分钟",
+                author=f"公众号{i % 10}",
+                url=f"https://mp.weixin.qq.com/s/{i:022d}",
+                publish_time=f"2025-09-01 {i % 24:02d}:{i % 60:02d}:00",
+                content_html=make_synthetic_article(i),
+            )
+            for i in range(count)
+        ]
+        print(f"📚 语料: 合成文章 {len(articles)} 篇")
+    
+    articles = [a for a in articles if a['content_html']]
+    for article in articles:
+        article['content_markdown'], article['word_count'] = convert_article_html(article['content_html'])
+        article.drop_html()
+    return articles
+
+
+def bench_tokens(args):
+    """发给AI的文章数据：缩进JSON与紧凑格式的token数，以及按预算分配正文后保留的内容"""
+    articles = load_cleaned_articles(args.corpus, args.count, args.archive, args.archive_dir)
+    legacy = prepare_articles_data(articles)
+    compact = prepare_articles_data(articles, compact=True)
+    content_tokens = sum(estimate_tokens(a['content_markdown']) for a in articles)
+    
+    # 紧凑格式只改变排版：还原后与缩进JSON的数据完全相同
+    table = json.loads(compact)
+    decoded = [dict(zip(table['fields'], row)) for row in table['rows']]
+    print(f"紧凑格式还原后与缩进JSON一致: {'✅' if decoded == json.loads(legacy) else '❌'}")
+    print(f"正文全文: {content_tokens} token（{len(articles)} 篇）")
+    
+    # 每篇的格式开销（字段名、缩进、引号等，不含正文）
+    empty = [Article.from_dict(dict(a.to_dict(), content_markdown='')) for a in articles]
+    overhead = {name: estimate_tokens(prepare_articles_data(empty, compact=flag)) / len(articles)
+                for name, flag in (('缩进JSON', False), ('紧凑', True))}
+    print(f"每篇格式开销: 缩进JSON {overhead['缩进JSON']:.1f} token, 紧凑 {overhead['紧凑']:.1f} token "
+          f"（节省 {1 - overhead['紧凑'] / overhead['缩进JSON']:.0%}）")
+    
+    rows = [('缩进JSON, 前2000字', legacy), ('紧凑, 前2000字', compact)]
+    # 默认预算与缩进JSON的token数相同：同样的token数能多发多少正文
+    for budget in [estimate_tokens(legacy)] + (args.budgets or []):
+        rows.append((f"紧凑, 预算{budget}", prepare_articles_data(
+            articles, compact=True, token_budget=budget, max_article_tokens=args.max_article_tokens
+        )))
+    
+    baseline = estimate_tokens(legacy)
+    print(f"\n{'格式':<22} {'token数':>8} {'节省':>7} {'正文保留':>8} {'完整保留':>8}")
+    for name, data in rows:
+        tokens = estimate_tokens(data)
+        if data.startswith('{'):
+            contents = [row[-1] for row in json.loads(data)['rows']]
+        else:
+            contents = [item['content'] for item in json.loads(data)]
+        kept = sum(estimate_tokens(content) for content in contents)
+        whole = sum(1 for content, a in zip(contents, articles) if content == a['content_markdown'])
+        print(f"{name:<22} {tokens:>8} {1 - tokens / baseline:>7.1%} {kept / content_tokens:>8.1%} "
+              f"{whole:>4}/{len(articles)}")
+
+
+def bench_summarize(args):
+    """本地摘要：摘要前后的token数、耗时（首次计算与缓存命中），以及与只取开头相比覆盖了多少原文内容"""
+    import tempfile
+    from summarizer import Summarizer, sentence_bigrams, split_sentences
+    
+    articles = load_cleaned_articles(args.corpus, args.count, args.archive, args.archive_dir)
+    if args.join > 1:
+        # 合成文章偏短，几篇拼成一篇模拟长文
+        articles = [
+            Article(title=articles[i]['title'], author=articles[i]['author'], url=articles[i]['url'],
+                    content_markdown='\n\n'.join(a['content_markdown'] for a in articles[i:i + args.join]))
+            for i in range(0, len(articles), args.join)
+        ]
+    items = [(a['title'], a['content_markdown']) for a in articles]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        timings = {}
+        for name in ('首次计算', '缓存命中'):
+            summarizer = Summarizer(args.target_tokens, os.path.join(tmp, 'summary_cache.db'))
+            start = time.perf_counter()
+            digests = summarizer.summarize_many(items)
+            timings[name] = time.perf_counter() - start
+            summarizer.close()
+    
+    before = sum(estimate_tokens(markdown) for _, markdown in items)
+    after = sum(estimate_tokens(digest) for digest in digests)
+    longer = sum(1 for _, markdown in items if estimate_tokens(markdown) > args.target_tokens)
+    print(f"文章数: {len(items)}（超过 {args.target_tokens} token 需要摘要的 {longer} 篇）")
+    print(f"正文: {before} → {after} token（减少 {1 - after / before:.1%}）")
+    for name, elapsed in timings.items():
+        print(f"{name}: {elapsed:.2f}s（每篇 {elapsed / len(items) * 1000:.1f}ms）")
+    
+    # 覆盖率：原文的字二元组有多少出现在摘要中；对比同样token数的开头截断
+    coverage = {'摘要': [], '只取开头': []}
+    tail_share = []
+    for (_, markdown), digest in zip(items, digests):
+        if digest == markdown:
+            continue
+        full = sentence_bigrams(markdown)
+        lead = truncate_to_tokens(markdown, estimate_tokens(digest))
+        coverage['摘要'].append(len(sentence_bigrams(digest) & full) / len(full))
+        coverage['只取开头'].append(len(sentence_bigrams(lead) & full) / len(full))
+        positions = {sentence: i for i, (_, sentence) in enumerate(split_sentences(markdown))}
+        picked = [positions[sentence] for _, sentence in split_sentences(digest) if sentence in positions]
+        tail_share.append(sum(1 for i in picked if i >= len(positions) / 2) / max(1, len(picked)))
+    if tail_share:
+        for name, values in coverage.items():
+            print(f"原文内容覆盖率（{name}）: {sum(values) / len(values):.1%}")
+        print(f"摘要中来自后半篇的句子: {sum(tail_share) / len(tail_share):.1%}")
+
+
+def bench_llm(args):
+    """
+    大模型客户端：在本地模拟服务（fake_llm_server.py）上校验并发上限、429/5xx重试、错误传递和读取超时
+    
+    Returns:
+        所有检查是否通过
+    """
+    import asyncio
+    import threading
+    import requests
+    from fake_llm_server import FakeLLMServer
+    from llm_client import LLMClient, LLMError
+    
+    def run(calls, server_options=None, **client_options):
+        """启动模拟服务，并发发出 calls 个请求，返回 (各请求的结果或异常, 服务端统计, 耗时)"""
+        server = FakeLLMServer(('127.0.0.1', 0), **(server_options or {}))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = LLMClient('deepseek', 'sk-test', base_url=f"http://127.0.0.1:{server.server_address[1]}",
+                           **client_options)
+        
+        async def complete_all():
+            return await asyncio.gather(*(client.complete('你好') for _ in range(calls)), return_exceptions=True)
+        
+        start = time.perf_counter()
+        try:
+            results = asyncio.run(complete_all())
+        finally:
+            server.shutdown()
+            server.server_close()
+        return results, server.stats, time.perf_counter() - start
+    
+    passed = []
+    
+    def check(name, ok, detail):
+        passed.append(ok)
+        print(f"{'✅' if ok else '❌'} {name}: {detail}")
+    
+    limit = args.concurrency
+    results, stats, elapsed = run(limit * 4, {'delay': args.delay}, max_concurrency=limit)
+    ok = all(isinstance(r, tuple) for r in results) and stats['max_concurrent'] == limit
+    check("并发上限", ok, f"{len(results)} 个请求，服务端最大并发 {stats['max_concurrent']}（上限 {limit}），"
+                      f"耗时 {elapsed:.2f}s")
+    
+    for status in (429, 503):
+        results, stats, _ = run(20, {'fail_rate': 0.3, 'fail_status': status, 'seed': 1}, max_retries=10)
+        failures = stats['status'].get(str(status), 0)
+        ok = all(isinstance(r, tuple) for r in results) and failures > 0 and stats['requests'] == 20 + failures
+        check(f"HTTP {status} 重试", ok, f"20 个请求全部成功，服务端收到 {stats['requests']} 次（{failures} 次 {status}）")
+    
+    results, stats, _ = run(2, {'fail_rate': 1.0, 'fail_status': 503}, max_retries=2)
+    ok = all(isinstance(r, LLMError) for r in results) and stats['requests'] == 2 * 3
+    check("重试用尽后抛出 LLMError", ok, f"服务端收到 {stats['requests']} 次（每个请求 1 + 2 次重试）")
+    
+    results, stats, _ = run(2, {'fail_rate': 1.0, 'fail_status': 400}, max_retries=2)
+    ok = all(isinstance(r, LLMError) for r in results) and stats['requests'] == 2
+    check("HTTP 400 不重试", ok, f"服务端收到 {stats['requests']} 次")
+    
+    results, stats, elapsed = run(1, {'delay': 1.0}, read_timeout=0.3, max_retries=3)
+    ok = isinstance(results[0], requests.ReadTimeout) and stats['requests'] == 1
+    check("读取超时不重试", ok, f"{type(results[0]).__name__}，服务端收到 {stats['requests']} 次，耗时 {elapsed:.2f}s")
+    
+    return all(passed)
+
+
+def add_corpus_arguments(parser):
+    """语料相关的公共参数"""
+    parser.add_argument('--corpus', help="文章JSON文件（需包含content_html）")
+    parser.add_argument('--archive', help="使用RSS原文归档作为语料（latest / 日期 / 清单路径）")
+    parser.add_argument('--archive-dir', default='data/archive', help="归档目录")
+    parser.add_argument('--count', type=int, default=300, help="合成文章数量")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="性能基准测试")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    clean_parser = subparsers.add_parser('clean', help="并行清洗的加速比")
+    clean_parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help="测试的进程数")
+    add_corpus_arguments(clean_parser)
+    clean_parser.set_defaults(func=bench_clean)
+    
+    markdown_parser = subparsers.add_parser('markdown', help="HTML→Markdown转换后端对比")
+    add_corpus_arguments(markdown_parser)
+    markdown_parser.set_defaults(func=bench_markdown)
+    
+    ads_parser = subparsers.add_parser('ads', help="广告过滤：合并正则与旧实现对比")
+    ads_parser.add_argument('--join', type=int, default=20, help="每篇长文章由多少篇文章拼成")
+    ads_parser.add_argument('--repeat', type=int, default=5, help="重复次数")
+    ads_parser.add_argument('--keywords', nargs='*', default=[], help="追加的广告关键词")
+    add_corpus_arguments(ads_parser)
+    ads_parser.set_defaults(func=bench_ads)
+    
+    wordcount_parser = subparsers.add_parser('wordcount', help="字数统计：与旧实现对比")
+    wordcount_parser.add_argument('--fuzz', type=int, default=100000, help="随机拼接的Markdown片段数")
+    wordcount_parser.add_argument('--repeat', type=int, default=5, help="重复次数")
+    add_corpus_arguments(wordcount_parser)
+    wordcount_parser.set_defaults(func=bench_wordcount)
+    
+    memory_parser = subparsers.add_parser('memory', help="文章记录：dict 与 Article 的内存占用")
+    memory_parser.add_argument('--count', type=int, default=100000, help="文章数量")
+    memory_parser.set_defaults(func=bench_memory)
+    
+    tokens_parser = subparsers.add_parser('tokens', help="发给AI的文章数据：缩进JSON与紧凑格式的token数")
+    tokens_parser.add_argument('--budgets', type=int, nargs='*', help="紧凑格式的其他token预算（始终包含与缩进JSON相同的预算）")
+    tokens_parser.add_argument('--max-article-tokens', type=int, help="单篇正文的token上限")
+    add_corpus_arguments(tokens_parser)
+    tokens_parser.set_defaults(func=bench_tokens)
+    
+    summarize_parser = subparsers.add_parser('summarize', help="本地摘要：token数、耗时和内容覆盖率")
+    summarize_parser.add_argument('--target-tokens', type=int, default=800, help="每篇摘要的目标token数")
+    summarize_parser.add_argument('--join', type=int, default=1, help="每篇长文章由多少篇文章拼成")
+    add_corpus_arguments(summarize_parser)
+    summarize_parser.set_defaults(func=bench_summarize)
+    
+    llm_parser = subparsers.add_parser('llm', help="大模型客户端：并发上限、重试、错误传递（模拟服务）")
+    llm_parser.add_argument('--concurrency', type=int, default=3, help="客户端的并发上限")
+    llm_parser.add_argument('--delay', type=float, default=0.2, help="模拟服务每个请求的延迟（秒）")
+    llm_parser.set_defaults(func=bench_llm)
+    
+    args = parser.parse_args()
+    # 带校验的子命令返回是否通过
+    if args.func(args) is False:
+        print("\n❌ 校验未通过")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+模板段落识别模块 - 按公众号学习每篇文章都会带的开头/结尾段落（SQLite）
+
+同一个公众号的文章几乎都带着相同的引导关注、作者介绍、二维码说明等段落，广告关键词覆盖不全，
+这些内容会计入字数，也会浪费AI分析的token：
+- Markdown按空行切成段落，多行段落再切成行，归一化空白后取64位哈希
+- 按公众号记录每篇文章出现过哪些哈希（同一篇文章只记一次，一天多次运行不会重复计数）
+- 某个段落/行在该公众号至少 min_docs 篇、且不少于 min_ratio 比例的文章中出现过，视为模板并删除
+- 模型跨运行持久化，每次运行先用本批文章增量更新再删除；超过保留天数的文章记录会被清理
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+# 归一化后短于该长度的段落/行不参与识别（分隔线、列表序号等）
+MIN_BLOCK_CHARS = 4
+
+_BLANK_LINES_RE = re.compile(r'\n[^\S\n]*\n\s*')
+_SPACE_RE = re.compile(r'\s+')
+
+
+def split_blocks(markdown):
+    """按空行切分段落"""
+    return [block for block in _BLANK_LINES_RE.split((markdown or '').strip()) if block.strip()]
+
+
+def block_hash(text):
+    """段落/行的哈希（归一化空白；太短时返回None）"""
+    normalized = _SPACE_RE.sub(' ', text).strip()
+    if len(normalized) < MIN_BLOCK_CHARS:
+        return None
+    return int.from_bytes(hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+
+def block_hashes(markdown):
+    """文章中所有段落和行的哈希集合"""
+    hashes = set()
+    for block in split_blocks(markdown):
+        hashes.add(block_hash(block))
+        if '\n' in block:
+            hashes.update(block_hash(line) for line in block.split('\n'))
+    hashes.discard(None)
+    return hashes
+
+
+class BoilerplateModel:
+    """按公众号统计段落出现次数的持久化模型"""
+
+    def __init__(self, db_path, min_docs=3, min_ratio=0.5, retention_days=60):
+        """
+        Args:
+            db_path: SQLite文件路径
+            min_docs: 至少在多少篇文章中出现过才视为模板
+            min_ratio: 出现的文章数占该公众号文章数的最低比例
+            retention_days: 文章记录保留天数（None表示永久保留）
+        """
+        self.db_path = db_path
+        self.min_docs = min_docs
+        self.min_ratio = min_ratio
+        self.retention_days = retention_days
+        self.stripped_articles = 0
+        self.removed_blocks = 0
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY,
+                account TEXT NOT NULL,
+                url TEXT NOT NULL,
+                seen_at INTEGER NOT NULL,
+                UNIQUE (account, url)
+            );
+            CREATE TABLE IF NOT EXISTS blocks (
+                account TEXT NOT NULL,
+                hash INTEGER NOT NULL,
+                doc_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_blocks ON blocks(account, hash);
+            CREATE INDEX IF NOT EXISTS idx_blocks_doc ON blocks(doc_id);
+            CREATE INDEX IF NOT EXISTS idx_docs_seen_at ON docs(seen_at);
+        """)
+        self._conn.commit()
+
+    def learn_many(self, entries):
+        """
+        记录文章中出现的段落（已经记录过的文章跳过）
+
+        Args:
+            entries: [(公众号名称, url, content_markdown), ...]
+        """
+        now = int(time.time())
+        with self._lock:
+            for account, url, markdown in entries:
+                if not account or not url:
+                    continue
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO docs (account, url, seen_at) VALUES (?, ?, ?)", (account, url, now)
+                )
+                if not cursor.rowcount:
+                    continue
+                self._conn.executemany(
+                    "INSERT INTO blocks VALUES (?, ?, ?)",
+                    [(account, h, cursor.lastrowid) for h in block_hashes(markdown)]
+                )
+            self._prune(now)
+            self._conn.commit()
+
+    def _prune(self, now):
+        """清理超过保留天数的文章记录"""
+        if not self.retention_days:
+            return
+        cutoff = now - int(self.retention_days * 86400)
+        self._conn.execute("DELETE FROM blocks WHERE doc_id IN (SELECT id FROM docs WHERE seen_at < ?)", (cutoff,))
+        self._conn.execute("DELETE FROM docs WHERE seen_at < ?", (cutoff,))
+
+    def boilerplate_hashes(self, account, hashes):
+        """
+        hashes 中属于该公众号模板的哈希
+
+        Returns:
+            哈希集合
+        """
+        hashes = list(hashes)
+        if not account or not hashes:
+            return set()
+
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM docs WHERE account = ?", (account,)).fetchone()[0]
+            min_count = max(self.min_docs, self.min_ratio * total)
+            if total < min_count:
+                return set()
+
+            found = set()
+            # SQLite单条语句的参数个数有限制，分批查询
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash FROM blocks WHERE account = ? AND hash IN ({placeholders}) "
+                    f"GROUP BY hash HAVING COUNT(*) >= ?",
+                    [account, *batch, min_count]
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def strip(self, account, markdown):
+        """
+        删除文章中的模板段落和模板行
+
+        Returns:
+            (删除后的Markdown, 删除的段落/行数)；没有可删除的内容时原样返回
+            （全部内容都是模板时也原样返回，避免误删整篇文章）
+        """
+        boilerplate = self.boilerplate_hashes(account, block_hashes(markdown))
+        if not boilerplate:
+            return markdown, 0
+
+        kept = []
+        removed = 0
+        for block in split_blocks(markdown):
+            if block_hash(block) in boilerplate:
+                removed += 1
+                continue
+            if '\n' in block:
+                lines = [line for line in block.split('\n') if block_hash(line) not in boilerplate]
+                removed += block.count('\n') + 1 - len(lines)
+                block = '\n'.join(lines)
+            if block.strip():
+                kept.append(block)
+
+        if not removed or not kept:
+            return markdown, 0
+        self.stripped_articles += 1
+        self.removed_blocks += removed
+        return '\n\n'.join(kept), removed
+
+    def count(self):
+        """模型中的文章数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
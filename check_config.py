@@ -7,7 +7,7 @@
 """
 
 import config
-import requests
+import http_client
 from feishu_bitable import get_tenant_access_token, get_table_fields
 
 
@@ -135,7 +135,7 @@ def check_config():
         # 测试RSS服务是否可访问
         try:
             test_url = config.RSS_DOMAIN.rstrip('/')
-            response = requests.get(test_url, timeout=3)
+            response = http_client.get(test_url, timeout=3, max_retries=0)
             if response.status_code == 200:
                 print(f"   ✅ RSS服务运行正常")
             else:
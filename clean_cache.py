@@ -0,0 +1,80 @@
+"""
+清洗结果缓存模块 - 按HTML内容哈希缓存Markdown转换结果（SQLite）
+
+文章在24小时窗口内会被多次运行重复清洗，回放时也会再清洗一遍：
+- 键 = sha256(清洗规则指纹 + HTML内容)，值 = content_markdown / word_count / summary
+- 清洗规则指纹由 data_cleaner.cleaner_fingerprint() 计算（清洗函数源码 + 参数 + 依赖版本），
+  规则一变，旧缓存自动失效并在打开时清除
+- 条目数超过上限时按最近使用时间淘汰
+"""
+
+import hashlib
+
+from keyed_store import KeyedStore
+
+
+class CleanCache:
+    """清洗结果的持久化缓存"""
+    
+    def __init__(self, db_path, fingerprint, max_entries=50000):
+        """
+        Args:
+            db_path: SQLite文件路径
+            fingerprint: 清洗规则指纹（不同指纹的缓存互不可见）
+            max_entries: 最多缓存的文章数
+        """
+        self.db_path = db_path
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        
+        self._store = KeyedStore(
+            db_path, 'cleaned',
+            [('content_markdown', 'TEXT'), ('word_count', 'INTEGER'), ('summary', 'TEXT')],
+            fingerprint, max_entries
+        )
+        # 清洗规则变了，旧结果全部作废
+        if self._store.purged:
+            print(f"   ♻️  清洗规则已变化，清除 {self._store.purged} 条旧缓存")
+    
+    def make_key(self, html_content, ad_keywords=None):
+        """
+        计算缓存键
+        
+        Args:
+            html_content: HTML内容
+            ad_keywords: 这篇文章生效的广告关键词（None表示默认关键词，默认关键词已计入指纹）
+        """
+        digest = hashlib.sha256(self.fingerprint.encode('utf-8'))
+        if ad_keywords:
+            digest.update(b'\0')
+            digest.update('\n'.join(ad_keywords).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update((html_content or '').encode('utf-8'))
+        return digest.hexdigest()
+    
+    def get_many(self, keys):
+        """
+        批量查询
+        
+        Returns:
+            {key: (content_markdown, word_count, summary)}（只包含命中的键）
+        """
+        keys = set(keys)
+        found = self._store.get_many(keys)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+    
+    def put_many(self, entries):
+        """
+        批量写入，并在超出容量时淘汰最久未使用的条目
+        
+        Args:
+            entries: {key: (content_markdown, word_count, summary)}
+        """
+        self._store.put_many(entries)
+    
+    def close(self):
+        self._store.close()
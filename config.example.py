@@ -7,6 +7,51 @@
 RSS_DOMAIN = "http://192.168.0.121:8081"
 OPML_FILE = "wechat2rss_subscriptions.opml"
 
+# 爬取RSS的最大并发数（1 = 逐个串行爬取）
+FETCH_MAX_WORKERS = 8
+
+# RSS源缓存文件（按bid保存ETag/Last-Modified，源未更新时跳过下载和解析）
+# 设为 None 则每次都完整下载
+FEED_CACHE_FILE = "data/feed_cache.json"
+
+# 增量爬取：记录每个源的高水位线（最新发布时间 + 已见过的文章），只处理新文章
+# 一天运行多次时，同一篇文章不会被重复处理（需要配置 FEED_CACHE_FILE）
+# 新的高水位线在报告保存（或写入多维表格）成功后才提交，中途失败的运行下次会重新处理
+INCREMENTAL_FETCH = True
+
+# RSS解析方式: "feedparser" 完整解析; "stream" 流式解析（遇到24小时外的文章即停止，
+# 逐条解析并立即释放，适合带大量历史文章的源）
+FEED_PARSER = "feedparser"
+
+# 自适应轮询：根据每个源的发文周期决定是否需要本次爬取，不活跃的源少爬
+# 轮询间隔 = 最近发文间隔的中位数 × factor，限制在 [min, max] 小时之间
+# max 要小于24小时，保证新文章过期前一定能抓到；None = 每次都爬所有源（需要 FEED_CACHE_FILE）
+FETCH_SCHEDULE = {
+    "min_interval_hours": 0,
+    "max_interval_hours": 12,
+    "factor": 0.5,
+}
+
+# 按host自适应限流（保护自建的 wechat2rss 服务）
+# 延迟或错误率升高时并发和速率减半，后端健康时逐步恢复到上限；None = 不限流
+FETCH_RATE_LIMIT = {
+    "max_concurrency": 8,   # 每个host的并发上限
+    "rate": 10,             # 每个host每秒最多请求数
+    "target_latency": 3.0,  # 平均延迟超过该值（秒）视为过载
+    "max_error_rate": 0.2,  # 错误率超过该值视为过载
+}
+
+# RSS原文归档目录（gzip压缩、按内容哈希去重），用于离线回放:
+#   python main.py --replay            # 回放最近一次
+#   python main.py --replay 20251228   # 回放某天最后一次
+# None = 不归档（分片执行时不归档）
+FEED_ARCHIVE_DIR = "data/archive"
+
+# 分片执行：按公众号bid哈希分成N片，每片在独立进程中爬取+清洗，最后合并
+# 1 = 不分片；多节点部署见 sharding.py
+FETCH_SHARDS = 1
+SHARD_PROCESSES = None  # 进程数，None = 等于分片数
+
 # ==================== AI配置 ====================
 # 选择使用的AI: "deepseek", "claude", "openai"
 AI_PROVIDER = "deepseek"
@@ -19,6 +64,7 @@ DEEPSEEK_BASE_URL = "https://api.deepseek.com"
 # Claude API配置
 CLAUDE_API_KEY = "sk-ant-xxx"  # 从 https://console.anthropic.com/ 获取
 CLAUDE_MODEL = "claude-3-5-sonnet-20241022"
+CLAUDE_BASE_URL = "https://api.anthropic.com"
 
 # OpenAI API配置（如果使用OpenAI）
 OPENAI_API_KEY = "sk-xxx"  # 从 https://platform.openai.com/ 获取
@@ -26,6 +72,51 @@ OPENAI_MODEL = "gpt-4o-mini"  # 推荐使用mini版本，便宜
 # 如果使用国内代理
 OPENAI_BASE_URL = "https://api.openai.com/v1"  # 或其他代理地址
 
+# 大模型客户端（见 llm_client.py）：连接/读取超时（秒）、429/5xx的重试次数（读取超时不重试）、同时在途的请求数上限
+AI_CLIENT = {
+    "connect_timeout": 5,
+    "read_timeout": 180,
+    "max_retries": 3,
+    "max_concurrency": 4,
+}
+
+# 分批分析（map-reduce）：文章数据超出一批的token预算时，分批并发分析再汇总成日报
+#   batch_tokens: 每批文章数据的token上限（并发数见 AI_CLIENT.max_concurrency）
+# None = 始终把全部文章放进一次调用
+AI_MAP_REDUCE = {
+    "batch_tokens": 12000,
+}
+
+# 发给AI的文章数据格式
+#   compact: 紧凑格式（字段名只在表头出现一次、没有缩进），每篇的格式开销少约三分之一
+#   token_budget: 每次调用中文章数据的token预算，在各篇正文之间分配（短文章完整保留，长文章平分剩余预算）
+#   max_article_tokens: 单篇正文的token上限
+# None = 缩进的JSON，每篇正文只取前2000字
+AI_ARTICLE_ENCODING = {
+    "compact": True,
+    "token_budget": 60000,
+    "max_article_tokens": 4000,
+}
+
+# 本地摘要：发给AI之前先在本地用TextRank从全文中抽取关键句（summarizer.py），用摘要代替正文
+#   target_tokens: 每篇摘要的目标token数（更短的文章保留全文）
+#   cache_file: 摘要缓存（SQLite，按正文哈希缓存）；max_entries: 最多缓存的文章数
+# None = 发送正文（按 AI_ARTICLE_ENCODING 截断）
+AI_SUMMARIZER = {
+    "target_tokens": 800,
+    "cache_file": "data/cache/summary_cache.db",
+    "max_entries": 50000,
+}
+
+# 逐篇分析缓存：每篇文章只分析一次（按 URL + 正文缓存），日报由一次汇总调用生成，优先于 AI_MAP_REDUCE
+#   db_path: 缓存文件（SQLite）；max_entries: 最多缓存的文章数（并发数见 AI_CLIENT.max_concurrency）
+#   修改 docs/prompts/analyze_prompt.md、article_prompt.md 或更换模型后，旧的分析结果自动失效
+# None = 每次都把文章正文发给模型
+AI_ANALYSIS_CACHE = {
+    "db_path": "data/cache/analysis_cache.db",
+    "max_entries": 20000,
+}
+
 # ==================== 飞书群推送配置 ====================
 # 需要在飞书开放平台创建企业应用
 FEISHU_APP_ID = "cli_xxx" # https://open.feishu.cn/app/
@@ -53,7 +144,53 @@ RUN_IMMEDIATELY = True
 # 文章最小字数（过滤太短的文章）
 MIN_WORD_COUNT = 500
 
-# 注：广告过滤和图片保留已在 data_cleaner.py 中自动处理
+# HTML→Markdown转换的进程数（CPU密集，文章多时可设为CPU核数；1 = 串行）
+CLEAN_WORKERS = 1
+
+# HTML→Markdown转换后端: "soup"（解析一次直接转换，默认）、"lxml"（用lxml解析）、
+# "markdownify"（旧流程，解析两次）。对比: python benchmark.py markdown
+HTML_BACKEND = "soup"
+
+# 清洗结果缓存（SQLite，按HTML内容哈希缓存Markdown/字数/摘要），清洗规则变化时自动失效
+# None = 不缓存
+CLEAN_CACHE_FILE = "data/cache/clean_cache.db"
+CLEAN_CACHE_MAX_ENTRIES = 50000
+
+# 广告过滤：包含关键词的行整行删除（默认关键词见 ad_rules.py）
+# 追加对所有公众号生效的关键词
+AD_KEYWORDS_EXTRA = []
+# 按公众号的规则文件目录：<公众号名>.txt 只对该公众号生效，_all.txt 对所有公众号生效，每行一个关键词
+# None = 不使用规则文件
+AD_RULES_DIR = "data/ad_rules"
+
+# 近似去重：同一篇文章被不同公众号转载（跨天也能识别），每簇只保留最早发布的一篇（见 near_dup.py）
+#   db_path: 签名索引（SQLite）；threshold: Jaccard相似度阈值；bands: LSH分段数；retention_days: 记录保留天数
+# None = 只做URL精确去重
+NEAR_DUP = {
+    "db_path": "data/cache/near_dup.db",
+    "threshold": 0.7,
+    "bands": 16,
+    "retention_days": 30,
+}
+
+# 模板段落：按公众号学习每篇都会出现的引导关注、作者介绍、二维码说明等段落，清洗时删除（见 boilerplate.py）
+#   db_path: 模型（SQLite）；min_docs / min_ratio: 至少在多少篇、多大比例的文章中出现才视为模板；
+#   retention_days: 文章记录保留天数
+# None = 不删除模板段落
+BOILERPLATE = {
+    "db_path": "data/cache/boilerplate.db",
+    "min_docs": 3,
+    "min_ratio": 0.5,
+    "retention_days": 60,
+}
+
+# 流式处理：爬取和清洗用生成器衔接，转换完立即释放原始HTML，内存峰值只和在途的文章数有关
+#   batch_size: 每批转换的文章数；max_pending: 最多同时在途的公众号数
+# None = 先爬完全部文章再统一清洗（分片执行 FETCH_SHARDS > 1 时不使用流式处理）
+STREAM_PIPELINE = None
+# STREAM_PIPELINE = {"batch_size": 32, "max_pending": 16}
+
+# 注：图片保留已在 data_cleaner.py 中自动处理
 
 # ==================== 输出配置 ====================
 # 是否保存本地HTML报告
@@ -3,11 +3,55 @@
 """
 
 from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+import hashlib
+import inspect
+import json
 import markdownify
 import re
+import time
+from ad_rules import DEFAULT_AD_KEYWORDS, AdRules
+from article import Article
+from boilerplate import BoilerplateModel
+from clean_cache import CleanCache
+from near_dup import NearDupIndex, remove_near_duplicates
 
+try:
+    from importlib.metadata import version as package_version
+except ImportError:
+    package_version = None
 
-def clean_html_to_markdown(html_content, keep_images='full'):
+
+# 清洗规则版本号：规则变了但清洗函数源码没变时（比如换了依赖的行为）手动加一，让清洗缓存失效；
+# 只部署.pyc时指纹不包含源码，改了清洗函数也要加一
+CLEANER_VERSION = 1
+
+# 原文长度预检的放大系数，见 passes_raw_length
+RAW_LENGTH_FACTOR = 2
+
+
+# Markdown转换参数
+MARKDOWN_OPTIONS = {
+    'heading_style': 'ATX',     # 使用 # 风格的标题
+    'bullets': '*',             # 使用 * 作为列表符号
+    'strip': ['a'],             # 可选：移除链接但保留文本
+}
+
+# 转换后端 → BeautifulSoup解析器
+#   'soup': html.parser 解析一次，直接遍历DOM转换为Markdown（默认）
+#   'lxml': 同上，用lxml解析（需要安装lxml）
+#   'markdownify': 旧流程，清理后序列化回HTML字符串，再由markdownify重新解析一遍
+HTML_BACKENDS = {
+    'soup': 'html.parser',
+    'lxml': 'lxml',
+    'markdownify': 'html.parser',
+}
+
+_markdown_converter = markdownify.MarkdownConverter(**MARKDOWN_OPTIONS)
+
+
+def clean_html_to_markdown(html_content, keep_images='full', backend='soup'):
     """
     将HTML清洗并转换为Markdown格式
     
@@ -17,6 +61,7 @@ def clean_html_to_markdown(html_content, keep_images='full'):
             - 'full': 保留完整图片链接（默认）
             - 'simplified': 简化为[图片N]
             - 'remove': 完全移除图片
+        backend: 转换后端，见 HTML_BACKENDS（各后端输出一致，见 benchmark.py markdown）
     
     Returns:
         Markdown格式的文本
@@ -26,19 +71,18 @@ def clean_html_to_markdown(html_content, keep_images='full'):
     
     try:
         # 步骤1：用BeautifulSoup清理垃圾标签
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, HTML_BACKENDS[backend])
         
         # 移除script、style、iframe等无用标签
         for tag in soup(['script', 'style', 'iframe', 'noscript']):
             tag.decompose()
         
         # 步骤2：转换为Markdown
-        markdown = markdownify.markdownify(
-            str(soup),
-            heading_style='ATX',        # 使用 # 风格的标题
-            bullets='*',                 # 使用 * 作为列表符号
-            strip=['a'],                 # 可选：移除链接但保留文本
-        )
+        if backend == 'markdownify':
+            markdown = markdownify.markdownify(str(soup), **MARKDOWN_OPTIONS)
+        else:
+            # 直接遍历已经解析好的DOM，省去序列化和第二次解析
+            markdown = _markdown_converter.convert_soup(soup)
         
         # 步骤3：处理图片
         if keep_images == 'remove':
@@ -78,62 +122,98 @@ def clean_html_to_markdown(html_content, keep_images='full'):
         return re.sub(r'<[^>]+>', '', html_content)
 
 
-def remove_ads_markdown(markdown_text):
+# 微信号/电话号码（[^\S\n] 是除换行以外的空白，保证匹配不跨行）
+AD_LINE_PATTERNS = (
+    r'微信[：:][^\S\n]*[a-zA-Z0-9_-]+',
+    r'电话[：:][^\S\n]*\d{11}',
+)
+
+
+@lru_cache(maxsize=64)
+def build_ad_matcher(keywords=DEFAULT_AD_KEYWORDS):
+    """
+    把广告关键词和微信号/电话号码规则合并成一个编译好的正则（同一组关键词只编译一次）
+    
+    Args:
+        keywords: 关键词元组
+    
+    Returns:
+        编译后的正则
+    """
+    # 空关键词会匹配所有行，忽略；排序保证同一组关键词得到同一个正则
+    literals = sorted({keyword for keyword in keywords if keyword}, key=lambda k: (-len(k), k))
+    return re.compile('|'.join([re.escape(keyword) for keyword in literals] + list(AD_LINE_PATTERNS)))
+
+
+def remove_ads_markdown(markdown_text, keywords=None):
     """
     从Markdown文本中去除广告内容
     
+    在整篇文本上用合并后的正则查找，只处理命中的行，不再逐行逐关键词扫描
+    
     Args:
         markdown_text: Markdown文本
+        keywords: 广告关键词元组（默认 DEFAULT_AD_KEYWORDS）
     
     Returns:
         去除广告后的Markdown文本
     """
-    # 广告关键词列表
-    ad_keywords = [
-        '扫码关注', '长按二维码', '识别二维码', '关注公众号',
-        '点击阅读原文', '阅读原文', '原文链接',
-        '限时优惠', '限时特惠', '报名链接', '点击报名',
-        '加微信', '添加微信', '微信咨询',
-        '推广', '广告', '赞助',
-        '转发朋友圈', '分享到朋友圈',
-        '点击购买', '立即购买', '马上购买',
-        '课程链接', '购买链接',
-        '跳转微信打开',  # RSS特有的
-    ]
-    
-    # 按行处理
-    lines = markdown_text.split('\n')
-    cleaned_lines = []
-    
-    for line in lines:
-        # 检查是否包含广告关键词
-        has_ad = False
-        for keyword in ad_keywords:
-            if keyword in line:
-                has_ad = True
-                break
-        
-        # 检查是否是微信号/电话号码
-        if re.search(r'微信[：:]\s*[a-zA-Z0-9_-]+', line):
-            has_ad = True
-        if re.search(r'电话[：:]\s*\d{11}', line):
-            has_ad = True
+    search = build_ad_matcher(tuple(keywords) if keywords else DEFAULT_AD_KEYWORDS).search
+    match = search(markdown_text)
+    if not match:
+        return markdown_text
+    
+    pieces = []
+    pos = 0
+    last_line_removed = False
+    
+    while match:
+        # 命中所在的整行（匹配不会跨行）
+        line_start = markdown_text.rfind('\n', 0, match.start()) + 1
+        line_end = markdown_text.find('\n', match.end())
+        pieces.append(markdown_text[pos:line_start])
         
-        # 过滤图片链接（可选）
-        # if line.strip().startswith('![](') and 'img-proxy' in line:
-        #     has_ad = True
+        if line_end == -1:
+            pos = len(markdown_text)
+            last_line_removed = True
+            break
         
-        # 如果不是广告，保留这一行
-        if not has_ad:
-            cleaned_lines.append(line)
+        pos = line_end + 1
+        match = search(markdown_text, pos)
+    
+    pieces.append(markdown_text[pos:])
+    cleaned = ''.join(pieces)
     
-    return '\n'.join(cleaned_lines)
+    # 删掉的是最后一行时，它前面的换行也要去掉（与按行 split/join 的结果一致）
+    if last_line_removed and cleaned.endswith('\n'):
+        cleaned = cleaned[:-1]
+    
+    return cleaned
+
+
+# 字数统计用到的Markdown标记（预编译，按 calculate_word_count_markdown 中的顺序执行）
+WORD_COUNT_HEADING = re.compile(r'^#+\s+', re.MULTILINE)
+WORD_COUNT_BOLD_STAR = re.compile(r'\*\*([^*]+)\*\*')
+WORD_COUNT_BOLD_UNDERSCORE = re.compile(r'__([^_]+)__')
+WORD_COUNT_ITALIC_STAR = re.compile(r'\*([^*]+)\*')
+WORD_COUNT_ITALIC_UNDERSCORE = re.compile(r'_([^_]+)_')
+WORD_COUNT_LINK = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+WORD_COUNT_IMAGE = re.compile(r'!\[([^\]]*)\]\([^\)]+\)')
+WORD_COUNT_BULLET = re.compile(r'^\s*[\*\-\+]\s+', re.MULTILINE)
+WORD_COUNT_NUMBERED = re.compile(r'^\s*\d+\.\s+', re.MULTILINE)
+WORD_COUNT_QUOTE = re.compile(r'^>\s+', re.MULTILINE)
+WORD_COUNT_CODE_BLOCK = re.compile(r'```[^\n]*\n.*?```', re.DOTALL)
+WORD_COUNT_INLINE_CODE = re.compile(r'`([^`]+)`')
 
 
 def calculate_word_count_markdown(markdown_text):
     """
     计算Markdown文本的字数（去除Markdown标记）
     
+    各步骤只删除字符、不会新增字符，所以文本里没有某一步需要的字符时，这一步一定不会匹配，直接跳过；
+    最后按空白切分求和，不再生成去掉空白后的整篇副本。
+    结果与逐步替换的旧实现完全一致（见 benchmark.py wordcount）
+    
     Args:
         markdown_text: Markdown文本
     
@@ -143,36 +223,315 @@ def calculate_word_count_markdown(markdown_text):
     if not markdown_text:
         return 0
     
-    # 移除Markdown标记
+    text = markdown_text
+    
     # 移除标题标记 (# ## ###)
-    text = re.sub(r'^#+\s+', '', markdown_text, flags=re.MULTILINE)
+    if '#' in text:
+        text = WORD_COUNT_HEADING.sub('', text)
     
     # 移除加粗/斜体标记 (** __ * _)
-    text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
-    text = re.sub(r'__([^_]+)__', r'\1', text)
-    text = re.sub(r'\*([^*]+)\*', r'\1', text)
-    text = re.sub(r'_([^_]+)_', r'\1', text)
-    
-    # 移除链接 [text](url)
-    text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
-    
-    # 移除图片 ![alt](url)
-    text = re.sub(r'!\[([^\]]*)\]\([^\)]+\)', '', text)
+    if '*' in text:
+        text = WORD_COUNT_BOLD_STAR.sub(r'\1', text)
+    if '__' in text:
+        text = WORD_COUNT_BOLD_UNDERSCORE.sub(r'\1', text)
+    if '*' in text:
+        text = WORD_COUNT_ITALIC_STAR.sub(r'\1', text)
+    if '_' in text:
+        text = WORD_COUNT_ITALIC_UNDERSCORE.sub(r'\1', text)
+    
+    # 移除链接 [text](url)，再移除图片 ![alt](url)
+    if '](' in text:
+        text = WORD_COUNT_LINK.sub(r'\1', text)
+        if '![' in text:
+            text = WORD_COUNT_IMAGE.sub('', text)
     
     # 移除列表标记 (* - 1.)
-    text = re.sub(r'^\s*[\*\-\+]\s+', '', text, flags=re.MULTILINE)
-    text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)
+    if '*' in text or '-' in text or '+' in text:
+        text = WORD_COUNT_BULLET.sub('', text)
+    if '.' in text:
+        text = WORD_COUNT_NUMBERED.sub('', text)
     
     # 移除引用标记 (>)
-    text = re.sub(r'^>\s+', '', text, flags=re.MULTILINE)
+    if '>' in text:
+        text = WORD_COUNT_QUOTE.sub('', text)
     
     # 移除代码块标记 (```)
-    text = re.sub(r'```[^\n]*\n.*?```', '', text, flags=re.DOTALL)
-    text = re.sub(r'`([^`]+)`', r'\1', text)
+    if '`' in text:
+        text = WORD_COUNT_CODE_BLOCK.sub('', text)
+        text = WORD_COUNT_INLINE_CODE.sub(r'\1', text)
+    
+    # 统计非空白字符（str.split 与正则 \s 的空白字符集合相同）
+    return sum(map(len, text.split()))
+
+
+def convert_article_html(html_content, backend='soup', ad_keywords=None):
+    """
+    单篇文章的转换流程：HTML → Markdown → 去广告 → 计算字数
+    
+    （模块级函数，可以在进程池中执行）
+    
+    Args:
+        html_content: HTML内容
+        backend: 转换后端，见 HTML_BACKENDS
+        ad_keywords: 广告关键词元组（None表示默认关键词）
+    
+    Returns:
+        (Markdown文本, 字数)
+    """
+    markdown = clean_html_to_markdown(html_content, backend=backend)
+    markdown = remove_ads_markdown(markdown, ad_keywords)
+    return markdown, calculate_word_count_markdown(markdown)
+
+
+def convert_articles_html(html_contents, workers=1, chunksize=None, backend='soup', ad_keywords=None,
+                          executor=None):
+    """
+    批量转换HTML（可用进程池并行）
+    
+    Args:
+        html_contents: HTML内容列表
+        workers: 进程数（1表示在当前进程串行执行）
+        chunksize: 每次分发给子进程的文章数（默认按文章数和进程数自动计算）
+        backend: 转换后端，见 HTML_BACKENDS
+        ad_keywords: 每篇文章的广告关键词元组列表，与 html_contents 一一对应（None表示都用默认关键词）
+        executor: 复用已有的进程池（流式清洗时多批共用一个进程池），None表示按 workers 临时创建
+    
+    Returns:
+        [(Markdown文本, 字数), ...]，顺序与输入一致
+    """
+    html_contents = list(html_contents)
+    ad_keywords = list(ad_keywords) if ad_keywords is not None else [None] * len(html_contents)
+    backends = [backend] * len(html_contents)
+    
+    if workers <= 1 or len(html_contents) < 2:
+        return list(map(convert_article_html, html_contents, backends, ad_keywords))
+    
+    if chunksize is None:
+        # 每个进程大约分到4批，兼顾负载均衡和进程间传输开销
+        chunksize = max(1, len(html_contents) // (workers * 4))
+    
+    if executor is not None:
+        return list(executor.map(convert_article_html, html_contents, backends, ad_keywords, chunksize=chunksize))
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(convert_article_html, html_contents, backends, ad_keywords, chunksize=chunksize))
+
+
+def make_summary(markdown):
+    """没有摘要时，取Markdown正文前200字（去除Markdown标记）作为摘要"""
+    plain_text = re.sub(r'[#*_\[\]()>]', '', markdown)
+    return plain_text[:200] + '...' if len(plain_text) > 200 else plain_text
+
+
+def cleaner_fingerprint(backend='soup'):
+    """
+    清洗规则指纹，用于清洗缓存（clean_cache.py）的自动失效
+    
+    包含清洗函数的源码、Markdown转换参数、默认广告规则、转换后端、markdownify版本和 CLEANER_VERSION，
+    任何一项变化都会得到不同的指纹（按公众号追加的广告关键词计入每篇文章的缓存键，见 CleanCache.make_key）。
+    拿不到源码时（只有.pyc）不计入源码，修改清洗规则后需要手动增加 CLEANER_VERSION
+    """
+    parts = [str(CLEANER_VERSION), backend, json.dumps(MARKDOWN_OPTIONS, sort_keys=True),
+             json.dumps([DEFAULT_AD_KEYWORDS, AD_LINE_PATTERNS], ensure_ascii=False)]
+    
+    try:
+        parts.append(package_version('markdownify') if package_version else '')
+    except Exception:
+        parts.append('')
+    
+    try:
+        sources = [inspect.getsource(func) for func in (
+            clean_html_to_markdown, build_ad_matcher, remove_ads_markdown, calculate_word_count_markdown,
+            convert_article_html, make_summary)]
+    except OSError:
+        # 只部署了.pyc或打包成可执行文件时拿不到源码，只能靠 CLEANER_VERSION 和上面的参数区分
+        sources = ['no-source']
+    parts.extend(sources)
+    
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def convert_articles_cached(html_contents, cache, workers=1, chunksize=None, backend='soup', ad_keywords=None,
+                            executor=None):
+    """
+    批量转换HTML，命中清洗缓存的直接返回，只转换没见过的内容
+    
+    Args:
+        html_contents: HTML内容列表
+        cache: CleanCache对象
+        workers / chunksize / backend / ad_keywords / executor: 同 convert_articles_html
+    
+    Returns:
+        [(Markdown文本, 字数, 自动摘要), ...]，顺序与输入一致
+    """
+    html_contents = list(html_contents)
+    ad_keywords = list(ad_keywords) if ad_keywords is not None else [None] * len(html_contents)
+    keys = [cache.make_key(html, keywords) for html, keywords in zip(html_contents, ad_keywords)]
+    found = cache.get_many(keys)
+    
+    # 只转换未命中的（同一内容只转换一次）
+    missing = {}
+    for key, html, keywords in zip(keys, html_contents, ad_keywords):
+        if key not in found and key not in missing:
+            missing[key] = (html, keywords)
+    
+    if missing:
+        converted = convert_articles_html(
+            [html for html, _ in missing.values()], workers=workers, chunksize=chunksize, backend=backend,
+            ad_keywords=[keywords for _, keywords in missing.values()], executor=executor
+        )
+        new_entries = {
+            key: (markdown, word_count, make_summary(markdown))
+            for key, (markdown, word_count) in zip(missing.keys(), converted)
+        }
+        cache.put_many(new_entries)
+        found.update(new_entries)
+    
+    return [found[key] for key in keys]
+
+
+def article_key(article):
+    """文章的去重键：URL，没有URL时用 (author, title) 组合"""
+    key = article.get('url', '')
+    if not key:
+        key = (article.get('author', ''), article.get('title', ''))
+    return key
+
+
+def make_duplicate_filter():
+    """返回一个判断函数：第一次见到的文章返回True，之后同一个去重键的文章返回False"""
+    seen = set()
+    
+    def accept(article):
+        key = article_key(article)
+        if key in seen:
+            return False
+        seen.add(key)
+        return True
+    
+    return accept
+
+
+def passes_title_rules(article):
+    """标题规则：过滤测试文章"""
+    title = article.get('title', '').lower()
+    return '测试' not in title and 'test' not in title
+
+
+def passes_raw_length(article, min_word_count=500):
+    """
+    原文长度预检（在HTML转换之前执行）
+    
+    Markdown字数来自HTML的正文文本，标签会被去掉，每个字符最多多出一个转义符，
+    所以字数不会超过HTML非空白字符数的 RAW_LENGTH_FACTOR 倍。
+    连这个上限都不到最小字数的文章，转换后一定会被字数过滤掉，可以直接丢弃
+    """
+    html_content = article.get('content_html', '')
+    if len(html_content) * RAW_LENGTH_FACTOR < min_word_count:
+        return False
+    return len(re.sub(r'\s+', '', html_content)) * RAW_LENGTH_FACTOR >= min_word_count
+
+
+def passes_word_count(article, min_word_count=500):
+    """字数规则（需要先转换为Markdown）"""
+    return article.get('word_count', 0) >= min_word_count
+
+
+def passes_content_length(article):
+    """内容规则：Markdown正文不能为空或太短（需要先转换为Markdown）"""
+    content = article.get('content_markdown', '')
+    return bool(content) and len(content.strip()) >= 100
+
+
+class CleanStage:
+    """
+    清洗流水线中的一个过滤阶段
+    
+    每个阶段是逐篇文章的判断函数（返回True表示保留），并声明自己的相对成本，
+    以及是否依赖Markdown转换的结果。流水线按成本从低到高执行，
+    不依赖Markdown的阶段都放在转换之前，尽早丢弃注定会被过滤的文章
+    """
+    
+    def __init__(self, name, cost, accept, needs_markdown=False):
+        self.name = name
+        self.cost = cost
+        self.accept = accept
+        self.needs_markdown = needs_markdown
+        self.checked = 0
+        self.removed = 0
+        self.seconds = 0.0
+    
+    def run(self, articles):
+        """过滤文章列表，并累计处理数、移除数和耗时"""
+        start = time.perf_counter()
+        kept = [article for article in articles if self.accept(article)]
+        self.seconds += time.perf_counter() - start
+        self.checked += len(articles)
+        self.removed += len(articles) - len(kept)
+        return kept
+    
+    def check(self, article):
+        """判断单篇文章（流式清洗用），同样累计统计"""
+        start = time.perf_counter()
+        accepted = self.accept(article)
+        self.seconds += time.perf_counter() - start
+        self.checked += 1
+        self.removed += 0 if accepted else 1
+        return accepted
+
+
+class RepostStage(CleanStage):
+    """近似去重阶段：需要整批文章一起聚类，不是逐篇判断，见 deduplicate_reposts"""
+    
+    def __init__(self, near_dup, cost=5):
+        super().__init__('近似去重', cost, None, needs_markdown=True)
+        self.near_dup = near_dup
+    
+    def run(self, articles):
+        start = time.perf_counter()
+        kept = deduplicate_reposts(articles, self.near_dup)
+        self.seconds += time.perf_counter() - start
+        self.checked += len(articles)
+        self.removed += len(articles) - len(kept)
+        return kept
+
+
+def build_clean_stages(min_word_count=500, near_dup=None):
+    """
+    构建清洗流水线的过滤阶段（按成本排序，成本相同时保持声明顺序）
+    
+    Args:
+        min_word_count: 最小字数
+        near_dup: 近似去重参数（传给 NearDupIndex，None表示不做近似去重）
     
-    # 去除所有空白字符后统计
-    text_no_space = re.sub(r'\s+', '', text)
-    return len(text_no_space)
+    Returns:
+        CleanStage列表
+    """
+    stages = [
+        CleanStage('去重', 1, make_duplicate_filter()),
+        CleanStage('标题规则', 1, passes_title_rules),
+        CleanStage('原文长度预检', 2, partial(passes_raw_length, min_word_count=min_word_count)),
+        CleanStage('字数', 1, partial(passes_word_count, min_word_count=min_word_count), needs_markdown=True),
+        CleanStage('内容长度', 1, passes_content_length, needs_markdown=True),
+    ]
+    if near_dup:
+        stages.append(RepostStage(near_dup))
+    return sorted(stages, key=lambda stage: stage.cost)
+
+
+def print_stage_report(stages, convert_count, convert_seconds):
+    """打印每个阶段的处理数、移除数和耗时"""
+    print("\n   📊 清洗流水线:")
+    print(f"   {'阶段':<10} {'成本':>4} {'处理':>6} {'移除':>6} {'耗时':>9}")
+    
+    rows = [(stage.name, stage.cost, stage.checked, stage.removed, stage.seconds)
+            for stage in stages if not stage.needs_markdown]
+    rows.append(('Markdown转换', '-', convert_count, 0, convert_seconds))
+    rows.extend((stage.name, stage.cost, stage.checked, stage.removed, stage.seconds)
+                for stage in stages if stage.needs_markdown)
+    
+    for name, cost, checked, removed, seconds in rows:
+        print(f"   {name:<10} {cost:>4} {checked:>6} {removed:>6} {seconds * 1000:>7.1f}ms")
 
 
 def deduplicate_articles(articles):
@@ -185,18 +544,8 @@ def deduplicate_articles(articles):
     Returns:
         去重后的文章列表
     """
-    seen = set()
-    unique_articles = []
-    
-    for article in articles:
-        # 使用 URL 或 (author, title) 组合作为唯一键
-        key = article.get('url', '')
-        if not key:
-            key = (article.get('author', ''), article.get('title', ''))
-        
-        if key not in seen:
-            seen.add(key)
-            unique_articles.append(article)
+    accept = make_duplicate_filter()
+    unique_articles = [article for article in articles if accept(article)]
     
     duplicate_count = len(articles) - len(unique_articles)
     if duplicate_count > 0:
@@ -205,6 +554,32 @@ def deduplicate_articles(articles):
     return unique_articles
 
 
+def deduplicate_reposts(articles, near_dup):
+    """
+    近似去重（同一篇文章被不同公众号转载，跨天也能识别），见 near_dup.py
+    
+    Args:
+        articles: 文章列表（需要有 content_markdown）
+        near_dup: NearDupIndex的参数，如 {"db_path": "data/cache/near_dup.db", "threshold": 0.7}
+    
+    Returns:
+        去重后的文章列表（每簇转载只保留最早发布的一篇）
+    """
+    if not articles:
+        return articles
+    
+    index = NearDupIndex(**near_dup)
+    try:
+        articles, removed_count = remove_near_duplicates(articles, index)
+    finally:
+        index.close()
+    
+    if removed_count > 0:
+        print(f"   🔁 近似去重: 移除 {removed_count} 篇转载")
+    
+    return articles
+
+
 def filter_low_quality(articles, min_word_count=500):
     """
     过滤低质量文章
@@ -216,87 +591,180 @@ def filter_low_quality(articles, min_word_count=500):
     Returns:
         过滤后的文章列表
     """
-    filtered = []
-    removed_count = 0
-    
-    for article in articles:
-        # 检查字数
-        if article.get('word_count', 0) < min_word_count:
-            removed_count += 1
-            continue
-        
-        # 检查标题
-        title = article.get('title', '').lower()
-        if '测试' in title or 'test' in title:
-            removed_count += 1
-            continue
-        
-        # 检查内容是否为空
-        content = article.get('content_markdown', '')
-        if not content or len(content.strip()) < 100:
-            removed_count += 1
-            continue
-        
-        filtered.append(article)
+    filtered = [
+        article for article in articles
+        if passes_word_count(article, min_word_count)
+        and passes_title_rules(article)
+        and passes_content_length(article)
+    ]
     
+    removed_count = len(articles) - len(filtered)
     if removed_count > 0:
         print(f"   🗑️  过滤: 移除 {removed_count} 篇低质量文章")
     
     return filtered
 
 
-def clean_articles_v2(articles, min_word_count=500):
+def convert_articles_markdown(articles, workers=1, chunksize=None, backend='soup', cache=None, ad_rules=None,
+                              executor=None, boilerplate=None):
     """
-    清洗文章数据的主函数（Markdown版本）
+    把文章的 content_html 转换为Markdown，写入 content_markdown、word_count，没有摘要时补上摘要
     
     Args:
-        articles: 原始文章列表
-        min_word_count: 最小字数阈值
-    
-    Returns:
-        清洗后的文章列表（包含Markdown格式）
+        articles: 文章列表（原地修改）
+        cache: CleanCache对象（None表示不使用清洗缓存）
+        ad_rules: AdRules对象（None表示所有文章都用默认广告关键词）
+        executor: 复用的进程池，见 convert_articles_html
+        boilerplate: BoilerplateModel对象（None表示不删除模板段落）。
+            先用本批文章更新模型，再删除模板段落；删除在缓存之后，字数和摘要按删除后的内容计算
+        其余参数同 clean_articles_v2
     """
-    print("\n" + "=" * 60)
-    print("🧹 开始清洗数据（Markdown格式）")
-    print("=" * 60)
-    
-    print(f"\n原始文章数: {len(articles)}")
-    
-    # 1. 转换为Markdown并去除广告
-    print("\n1️⃣  转换为Markdown格式...")
-    for article in articles:
-        # 转换HTML为Markdown
-        html_content = article.get('content_html', '')
-        markdown = clean_html_to_markdown(html_content)
-        
-        # 去除广告
-        markdown = remove_ads_markdown(markdown)
+    if not articles:
+        return
+    
+    html_contents = [article.get('content_html', '') for article in articles]
+    ad_keywords = None
+    if ad_rules:
+        ad_keywords = [ad_rules.keywords_for(article.get('author')) for article in articles]
+    
+    if cache:
+        converted = convert_articles_cached(html_contents, cache, workers, chunksize, backend, ad_keywords, executor)
+    else:
+        converted = [
+            (markdown, word_count, None)
+            for markdown, word_count in convert_articles_html(
+                html_contents, workers, chunksize, backend, ad_keywords, executor
+            )
+        ]
+    
+    if boilerplate:
+        boilerplate.learn_many([
+            (article.get('author'), article.get('url'), markdown)
+            for article, (markdown, _, _) in zip(articles, converted)
+        ])
+    
+    for article, (markdown, word_count, auto_summary) in zip(articles, converted):
+        if boilerplate:
+            markdown, removed = boilerplate.strip(article.get('author'), markdown)
+            if removed:
+                word_count = calculate_word_count_markdown(markdown)
+                auto_summary = None
         
         # 保存Markdown
         article['content_markdown'] = markdown
         
         # 计算字数
-        article['word_count'] = calculate_word_count_markdown(markdown)
+        article['word_count'] = word_count
         
         # 处理摘要
         if not article.get('summary'):
             # 如果没有摘要，取前200字（去除Markdown标记）
-            plain_text = re.sub(r'[#*_\[\]()>]', '', markdown)
-            article['summary'] = plain_text[:200] + '...' if len(plain_text) > 200 else plain_text
+            article['summary'] = auto_summary if auto_summary is not None else make_summary(markdown)
+
+
+def open_clean_cache(cache_file, backend='soup', cache_max_entries=50000):
+    """打开清洗缓存（cache_file 为空时返回None）"""
+    if not cache_file:
+        return None
+    return CleanCache(cache_file, cleaner_fingerprint(backend), cache_max_entries)
+
+
+def open_boilerplate_model(boilerplate):
+    """打开模板段落模型（boilerplate 为空时返回None）"""
+    if not boilerplate:
+        return None
+    return BoilerplateModel(**boilerplate)
+
+
+def print_boilerplate_stats(model):
+    """打印模板段落的删除情况"""
+    if model and model.stripped_articles:
+        print(f"   🧽 模板段落: {model.stripped_articles} 篇文章删除了 {model.removed_blocks} 处")
+
+
+def print_cache_stats(cache):
+    """打印清洗缓存的命中情况"""
+    if cache:
+        print(f"   💾 清洗缓存: 命中 {cache.hits} 篇, 新转换 {cache.misses} 篇")
+
+
+def clean_articles_v2(articles, min_word_count=500, workers=1, chunksize=None, backend='soup',
+                      cache_file=None, cache_max_entries=50000, ad_keywords_extra=None, ad_rules_dir=None,
+                      near_dup=None, boilerplate=None):
+    """
+    清洗文章数据的主函数（Markdown版本）
     
-    print(f"   ✅ Markdown转换完成")
+    先执行不依赖Markdown的低成本过滤（去重、标题规则、原文长度预检），
+    只把剩下的文章转换为Markdown，再按字数和内容长度过滤、近似去重，见 build_clean_stages
+    
+    Args:
+        articles: 原始文章列表（Article，dict会被转换为Article）
+        min_word_count: 最小字数阈值
+        workers: Markdown转换的进程数（1表示串行）
+        chunksize: 进程池每批分发的文章数（默认自动计算）
+        backend: HTML→Markdown转换后端，见 HTML_BACKENDS
+        cache_file: 清洗缓存的SQLite文件（None表示不使用缓存）
+        cache_max_entries: 清洗缓存最多保存的文章数
+        ad_keywords_extra: 对所有公众号追加的广告关键词
+        ad_rules_dir: 按公众号的广告规则文件目录，见 ad_rules.py
+        near_dup: 近似去重参数（见 deduplicate_reposts，None表示不做近似去重）
+        boilerplate: 模板段落模型参数（传给 BoilerplateModel，None表示不删除模板段落）
+    
+    Returns:
+        清洗后的文章列表（Article，包含Markdown格式）
+    """
+    print("\n" + "=" * 60)
+    print("🧹 开始清洗数据（Markdown格式）")
+    print("=" * 60)
+    
+    articles = [Article.coerce(article) for article in articles]
+    print(f"\n原始文章数: {len(articles)}")
     
-    # 2. 去重
-    print("\n2️⃣  去除重复文章...")
-    articles = deduplicate_articles(articles)
+    stages = build_clean_stages(min_word_count, near_dup)
+    
+    # 1. 转换前过滤
+    print("\n1️⃣  转换前过滤（去重、标题规则、原文长度预检）...")
+    for stage in stages:
+        if not stage.needs_markdown:
+            articles = stage.run(articles)
     print(f"   ✅ 当前文章数: {len(articles)}")
     
+    # 2. 转换为Markdown并去除广告
+    print(f"\n2️⃣  转换为Markdown格式{f'（{workers} 个进程）' if workers > 1 else ''}...")
+    start = time.perf_counter()
+    ad_rules = AdRules(ad_keywords_extra, ad_rules_dir) if ad_keywords_extra or ad_rules_dir else None
+    cache = open_clean_cache(cache_file, backend, cache_max_entries)
+    model = open_boilerplate_model(boilerplate)
+    try:
+        convert_articles_markdown(articles, workers, chunksize, backend, cache, ad_rules, boilerplate=model)
+    finally:
+        if cache:
+            cache.close()
+        if model:
+            model.close()
+    print_cache_stats(cache)
+    print_boilerplate_stats(model)
+    convert_seconds = time.perf_counter() - start
+    convert_count = len(articles)
+    print(f"   ✅ Markdown转换完成")
+    
     # 3. 过滤低质量
     print(f"\n3️⃣  过滤低质量文章（最小字数: {min_word_count}）...")
-    articles = filter_low_quality(articles, min_word_count)
+    for stage in stages:
+        if stage.needs_markdown:
+            articles = stage.run(articles)
     print(f"   ✅ 当前文章数: {len(articles)}")
     
+    print_stage_report(stages, convert_count, convert_seconds)
+    
     # 4. 统计
+    print_clean_summary(articles)
+    
+    return articles
+
+
+def print_clean_summary(articles):
+    """打印清洗结果统计"""
     print("\n" + "=" * 60)
     print("✅ 数据清洗完成！")
     print(f"   最终文章数: {len(articles)}")
@@ -306,8 +774,83 @@ def clean_articles_v2(articles, min_word_count=500):
         avg_words = total_words // len(articles)
         print(f"   平均字数: {avg_words}")
         print(f"   字数范围: {min(a['word_count'] for a in articles)} - {max(a['word_count'] for a in articles)}")
+
+
+def iter_clean_articles(articles, min_word_count=500, workers=1, chunksize=None, backend='soup',
+                        cache_file=None, cache_max_entries=50000, ad_keywords_extra=None, ad_rules_dir=None,
+                        near_dup=None, boilerplate=None, batch_size=32):
+    """
+    流式清洗：逐篇接收原始文章，凑够一批就转换为Markdown，过滤后逐篇产出
     
-    return articles
+    过滤规则与 clean_articles_v2 相同，区别：
+    - 转换完成后立即删除 content_html，原始HTML只在一批之内存活
+    - 进程池和清洗缓存在所有批次之间复用
+    - 去重只能看到已经处理过的文章：同一链接保留先到的一篇；
+      近似去重按批进行，转载比原文早一批到达时两篇都会保留
+    
+    Args:
+        articles: 原始文章的可迭代对象（如 rss_fetcher.iter_rss_articles）
+        batch_size: 每批转换的文章数
+        其余参数同 clean_articles_v2
+    
+    Yields:
+        清洗后的文章（不含 content_html）
+    """
+    print("\n" + "=" * 60)
+    print(f"🧹 开始流式清洗（每批 {batch_size} 篇）")
+    print("=" * 60)
+    
+    stages = build_clean_stages(min_word_count, near_dup)
+    pre_stages = [stage for stage in stages if not stage.needs_markdown]
+    post_stages = [stage for stage in stages if stage.needs_markdown]
+    
+    ad_rules = AdRules(ad_keywords_extra, ad_rules_dir) if ad_keywords_extra or ad_rules_dir else None
+    cache = open_clean_cache(cache_file, backend, cache_max_entries)
+    model = open_boilerplate_model(boilerplate)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    
+    convert_count = 0
+    convert_seconds = 0.0
+    word_counts = []
+    
+    def process(batch):
+        nonlocal convert_count, convert_seconds
+        start = time.perf_counter()
+        convert_articles_markdown(batch, workers, chunksize, backend, cache, ad_rules, executor, model)
+        convert_seconds += time.perf_counter() - start
+        convert_count += len(batch)
+        
+        # 转换完就释放原始HTML
+        for article in batch:
+            article.drop_html()
+        
+        for stage in post_stages:
+            batch = stage.run(batch)
+        word_counts.extend(article['word_count'] for article in batch)
+        return batch
+    
+    batch = []
+    try:
+        for article in map(Article.coerce, articles):
+            if all(stage.check(article) for stage in pre_stages):
+                batch.append(article)
+            if len(batch) >= batch_size:
+                yield from process(batch)
+                batch = []
+        if batch:
+            yield from process(batch)
+    finally:
+        if executor:
+            executor.shutdown()
+        if cache:
+            cache.close()
+        if model:
+            model.close()
+    
+    print_cache_stats(cache)
+    print_boilerplate_stats(model)
+    print_stage_report(stages, convert_count, convert_seconds)
+    print_clean_summary([{'word_count': word_count} for word_count in word_counts])
 
 
 # 测试代码
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地模拟大模型服务 - 用于测试 llm_client.py 和 ai_analyzer.py，不需要真实的API Key
+
+同时模拟两种接口：
+    POST /chat/completions      DeepSeek / OpenAI 兼容接口
+    POST /v1/messages           Claude 接口
+    GET  /stats                 请求数、最大并发数、各状态码次数
+
+按提示词类型（单次分析 / 分批分析 / 汇总 / 逐篇分析）从输入数据生成格式正确的JSON，
+评分由文章链接的哈希决定，结果稳定；可以注入延迟和错误，测试超时、重试和并发上限
+
+用法:
+    python fake_llm_server.py --port 18090
+    python fake_llm_server.py --port 18090 --delay 0.5 --fail-rate 0.2 --fail-status 429
+
+然后在 config.py 中把 base_url 指向它：
+    DEEPSEEK_BASE_URL = "http://127.0.0.1:18090"
+    CLAUDE_BASE_URL = "http://127.0.0.1:18090"
+
+python benchmark.py llm 会在进程内启动它，校验 llm_client 的并发上限、重试和错误传递
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+_INPUT_JSON_RE = re.compile(r'```json\n(.*?)\n```', re.S)
+
+
+def fake_score(url):
+    """由链接得到稳定的评分（3-9分）"""
+    return 3 + int(hashlib.md5((url or '').encode('utf-8')).hexdigest(), 16) % 7
+
+
+def fake_topics(text):
+    """从标题/正文中挑出话题标签"""
+    candidates = ["Claude", "ChatGPT", "DeepSeek", "n8n", "Agent", "提示词", "工作流", "AI副业", "RPA"]
+    return [topic for topic in candidates if topic.lower() in (text or '').lower()][:3] or ["AI工具"]
+
+
+def reference(article):
+    return {"article_title": article.get("title", ""), "source": article.get("author", ""),
+            "url": article.get("url", "")}
+
+
+def reading(article, score):
+    return {
+        "article_title": article.get("title", ""),
+        "article_url": article.get("url", ""),
+        "source": article.get("author", article.get("source", "")),
+        "score": score,
+        "meets_criteria": ["包含完整的操作步骤", "提供可直接复用的工具/模板", "有真实案例或数据支撑"],
+        "value_point": f"{article.get('title', '')}的核心方法",
+        "recommendation": "模拟服务生成的推荐理由：步骤完整、工具可复用，适合想快速上手的读者。",
+    }
+
+
+def answer_analyze(articles):
+    """单次分析（analyze_prompt.md）"""
+    ranked = sorted(articles, key=lambda a: fake_score(a.get("url")), reverse=True)
+    return {
+        "date": time.strftime("%Y-%m-%d"),
+        "statistics": {
+            "total_articles": len(articles),
+            "accounts_count": len({a.get("author") for a in articles}),
+            "high_value_count": sum(1 for a in articles if fake_score(a.get("url")) >= 7),
+        },
+        "inspirations": [
+            {"title": f"选题：{a.get('title', '')}", "angle": "从实操角度拆解", "target": "AI从业者",
+             "references": [reference(a)], "value": "训练营/模板分销"}
+            for a in ranked[:3]
+        ],
+        "deep_reading": [reading(a, fake_score(a.get("url"))) for a in ranked[:3]],
+    }
+
+
+def answer_map(articles):
+    """分批分析（map_prompt.md）"""
+    return {
+        "articles": [
+            {"url": a.get("url"), "title": a.get("title"), "source": a.get("author"),
+             "score": fake_score(a.get("url")), "value_point": "核心方法", "meets_criteria": ["包含完整的操作步骤"],
+             "reason": "模拟服务生成的推荐理由"}
+            for a in articles
+        ],
+        "topic_candidates": [
+            {"title": f"选题：{a.get('title', '')}", "angle": "从实操角度拆解", "target": "AI从业者",
+             "value": "训练营/模板分销", "reference_urls": [a.get("url")]}
+            for a in articles if fake_score(a.get("url")) >= 7
+        ][:3],
+        "hot_topics": [
+            {"topic_name": topic, "urls": [a.get("url")]}
+            for a in articles for topic in fake_topics(a.get("title", "") + a.get("content", ""))
+        ],
+    }
+
+
+def answer_article(article):
+    """逐篇分析（article_prompt.md）"""
+    score = fake_score(article.get("url"))
+    return {
+        "score": score,
+        "value_point": "核心方法",
+        "meets_criteria": ["包含完整的操作步骤"] if score >= 5 else [],
+        "reason": "模拟服务生成的推荐理由",
+        "topics": fake_topics(article.get("title", "") + article.get("content", "")),
+        "topic_idea": ({"title": f"选题：{article.get('title', '')}", "angle": "从实操角度拆解",
+                        "target": "AI从业者", "value": "训练营/模板分销"} if score >= 7 else None),
+    }
+
+
+def answer_reduce(merged):
+    """汇总（reduce_prompt.md）"""
+    by_url = {a.get("url"): a for a in merged.get("articles", [])}
+    inspirations = []
+    used = set()
+    for topic in merged.get("topic_candidates", []):
+        core = (topic.get("reference_urls") or [None])[0]
+        if core in used or core not in by_url:
+            continue
+        used.add(core)
+        article = by_url[core]
+        inspirations.append({
+            "title": topic.get("title", ""), "angle": topic.get("angle", ""), "target": topic.get("target", ""),
+            "references": [{"article_title": article.get("title", ""), "source": article.get("source", ""),
+                            "url": core}],
+            "value": topic.get("value", ""),
+        })
+        if len(inspirations) == 3:
+            break
+
+    mentions = {}
+    for topic in merged.get("hot_topics", []):
+        mentions.setdefault(topic.get("topic_name"), set()).update(topic.get("urls", []))
+    hot_topics = [
+        {"topic_name": name, "heat_level": "🔥" * min(3, max(1, len(urls) // 2)), "mention_count": len(urls),
+         "analysis": "模拟服务生成的话题分析"}
+        for name, urls in sorted(mentions.items(), key=lambda item: len(item[1]), reverse=True)
+        if len(urls) >= 2
+    ][:5]
+
+    return {
+        "inspirations": inspirations,
+        "deep_reading": [reading(a, a.get("score")) for a in merged.get("articles", [])[:3]],
+        "hot_topics": hot_topics,
+    }
+
+
+def decode_articles(data):
+    """输入的文章数据：紧凑格式（{"fields": [...], "rows": [...]}）还原成字典列表"""
+    if isinstance(data, dict) and "fields" in data:
+        return [dict(zip(data["fields"], row)) for row in data["rows"]]
+    return data
+
+
+def answer(prompt):
+    """按提示词类型生成回复"""
+    match = _INPUT_JSON_RE.search(prompt)
+    data = json.loads(match.group(1)) if match else []
+    if "汇总提示词" not in prompt:
+        data = decode_articles(data)
+
+    if "汇总提示词" in prompt:
+        return answer_reduce(data)
+    if "分批分析提示词" in prompt:
+        return answer_map(data)
+    if "逐篇分析提示词" in prompt:
+        return answer_article(data[0] if data else {})
+    return answer_analyze(data)
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """模拟服务（记录统计数据，按配置注入延迟和错误）"""
+
+    daemon_threads = True
+
+    def __init__(self, address, delay=0.0, fail_rate=0.0, fail_status=500, seed=0):
+        super().__init__(address, FakeLLMHandler)
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "in_flight": 0, "max_concurrent": 0, "status": {}}
+
+    def enter(self):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_concurrent"] = max(self.stats["max_concurrent"], self.stats["in_flight"])
+            return self.random.random() < self.fail_rate
+
+    def leave(self, status):
+        with self.lock:
+            self.stats["in_flight"] -= 1
+            self.stats["status"][str(status)] = self.stats["status"].get(str(status), 0) + 1
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with self.server.lock:
+                self.send_json(200, self.server.stats)
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path.endswith("/v1/messages"):
+            api = "anthropic"
+            authorized = bool(self.headers.get("x-api-key"))
+        elif self.path.endswith("/chat/completions"):
+            api = "openai"
+            authorized = self.headers.get("Authorization", "").startswith("Bearer ")
+        else:
+            self.send_json(404, {"error": "not found"})
+            return
+
+        status = 200
+        fail = self.server.enter()
+        try:
+            if self.server.delay:
+                time.sleep(self.server.delay)
+            if not authorized:
+                status = 401
+                self.send_json(status, {"error": {"message": "missing api key"}})
+                return
+            if fail:
+                status = self.server.fail_status
+                self.send_json(status, {"error": {"message": "injected failure"}}, {"Retry-After": "0"})
+                return
+
+            prompt = request["messages"][-1]["content"]
+            text = json.dumps(answer(prompt), ensure_ascii=False)
+            input_tokens = len(prompt) // 2
+            output_tokens = len(text) // 2
+            if api == "anthropic":
+                self.send_json(status, {
+                    "id": "msg_fake", "type": "message", "role": "assistant", "model": request.get("model"),
+                    "content": [{"type": "text", "text": text}], "stop_reason": "end_turn",
+                    "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+                })
+            else:
+                self.send_json(status, {
+                    "id": "chatcmpl-fake", "object": "chat.completion", "model": request.get("model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": input_tokens, "completion_tokens": output_tokens},
+                })
+        finally:
+            self.server.leave(status)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟大模型服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=18090, help="监听端口")
+    parser.add_argument("--delay", type=float, default=0.0, help="每个请求的处理延迟（秒）")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="随机返回错误的比例（0-1）")
+    parser.add_argument("--fail-status", type=int, default=500, help="注入错误的状态码（如429、503）")
+    args = parser.parse_args()
+
+    server = FakeLLMServer((args.host, args.port), args.delay, args.fail_rate, args.fail_status)
+    print(f"🤖 模拟大模型服务: http://{args.host}:{args.port}（/chat/completions, /v1/messages, /stats）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
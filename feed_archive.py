@@ -0,0 +1,177 @@
+"""
+RSS原始内容归档模块 - 按内容哈希压缩保存每次下载的RSS原文，支持离线回放
+
+目录结构:
+    data/archive/
+        objects/ab/ab12...ef.xml.gz    # gzip压缩的RSS原文，文件名为原文的sha256（相同内容只存一份）
+        manifests/20251228_120000.json # 每次运行一个清单：抓取时间 + 每个源对应的原文哈希
+                                       # （分片执行时同一次运行的各分片合并到同一个清单）
+        latest.json                    # 每个源最近一次的原文哈希（源返回304时沿用）
+
+回放时按清单读取原文，用清单里的抓取时间作为"当前时间"做24小时过滤，
+得到与当天运行相同的输入，不访问 wechat2rss
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from utils import file_lock, load_json_file, save_json_file
+
+
+class FeedArchive:
+    """内容寻址的RSS原文归档"""
+    
+    def __init__(self, root='data/archive', run_id=None):
+        """
+        Args:
+            root: 归档目录
+            run_id: 本次运行的标识，用作清单文件名（默认取抓取时间）。
+                分片执行时各分片传入相同的值，清单合并到一起，回放时覆盖所有分片
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.manifests_dir = self.root / "manifests"
+        self._lock = threading.Lock()
+        self._latest = load_json_file(self.root / "latest.json", default={})
+        self._fetched_at = int(time.time())
+        self._run_id = run_id
+        self._feeds = {}
+        self._stored = set()
+    
+    def _object_path(self, sha256):
+        return self.objects_dir / sha256[:2] / f"{sha256}.xml.gz"
+    
+    def store(self, account, content):
+        """
+        归档一个源的RSS原文，并记入本次运行的清单
+        
+        Args:
+            account: 公众号信息 {"name", "rss_url", "bid"}
+            content: RSS原始内容（bytes）
+        
+        Returns:
+            原文的sha256
+        """
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = self._object_path(sha256)
+        
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + '.tmp')
+            with gzip.open(tmp_path, 'wb') as f:
+                f.write(content)
+            tmp_path.replace(path)
+        
+        with self._lock:
+            self._latest[account['bid']] = sha256
+            self._stored.add(account['bid'])
+            self._feeds[account['bid']] = {
+                'name': account['name'],
+                'rss_url': account['rss_url'],
+                'sha256': sha256,
+            }
+        return sha256
+    
+    def store_not_modified(self, account):
+        """源返回304时，清单里沿用该源最近一次归档的原文"""
+        self._carry_over(account, 'not_modified')
+    
+    def store_skipped(self, account):
+        """本次按发文频率跳过的源（没有请求），清单里同样沿用最近一次归档的原文，保证清单覆盖所有公众号"""
+        self._carry_over(account, 'skipped')
+    
+    def _carry_over(self, account, flag):
+        with self._lock:
+            sha256 = self._latest.get(account['bid'])
+            if sha256:
+                self._feeds[account['bid']] = {
+                    'name': account['name'],
+                    'rss_url': account['rss_url'],
+                    'sha256': sha256,
+                    flag: True,
+                }
+    
+    def save_manifest(self, bid_order=None):
+        """
+        保存本次运行的清单
+        
+        Args:
+            bid_order: 公众号bid的顺序（OPML顺序），回放时按此顺序处理，保证结果一致
+        
+        Returns:
+            清单文件路径；没有任何源的原文时不保存，返回None（避免回放时选中空清单）
+        
+        已有同名清单（同一次运行的其他分片）时合并，抓取时间取最早的；
+        latest.json 重新读取后只更新本进程归档过的源，不覆盖其他分片的结果
+        """
+        with self._lock:
+            feeds = self._feeds
+            if bid_order is not None:
+                feeds = {bid: feeds[bid] for bid in bid_order if bid in feeds}
+            if not feeds:
+                return None
+            name = self._run_id or datetime.fromtimestamp(self._fetched_at).strftime("%Y%m%d_%H%M%S")
+            path = self.manifests_dir / f"{name}.json"
+            latest_path = self.root / "latest.json"
+            
+            with file_lock(latest_path):
+                manifest = {'fetched_at': self._fetched_at, 'feeds': feeds}
+                existing = load_json_file(path)
+                if existing:
+                    manifest = {
+                        'fetched_at': min(existing['fetched_at'], self._fetched_at),
+                        'feeds': {**existing['feeds'], **feeds},
+                    }
+                save_json_file(manifest, path)
+                
+                latest = load_json_file(latest_path, default={})
+                latest.update({bid: self._latest[bid] for bid in self._stored})
+                save_json_file(latest, latest_path)
+        return path
+    
+    def load(self, sha256):
+        """读取归档的RSS原文"""
+        with gzip.open(self._object_path(sha256), 'rb') as f:
+            return f.read()
+    
+    def find_manifest(self, name='latest'):
+        """
+        查找清单文件
+        
+        Args:
+            name: "latest"（最近一次）、日期前缀（"20251228"，取当天最后一次）、
+                清单文件名（"20251228_120000"）或清单文件路径
+        
+        Returns:
+            清单文件路径
+        
+        Raises:
+            FileNotFoundError: 找不到匹配的清单
+        """
+        if Path(name).is_file():
+            return Path(name)
+        
+        manifests = sorted(self.manifests_dir.glob("*.json"))
+        if name != 'latest':
+            manifests = [p for p in manifests if p.stem.startswith(name)]
+        if not manifests:
+            raise FileNotFoundError(f"找不到归档清单: {name}（目录: {self.manifests_dir}）")
+        return manifests[-1]
+    
+    def load_manifest(self, name='latest'):
+        """
+        读取清单
+        
+        Returns:
+            {"fetched_at": 抓取时间戳, "feeds": {bid: {"name", "rss_url", "sha256"}}}
+        """
+        path = self.find_manifest(name)
+        manifest = load_json_file(path)
+        if manifest is None:
+            raise FileNotFoundError(f"无法读取归档清单: {path}")
+        print(f"📼 使用归档清单: {path}（抓取时间 {datetime.fromtimestamp(manifest['fetched_at']):%Y-%m-%d %H:%M:%S}）")
+        return manifest
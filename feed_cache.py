@@ -0,0 +1,201 @@
+"""
+RSS源状态缓存模块 - 按公众号bid持久化每个源的状态
+- HTTP校验信息（ETag / Last-Modified），用于条件请求
+- 高水位线（最新发布时间 + 已见过的文章GUID/链接），用于增量爬取
+
+校验信息、高水位线和上次轮询时间在爬取时只是暂存（pending，带本次运行的标识），本次运行的清洗、
+分析和推送都成功后由 main.py 调用 commit_pending 才生效；运行中途失败时，下次运行仍会重新处理这些文章，
+失败的运行留下的暂存状态在下次提交时丢弃
+"""
+
+import threading
+from datetime import datetime
+from utils import file_lock, load_json_file, save_json_file
+
+
+# 每个源最多记住多少个已见过的GUID/链接（超出后丢弃最旧的）
+MAX_SEEN_IDS = 500
+
+
+class HighWaterMark:
+    """
+    单个RSS源的高水位线
+    
+    - published: 已见过的最新发布时间（Unix时间戳）
+    - seen: 已见过的文章GUID和链接（按从新到旧排列）
+    """
+    
+    def __init__(self, published=None, seen=None):
+        self.published = published
+        self.seen = list(seen or [])
+        self._seen_set = set(self.seen)
+        # 本次新见到的文章，保存时才并入高水位线，不影响本次的判断
+        self._new_ids = []
+        self._new_id_set = set()
+        self._newest = published
+    
+    def is_known(self, entry_id, link, published_ts):
+        """
+        判断文章是否已经处理过
+        
+        GUID或链接见过即为已知；比高水位线更早发布的文章也视为已知
+        （wechat2rss按时间从新到旧输出，遇到已知文章后即可停止）
+        """
+        if entry_id and entry_id in self._seen_set:
+            return True
+        if link and link in self._seen_set:
+            return True
+        if self.published is not None and published_ts is not None and published_ts < self.published:
+            return True
+        return False
+    
+    def mark_seen(self, entry_id, link, published_ts):
+        """记录一篇新文章"""
+        for value in (entry_id, link):
+            if value and value not in self._seen_set and value not in self._new_id_set:
+                self._new_id_set.add(value)
+                self._new_ids.append(value)
+        if published_ts is not None and (self._newest is None or published_ts > self._newest):
+            self._newest = published_ts
+    
+    @property
+    def new_count(self):
+        """本次新记录的GUID/链接数量"""
+        return len(self._new_ids)
+    
+    def to_dict(self):
+        seen = (self._new_ids + self.seen)[:MAX_SEEN_IDS]
+        return {'published': self._newest, 'seen': seen}
+
+
+class FeedCache:
+    """
+    按bid保存的RSS源状态缓存
+    
+    文件格式（JSON）:
+        {
+            "3074462761": {
+                "etag": "\"abc123\"",
+                "last_modified": "Wed, 28 Dec 2025 15:30:00 GMT",
+                "high_water_mark": {"published": 1766907000, "seen": ["guid...", "http://..."]},
+                "checked_at": "2025-12-28 16:00:00",
+                "pending": {"run_id": "20251228_160000", "etag": ..., "high_water_mark": ...}
+                # 暂存，commit_pending(run_id) 后并入上面的字段
+            }
+        }
+    
+    多个爬取线程会同时读写，所有访问都加锁；
+    分片执行时多个进程共用同一个文件，保存时只合并本进程更新过的源
+    """
+    
+    def __init__(self, cache_file, run_id=None):
+        """
+        Args:
+            cache_file: 缓存文件路径
+            run_id: 本次运行的标识（暂存的状态带上它，只有同一次运行提交时才生效）
+        """
+        self.cache_file = cache_file
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._feeds = load_json_file(cache_file, default={})
+        self._dirty = set()
+    
+    def get(self, bid):
+        """获取某个源的状态（副本），不存在时返回空字典"""
+        with self._lock:
+            return dict(self._feeds.get(bid, {}))
+    
+    def update(self, bid, **fields):
+        """更新某个源的状态字段"""
+        with self._lock:
+            state = self._feeds.setdefault(bid, {})
+            state.update(fields)
+            state['checked_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self._dirty.add(bid)
+    
+    def stage(self, bid, **fields):
+        """暂存某个源的状态字段（commit_pending 之前读取的仍是上次提交的值）"""
+        with self._lock:
+            state = self._feeds.setdefault(bid, {})
+            pending = state.get('pending')
+            # 其他运行（中途失败）留下的暂存状态整个替换，不和本次的混在一起
+            if not pending or pending.get('run_id') != self.run_id:
+                pending = state['pending'] = {'run_id': self.run_id}
+            pending.update(fields)
+            self._dirty.add(bid)
+    
+    def commit_pending(self, run_id):
+        """
+        提交某次运行暂存的状态（重新读取文件后合并，分片执行时其他进程暂存的状态也会提交）
+        
+        其他运行留下的暂存状态一并丢弃：那些运行没有成功，不能把它们爬到的文章标记为已处理
+        
+        Args:
+            run_id: 要提交的运行标识
+        
+        Returns:
+            提交的源数量
+        """
+        self.save()
+        with self._lock:
+            with file_lock(self.cache_file):
+                feeds = load_json_file(self.cache_file, default={})
+                committed = 0
+                changed = False
+                for state in feeds.values():
+                    pending = state.pop('pending', None)
+                    if pending is None:
+                        continue
+                    changed = True
+                    if pending.pop('run_id', None) == run_id:
+                        state.update(pending)
+                        committed += 1
+                if changed:
+                    save_json_file(feeds, self.cache_file)
+            self._feeds = feeds
+        return committed
+    
+    def conditional_headers(self, bid):
+        """
+        构造条件请求头
+        
+        Returns:
+            {"If-None-Match": ..., "If-Modified-Since": ...}（只包含已知的校验值）
+        """
+        state = self.get(bid)
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+        return headers
+    
+    def save_validators(self, bid, validators):
+        """
+        暂存 ETag / Last-Modified（RSS内容解析成功后才调用，commit_pending 后生效）
+        
+        Args:
+            validators: {"etag", "last_modified"}，见 rss_fetcher.download_rss_feed
+        """
+        self.stage(bid, etag=validators.get('etag'), last_modified=validators.get('last_modified'))
+    
+    def get_high_water_mark(self, bid):
+        """获取某个源的高水位线"""
+        state = self.get(bid).get('high_water_mark') or {}
+        return HighWaterMark(state.get('published'), state.get('seen'))
+    
+    def save_high_water_mark(self, bid, high_water_mark):
+        """暂存某个源的高水位线（commit_pending 后生效）"""
+        self.stage(bid, high_water_mark=high_water_mark.to_dict())
+    
+    def save(self):
+        """写回缓存文件（重新读取文件后合并本进程更新过的源，避免覆盖其他分片的结果）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            with file_lock(self.cache_file):
+                feeds = load_json_file(self.cache_file, default={})
+                for bid in self._dirty:
+                    feeds[bid] = self._feeds[bid]
+                save_json_file(feeds, self.cache_file)
+            self._dirty.clear()
@@ -0,0 +1,87 @@
+"""
+自适应轮询模块 - 根据每个RSS源的发文频率决定本次运行是否需要爬取
+
+有的公众号一天发好几篇，有的一周才发一篇，每次都全部轮询很浪费：
+- 每个源在 FeedCache 里记录最近的发布时间和上次轮询时间
+- 用最近发布间隔的中位数估计发文周期，轮询间隔 = 周期 × factor，限制在 [最小间隔, 最大间隔] 之内
+- 最大间隔要小于24小时窗口，保证新文章在过期之前一定能被抓到（配合高水位线不会漏抓）
+"""
+
+import time
+from statistics import median
+
+
+# 每个源保留多少个最近的发布时间用于估计发文周期
+MAX_HISTORY = 20
+
+
+class FeedScheduler:
+    """按发文周期决定哪些源到期需要轮询"""
+    
+    def __init__(self, cache, min_interval_hours=0, max_interval_hours=12, factor=0.5):
+        """
+        Args:
+            cache: FeedCache对象（发布历史和上次轮询时间保存在这里）
+            min_interval_hours: 最小轮询间隔（小时，0表示活跃的源每次都轮询）
+            max_interval_hours: 最大轮询间隔（小时，应小于24小时窗口）
+            factor: 轮询间隔占发文周期的比例（越小越及时，请求也越多）
+        """
+        self.cache = cache
+        self.min_interval = min_interval_hours * 3600
+        self.max_interval = max_interval_hours * 3600
+        self.factor = factor
+    
+    def poll_interval(self, bid):
+        """
+        计算某个源的轮询间隔（秒）
+        
+        发布历史不足两条时无法估计周期，使用最小间隔（每次都轮询）
+        """
+        history = self.cache.get(bid).get('publish_history') or []
+        if len(history) < 2:
+            return self.min_interval
+        
+        gaps = [newer - older for newer, older in zip(history, history[1:]) if newer > older]
+        if not gaps:
+            return self.min_interval
+        
+        interval = median(gaps) * self.factor
+        return max(self.min_interval, min(self.max_interval, interval))
+    
+    def is_due(self, bid, now=None):
+        """判断某个源本次是否需要轮询"""
+        last_polled = self.cache.get(bid).get('last_polled')
+        if last_polled is None:
+            return True
+        if now is None:
+            now = time.time()
+        return now - last_polled >= self.poll_interval(bid)
+    
+    def select_due(self, accounts, now=None):
+        """
+        筛选本次需要轮询的公众号
+        
+        Returns:
+            (需要轮询的公众号列表, 跳过的公众号列表)
+        """
+        if now is None:
+            now = time.time()
+        due, skipped = [], []
+        for account in accounts:
+            (due if self.is_due(account['bid'], now) else skipped).append(account)
+        return due, skipped
+    
+    def record_poll(self, bid, publish_timestamps, polled_at=None):
+        """
+        记录一次成功的轮询
+        
+        Args:
+            bid: 公众号ID
+            publish_timestamps: 本次看到的文章发布时间戳
+            polled_at: 轮询时间（默认当前时间）
+        """
+        history = set(self.cache.get(bid).get('publish_history') or [])
+        history.update(ts for ts in publish_timestamps if ts)
+        self.cache.update(bid, publish_history=sorted(history, reverse=True)[:MAX_HISTORY])
+        # 轮询时间和高水位线一起提交：本次运行失败时，下次运行不能因为"刚轮询过"而跳过这个源
+        self.cache.stage(bid, last_polled=int(polled_at or time.time()))
@@ -0,0 +1,148 @@
+"""
+流式RSS解析模块 - 基于 iterparse 逐条解析 wechat2rss 的RSS，遇到时间窗口外的文章即停止
+
+和 feedparser 的区别：
+- feedparser 会先把整份文档和所有条目（包括完整的 content:encoded HTML）解析成对象
+- 这里逐条产出条目，处理完立即 clear 释放，内存中只有当前条目的HTML；
+  XML解析器在条目结束前已经读入了它的全部文本（包括 content:encoded），
+  窗口外的条目省掉的只是构造文章和后续处理
+- wechat2rss 的条目按发布时间从新到旧排列，遇到第一条窗口外的文章后，后面的都不用解析
+- 不做 feedparser 的HTML净化（script等标签由 data_cleaner 统一去除）
+"""
+
+import io
+import time
+import xml.etree.ElementTree as ET
+
+from article import Article
+from utils import parse_pub_timestamp, format_datetime
+
+
+CONTENT_NS = '{http://purl.org/rss/1.0/modules/content/}'
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+
+ENTRY_TAGS = ('item', ATOM_NS + 'entry')
+
+
+def _child_text(elem, *tags):
+    """返回第一个存在的子元素文本"""
+    for tag in tags:
+        child = elem.find(tag)
+        if child is not None and child.text:
+            return child.text
+    return ''
+
+
+def _atom_link(elem):
+    for link in elem.findall(ATOM_NS + 'link'):
+        if link.get('rel', 'alternate') == 'alternate':
+            return link.get('href', '')
+    return ''
+
+
+def iter_feed_entries(content):
+    """
+    逐条产出RSS/Atom条目元素（产出后元素会被清空，调用方需在产出期间读取所需字段）
+    
+    Args:
+        content: RSS原始内容（bytes）
+    
+    Yields:
+        条目的 Element 对象
+    """
+    parents = []
+    for event, elem in ET.iterparse(io.BytesIO(content), events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            continue
+        
+        parents.pop()
+        if elem.tag in ENTRY_TAGS:
+            yield elem
+            # 释放已处理的条目（包括其中的完整HTML）
+            elem.clear()
+            if parents:
+                parents[-1].remove(elem)
+
+
+def extract_articles_streaming(content, account_name, filter_24h=True, high_water_mark=None, now_ts=None,
+                               publish_times=None):
+    """
+    流式解析RSS并提取文章（与 rss_fetcher.extract_articles_from_feed 的文章格式相同）
+    
+    Args:
+        content: RSS原始内容（bytes）
+        account_name: 公众号名称
+        filter_24h: 是否只提取24小时内的文章（遇到更早的文章即停止解析）
+        high_water_mark: HighWaterMark对象（可选），遇到已处理过的文章即停止
+        now_ts: 24小时过滤使用的"当前时间"（默认取当前时间）
+        publish_times: 列表（可选）。提供时追加每个新条目的发布时间（与 feedparser 路径交给
+            FeedScheduler.record_poll 的相同）：遇到窗口外的文章后不再提取文章，但继续读取
+            后面条目的发布时间，直到遇到已处理过的文章
+    
+    Returns:
+        (文章列表, 解析过的条目数)
+    """
+    articles = []
+    parsed = 0
+    window_end = time.time() if now_ts is None else now_ts
+    window_start = window_end - 24 * 3600
+    # 已经遇到窗口外的文章，后面的条目只读取发布时间
+    past_window = False
+    
+    for entry in iter_feed_entries(content):
+        parsed += 1
+        try:
+            # 先只读轻量字段，判断是否需要继续
+            pub_date_str = _child_text(entry, 'pubDate', ATOM_NS + 'published', ATOM_NS + 'updated')
+            link = _child_text(entry, 'link') or _atom_link(entry)
+            guid = _child_text(entry, 'guid', ATOM_NS + 'id') or link
+            
+            published_ts = parse_pub_timestamp(pub_date_str)
+            
+            if high_water_mark is not None and high_water_mark.is_known(guid, link, published_ts):
+                break
+            
+            if publish_times is not None and published_ts is not None:
+                publish_times.append(published_ts)
+            if past_window:
+                continue
+            
+            if filter_24h:
+                if published_ts is None:
+                    continue
+                if published_ts < window_start:
+                    # 条目从新到旧排列，后面的都更早；需要发布时间时继续读取，否则停止
+                    if publish_times is None:
+                        break
+                    past_window = True
+                    continue
+                if published_ts > window_end:
+                    # 发布时间在未来（时钟偏差或数据错误）：只跳过这一条，与 feedparser 路径一致
+                    continue
+            
+            # 通过了窗口判断，才读取正文并构造文章
+            summary = _child_text(entry, 'description', ATOM_NS + 'summary')
+            content_html = _child_text(entry, CONTENT_NS + 'encoded', ATOM_NS + 'content') or summary
+            
+            articles.append(Article(
+                title=_child_text(entry, 'title', ATOM_NS + 'title').strip(),
+                author=account_name,
+                url=link,
+                guid=guid,
+                publish_time_raw=pub_date_str,
+                publish_time=format_datetime(pub_date_str) if pub_date_str else '',
+                publish_ts=published_ts,
+                content_html=content_html,
+                summary=summary
+            ))
+            
+            if high_water_mark is not None:
+                high_water_mark.mark_seen(guid, link, published_ts)
+        
+        except Exception as e:
+            print(f"⚠️  解析文章失败: {_child_text(entry, 'title') or 'Unknown'}")
+            print(f"   错误: {e}")
+            continue
+    
+    return articles, parsed
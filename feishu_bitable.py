@@ -6,11 +6,13 @@
 功能：将清洗后的文章数据保存到飞书多维表格
 """
 
-import requests
+import http_client
 import json
 from datetime import datetime
 from typing import List, Dict
 
+from article import Article
+
 
 def get_tenant_access_token(app_id, app_secret):
     """
@@ -30,7 +32,8 @@ def get_tenant_access_token(app_id, app_secret):
     print(f"📡 正在获取 tenant_access_token...")
     
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        # 获取令牌是幂等的，5xx时也可以安全重试
+        response = http_client.post(url, json=payload, headers=headers, idempotent=True)
         result = response.json()
         
         if result.get("code") != 0:
@@ -62,7 +65,7 @@ def get_table_fields(tenant_access_token, app_token, table_id):
     print(f"📋 正在获取表格字段信息...")
     
     try:
-        response = requests.get(url, headers=headers)
+        response = http_client.get(url, headers=headers)
         result = response.json()
         
         if result.get("code") != 0:
@@ -91,17 +94,17 @@ def format_article_for_bitable(article):
     返回:
         多维表格记录格式的字典
     """
+    article = Article.coerce(article)
+    
     # 提取发布时间（Unix时间戳，毫秒）
     published_timestamp = None
     
-    # 尝试多种时间字段（兼容不同的数据格式）
-    if article.get('published_parsed'):
-        # feedparser的时间格式转为Unix时间戳
-        import time
-        published_timestamp = int(time.mktime(article['published_parsed']) * 1000)
-    elif article.get('publish_time') or article.get('publish_time_raw') or article.get('published'):
+    if article.get('publish_ts'):
+        # rss_fetcher 已经解析好的时间戳（秒）
+        published_timestamp = int(article.publish_ts) * 1000
+    elif article.get('publish_time') or article.get('publish_time_raw'):
         # 如果有字符串格式的时间，尝试解析
-        time_str = article.get('publish_time') or article.get('publish_time_raw') or article.get('published')
+        time_str = article.get('publish_time') or article.get('publish_time_raw')
         try:
             from dateutil import parser as date_parser
             dt = date_parser.parse(time_str)
@@ -115,8 +118,7 @@ def format_article_for_bitable(article):
     
     # 验证必需字段
     title = article.get('title', '').strip()
-    # 兼容 link 和 url 两种字段名
-    link = article.get('link', article.get('url', '')).strip()
+    link = article.get('url', '').strip()
     
     if not title or not link:
         raise ValueError(f"标题或链接为空: title={title}, link={link}")
@@ -181,8 +183,8 @@ def batch_insert_articles_to_bitable(tenant_access_token, app_token, table_id, a
                 print(f"⚠️  跳过空标题文章")
                 continue
             
-            # 兼容 link 和 url 两种字段名
-            article_link = article.get('link') or article.get('url')
+            # 旧数据中的 link 字段会映射为 url
+            article_link = Article.coerce(article).get('url')
             if not article_link or not article_link.strip():
                 print(f"⚠️  跳过无链接文章: {article.get('title', 'Unknown')}")
                 continue
@@ -217,7 +219,7 @@ def batch_insert_articles_to_bitable(tenant_access_token, app_token, table_id, a
         print(f"📤 正在插入第 {i+1}-{min(i+batch_size, len(records))} 条记录...")
         
         try:
-            response = requests.post(url, json=payload, headers=headers)
+            response = http_client.post(url, json=payload, headers=headers)
             result = response.json()
             
             if result.get("code") != 0:
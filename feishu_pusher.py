@@ -6,7 +6,7 @@
 功能：将AI分析报告推送到飞书群
 """
 
-import requests
+import http_client
 import json
 from datetime import datetime
 from pathlib import Path
@@ -30,7 +30,8 @@ def get_tenant_access_token(app_id, app_secret):
     print(f"📡 正在获取 tenant_access_token...")
     
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        # 获取令牌是幂等的，5xx时也可以安全重试
+        response = http_client.post(url, json=payload, headers=headers, idempotent=True)
         result = response.json()
         
         if result.get("code") != 0:
@@ -71,7 +72,7 @@ def send_message_to_group(tenant_access_token, chat_id, msg_type, content):
     print(f"📤 正在发送消息到群聊 (chat_id: {chat_id})...")
     
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = http_client.post(url, json=payload, headers=headers)
         result = response.json()
         
         if result.get("code") != 0:
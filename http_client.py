@@ -0,0 +1,221 @@
+"""
+HTTP传输模块 - 所有对外HTTP请求共用的连接池和重试逻辑
+
+rss_fetcher、feishu_pusher、feishu_bitable 都通过这里发请求：
+- 共用一个 requests.Session，按host复用连接（keep-alive）
+- 遇到 429 / 5xx / 连接错误时按指数退避（带随机抖动）重试，优先遵守 Retry-After
+- 统计请求数、重试数和连接复用情况
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# 连接池配置：最多缓存多少个host的连接池，每个host最多保持多少个连接
+POOL_CONNECTIONS = 32
+POOL_MAXSIZE = 32
+
+# 默认超时（连接超时, 读取超时），调用方未指定timeout时使用
+DEFAULT_TIMEOUT = (5, 30)
+
+# 重试配置
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5   # 第一次重试前的基础等待（秒）
+BACKOFF_MAX = 30     # 单次等待上限（秒）
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# 非幂等请求（如发消息、插入记录）只在服务端明确拒绝处理时重试
+NON_IDEMPOTENT_RETRY_STATUS_CODES = {429}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+
+_session = None
+_session_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {
+    'requests': 0,   # 发出的HTTP请求数（含重试）
+    'retries': 0,    # 重试次数
+    'failures': 0,   # 重试用尽后仍失败的调用数
+}
+
+
+def get_session():
+    """获取全局共享的 Session（首次调用时创建）"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def _count(key, n=1):
+    with _stats_lock:
+        _stats[key] += n
+
+
+def parse_retry_after(value):
+    """
+    解析 Retry-After 响应头
+    
+    Args:
+        value: 秒数（"120"）或HTTP日期（"Wed, 21 Oct 2015 07:28:00 GMT"）
+    
+    Returns:
+        需要等待的秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    计算第attempt次重试前的等待时间（full jitter 指数退避）
+    
+    Args:
+        attempt: 第几次重试（从1开始）
+        retry_after: 服务端要求的等待秒数（优先使用）
+    
+    Returns:
+        等待秒数
+    """
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** (attempt - 1))))
+
+
+def request(method, url, max_retries=MAX_RETRIES, idempotent=None, retry_read_timeout=True, **kwargs):
+    """
+    发送HTTP请求（带连接复用和重试）
+    
+    Args:
+        method: HTTP方法
+        url: 请求地址
+        max_retries: 最大重试次数（0表示不重试）
+        idempotent: 请求是否幂等；默认按HTTP方法判断。
+            非幂等请求只在429时重试，避免5xx时重复提交
+        retry_read_timeout: 幂等请求读取超时后是否重试。服务端生成很慢的请求（如大模型调用）
+            超时后重试多半还会超时，总耗时成倍增加，这类请求应设为False
+        **kwargs: 透传给 requests 的参数（headers、json、timeout等）
+    
+    Returns:
+        requests.Response（最后一次请求的响应，状态码由调用方检查）
+    
+    Raises:
+        requests.RequestException: 重试用尽后仍连接失败
+    """
+    method = method.upper()
+    if idempotent is None:
+        idempotent = method in IDEMPOTENT_METHODS
+    retry_codes = RETRY_STATUS_CODES if idempotent else NON_IDEMPOTENT_RETRY_STATUS_CODES
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    
+    session = get_session()
+    attempt = 0
+    
+    while True:
+        _count('requests')
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            # 读取超时时服务端可能已处理了非幂等请求，不重试
+            if isinstance(e, requests.ReadTimeout):
+                retryable = idempotent and retry_read_timeout
+            else:
+                retryable = idempotent or isinstance(e, requests.ConnectTimeout)
+            if not retryable or attempt >= max_retries:
+                _count('failures')
+                raise
+            attempt += 1
+            delay = backoff_delay(attempt)
+            print(f"⚠️  请求失败，{delay:.1f}s 后重试（{attempt}/{max_retries}）: {url} - {e}")
+        else:
+            if response.status_code not in retry_codes:
+                return response
+            if attempt >= max_retries:
+                _count('failures')
+                return response
+            attempt += 1
+            delay = backoff_delay(attempt, parse_retry_after(response.headers.get('Retry-After')))
+            print(f"⚠️  HTTP {response.status_code}，{delay:.1f}s 后重试（{attempt}/{max_retries}）: {url}")
+            response.close()
+        
+        _count('retries')
+        time.sleep(delay)
+
+
+def get(url, **kwargs):
+    """发送GET请求（参数同 request）"""
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    """发送POST请求（参数同 request）"""
+    return request('POST', url, **kwargs)
+
+
+def get_stats():
+    """
+    获取HTTP统计信息
+    
+    Returns:
+        {
+            "requests": 发出的请求数,
+            "retries": 重试次数,
+            "failures": 重试用尽仍失败的次数,
+            "connections": 新建的连接数,
+            "pool_hits": 复用已有连接的请求数,
+        }
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    
+    connections = 0
+    pooled_requests = 0
+    if _session is not None:
+        # urllib3 的每个host连接池都记录了新建连接数和请求数
+        seen = set()
+        for adapter in _session.adapters.values():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                connections += pool.num_connections
+                pooled_requests += pool.num_requests
+    
+    stats['connections'] = connections
+    stats['pool_hits'] = max(0, pooled_requests - connections)
+    return stats
+
+
+def print_stats():
+    """打印HTTP统计信息"""
+    stats = get_stats()
+    print(f"   HTTP请求: {stats['requests']} 次, 重试 {stats['retries']} 次, 失败 {stats['failures']} 次")
+    print(f"   连接复用: 新建 {stats['connections']} 个连接, 复用 {stats['pool_hits']} 次")
@@ -0,0 +1,116 @@
+"""
+键值缓存表模块 - 清洗、逐篇分析、摘要三种缓存共用的SQLite存储
+
+每张表的结构为 (key, fingerprint, 值列..., last_used)：
+- 打开时删除指纹与当前不同的行（规则、提示词或参数变了，旧结果全部作废）
+- 批量查询命中的行会刷新 last_used，条目数超过上限时按最近使用时间淘汰
+缓存键的计算和值的编码由各缓存自己负责，这里只按键存取值列组成的元组
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class KeyedStore:
+    """按键存取、带指纹失效和LRU淘汰的SQLite表"""
+
+    def __init__(self, db_path, table, columns, fingerprint, max_entries):
+        """
+        Args:
+            db_path: SQLite文件路径
+            table: 表名
+            columns: 值列 [(列名, 类型)]，如 [("summary", "TEXT")]
+            fingerprint: 当前指纹（不同指纹的行互不可见）
+            max_entries: 最多保存的条目数
+
+        打开时清除的旧指纹行数记在 purged 中，由调用方决定如何提示
+        """
+        self.table = table
+        self.columns = [name for name, _ in columns]
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        column_defs = "".join(f"{name} {sql_type} NOT NULL,\n" for name, sql_type in columns)
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                {column_defs}
+                last_used INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_last_used ON {table}(last_used)")
+
+        self.purged = self._conn.execute(
+            f"DELETE FROM {table} WHERE fingerprint != ?", (fingerprint,)
+        ).rowcount
+        self._conn.commit()
+
+    def get_many(self, keys):
+        """
+        批量查询（命中的条目刷新最近使用时间）
+
+        Returns:
+            {key: 值列元组}（只包含命中的键）
+        """
+        keys = list(set(keys))
+        found = {}
+        with self._lock:
+            # SQLite单条语句的参数个数有限制，分批查询
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, {', '.join(self.columns)} FROM {self.table} WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, *values in rows:
+                    found[key] = tuple(values)
+
+            if found:
+                now = int(time.time())
+                self._conn.executemany(
+                    f"UPDATE {self.table} SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, entries):
+        """
+        批量写入，并在超出容量时淘汰最久未使用的条目
+
+        Args:
+            entries: {key: 值列元组}
+        """
+        if not entries:
+            return
+        now = int(time.time())
+        placeholders = ", ".join("?" * (len(self.columns) + 3))
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} "
+                f"(key, fingerprint, {', '.join(self.columns)}, last_used) VALUES ({placeholders})",
+                [(key, self.fingerprint, *values, now) for key, values in entries.items()]
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY last_used LIMIT ?)",
+                (overflow,)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,180 @@
+"""
+大模型调用模块 - DeepSeek / OpenAI / Claude 的统一异步客户端
+
+- 直接调用各家的HTTP接口，经 http_client 共用连接池，不再每次分析都新建SDK客户端
+- 显式的连接/读取超时；429 / 5xx / 连接错误按指数退避重试（见 http_client.request），
+  读取超时不重试：一次最长要等 read_timeout 秒，重试只会让总耗时成倍增加
+- 每个客户端一个并发上限：分批/逐篇分析时可以同时发出很多请求，实际在途的请求数不超过上限
+- 接口是异步的（complete），同步代码用 complete_sync；HTTP请求在线程池中执行
+
+本地测试可以用 fake_llm_server.py 模拟各家的接口（把 base_url 指向它）
+"""
+
+import asyncio
+import json
+
+import http_client
+
+
+# 各提供商的接口类型、默认API地址和默认模型
+PROVIDERS = {
+    "deepseek": {"api": "openai", "base_url": "https://api.deepseek.com", "model": "deepseek-chat"},
+    "openai": {"api": "openai", "base_url": "https://api.openai.com/v1", "model": "gpt-4o-mini"},
+    "claude": {"api": "anthropic", "base_url": "https://api.anthropic.com", "model": "claude-3-5-sonnet-20241022"},
+}
+
+ANTHROPIC_VERSION = "2023-06-01"
+
+# 默认超时（连接超时, 读取超时）：生成长JSON可能需要一两分钟
+DEFAULT_TIMEOUT = (5, 180)
+
+
+class LLMError(Exception):
+    """大模型调用失败（重试用尽后仍返回错误状态码，或返回内容格式不对）"""
+
+
+class LLMClient:
+    """一个提供商的客户端（可以在多次调用、多个事件循环之间复用）"""
+
+    def __init__(self, provider, api_key, model=None, base_url=None, connect_timeout=DEFAULT_TIMEOUT[0],
+                 read_timeout=DEFAULT_TIMEOUT[1], max_retries=http_client.MAX_RETRIES, max_concurrency=4,
+                 temperature=0.7):
+        """
+        Args:
+            provider: "deepseek", "openai" 或 "claude"
+            api_key: API密钥
+            model: 模型名称（默认见 PROVIDERS）
+            base_url: API地址（默认见 PROVIDERS）
+            connect_timeout: 连接超时（秒）
+            read_timeout: 读取超时（秒）
+            max_retries: 429 / 5xx / 连接错误的最大重试次数（读取超时不重试）
+            max_concurrency: 同时在途的请求数上限
+            temperature: 采样温度
+        """
+        if provider not in PROVIDERS:
+            raise ValueError(f"不支持的AI提供商: {provider}. 支持: {', '.join(PROVIDERS)}")
+
+        spec = PROVIDERS[provider]
+        self.provider = provider
+        self.api = spec["api"]
+        self.api_key = api_key
+        self.model = model or spec["model"]
+        self.base_url = (base_url or spec["base_url"]).rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.temperature = temperature
+
+        self._semaphore = None
+        self._loop = None
+
+    def _get_semaphore(self):
+        """当前事件循环的并发限制（asyncio.Semaphore 不能跨事件循环使用）"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _build_request(self, prompt, system, max_tokens, json_mode):
+        """构造请求：(url, headers, body)"""
+        if self.api == "anthropic":
+            body = {
+                "model": self.model,
+                "max_tokens": max_tokens,
+                "temperature": self.temperature,
+                "messages": [{"role": "user", "content": prompt}],
+            }
+            if system:
+                body["system"] = system
+            headers = {
+                "x-api-key": self.api_key,
+                "anthropic-version": ANTHROPIC_VERSION,
+                "Content-Type": "application/json",
+            }
+            return f"{self.base_url}/v1/messages", headers, body
+
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        body = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": max_tokens,
+        }
+        if json_mode:
+            body["response_format"] = {"type": "json_object"}  # 强制JSON输出
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        return f"{self.base_url}/chat/completions", headers, body
+
+    def _parse_response(self, data):
+        """解析响应：(文本, 输入token数, 输出token数)"""
+        usage = data.get("usage") or {}
+        try:
+            if self.api == "anthropic":
+                text = "".join(block.get("text", "") for block in data["content"] if block.get("type") == "text")
+                return text, usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+            text = data["choices"][0]["message"]["content"]
+            return text, usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        except (KeyError, IndexError, TypeError) as e:
+            raise LLMError(f"{self.provider} 返回格式不正确: {e}") from e
+
+    def _post(self, url, headers, body):
+        """发送请求（同步，在线程池中执行）"""
+        # 生成请求没有副作用，5xx也可以安全重试；读取超时说明生成太慢，重试多半还会超时
+        response = http_client.post(
+            url, headers=headers, json=body, timeout=self.timeout,
+            max_retries=self.max_retries, idempotent=True, retry_read_timeout=False
+        )
+        if response.status_code != 200:
+            raise LLMError(f"{self.provider} 请求失败: HTTP {response.status_code} - {response.text[:300]}")
+        try:
+            return response.json()
+        except json.JSONDecodeError as e:
+            raise LLMError(f"{self.provider} 返回的不是JSON: {response.text[:300]}") from e
+
+    async def complete(self, prompt, system=None, max_tokens=8000, json_mode=True):
+        """
+        调用模型生成回复
+
+        Args:
+            prompt: 用户提示词
+            system: 系统提示词
+            max_tokens: 最大输出token数
+            json_mode: 是否要求输出JSON（仅OpenAI兼容接口支持，Claude由提示词约束）
+
+        Returns:
+            (回复文本, 输入token数, 输出token数)
+
+        Raises:
+            LLMError: 重试用尽后仍然失败
+            requests.RequestException: 连接失败，或读取超时（不重试）
+        """
+        url, headers, body = self._build_request(prompt, system, max_tokens, json_mode)
+        async with self._get_semaphore():
+            data = await asyncio.to_thread(self._post, url, headers, body)
+        return self._parse_response(data)
+
+    def complete_sync(self, prompt, system=None, max_tokens=8000, json_mode=True):
+        """complete 的同步版本"""
+        return asyncio.run(self.complete(prompt, system, max_tokens, json_mode))
+
+
+_clients = {}
+
+
+def get_client(provider, api_key, model=None, base_url=None, **options):
+    """
+    获取客户端（相同参数的客户端只创建一次，多次调用共享并发上限）
+
+    Args:
+        provider, api_key, model, base_url: 见 LLMClient
+        options: LLMClient 的其他参数（超时、重试、并发上限等）
+    """
+    key = (provider, api_key, model, base_url, tuple(sorted(options.items())))
+    if key not in _clients:
+        _clients[key] = LLMClient(provider, api_key, model, base_url, **options)
+    return _clients[key]
@@ -8,14 +8,19 @@ WeChat RSS → AI选题日报
 
 import sys
 import json
+import argparse
 from datetime import datetime
 from pathlib import Path
 import config
-from rss_fetcher import fetch_rss_articles
-from data_cleaner import clean_articles_v2
+import http_client
+from article import json_default
+from rss_fetcher import fetch_rss_articles, iter_rss_articles
+from data_cleaner import clean_articles_v2, iter_clean_articles
 from ai_analyzer import analyze_articles
 from feishu_pusher import push_report_to_feishu
 from feishu_bitable import save_articles_to_feishu_bitable
+from sharding import run_sharded
+from run_options import get_fetch_options, get_clean_options, new_run_id, commit_feed_state
 
 
 def save_json(data, filename, output_dir=None):
@@ -37,58 +42,163 @@ def save_json(data, filename, output_dir=None):
     
     # 保存文件
     with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+        json.dump(data, f, ensure_ascii=False, indent=2, default=json_default)
     
     print(f"✅ 数据已保存到: {filepath}")
 
 
+def fetch_and_clean(replay=None, run_id=None):
+    """
+    第1步爬取RSS文章 + 第2步清洗数据（单进程）
+    
+    配置了 STREAM_PIPELINE 时爬取和清洗流式衔接，见 stream_fetch_and_clean
+    
+    参数:
+        replay: 回放的归档清单（None表示正常爬取）
+        run_id: 本次运行的标识（见 run_options.new_run_id）
+    
+    返回:
+        (原始文章数, 清洗后的文章列表)
+    """
+    fetch_options = get_fetch_options(replay, run_id)
+    clean_options = get_clean_options()
+    
+    stream = getattr(config, 'STREAM_PIPELINE', None)
+    if stream:
+        return stream_fetch_and_clean(fetch_options, clean_options, **stream)
+    
+    # ==================== 第1步：爬取RSS文章 ====================
+    print("\n" + "=" * 80)
+    print("📼 第1步：回放归档的RSS文章" if replay else "📡 第1步：爬取RSS文章")
+    print("=" * 80)
+    
+    articles = fetch_rss_articles(**fetch_options)
+    
+    if not articles:
+        print_no_articles_hint()
+        commit_feed_state(run_id, replay)
+        sys.exit(0)
+    
+    print(f"\n✅ 成功获取 {len(articles)} 篇文章")
+    
+    # 保存原始数据（可选）
+    if getattr(config, 'SAVE_RAW_DATA', False):
+        save_json(articles, "raw_articles.json", output_dir="data")
+    
+    # ==================== 第2步：清洗数据 ====================
+    print("\n" + "=" * 80)
+    print("🧹 第2步：清洗数据")
+    print("=" * 80)
+    
+    cleaned_articles = clean_articles_v2(articles=articles, **clean_options)
+    
+    return len(articles), cleaned_articles
+
+
+def stream_fetch_and_clean(fetch_options, clean_options, batch_size=32, max_pending=16):
+    """
+    流式执行第1-2步：爬取 → 清洗 → 收集，三段由生成器衔接
+    
+    - 最多 max_pending 个公众号同时在途，清洗跟不上时暂停提交新的爬取（背压）
+    - 每凑够 batch_size 篇转换一批，转换后立即释放原始HTML
+    内存峰值取决于在途的文章数，而不是当天的文章总量；最后只保留清洗后的文章
+    
+    参数:
+        fetch_options: 同 fetch_rss_articles
+        clean_options: 同 clean_articles_v2
+        batch_size: 每批转换的文章数
+        max_pending: 最多同时在途的公众号数
+    
+    返回:
+        (原始文章数, 清洗后的文章列表)
+    """
+    print("\n" + "=" * 80)
+    print("🌊 第1-2步：流式爬取并清洗")
+    print("=" * 80)
+    
+    if getattr(config, 'SAVE_RAW_DATA', False):
+        print("⚠️  流式模式不保存原始数据（SAVE_RAW_DATA），需要时请关闭 STREAM_PIPELINE")
+    
+    raw_count = 0
+    
+    def count_raw(articles):
+        nonlocal raw_count
+        for article in articles:
+            raw_count += 1
+            yield article
+    
+    raw_articles = count_raw(iter_rss_articles(max_pending=max_pending, **fetch_options))
+    cleaned_articles = list(iter_clean_articles(raw_articles, batch_size=batch_size, **clean_options))
+    
+    if not raw_count:
+        print_no_articles_hint()
+        commit_feed_state(fetch_options['run_id'], fetch_options['replay'])
+        sys.exit(0)
+    
+    print(f"\n✅ 成功获取 {raw_count} 篇文章")
+    
+    # 按时间排序（最新的在前），与非流式模式的顺序一致
+    cleaned_articles.sort(key=lambda x: x.get('publish_ts') or 0, reverse=True)
+    
+    return raw_count, cleaned_articles
+
+
+def print_no_articles_hint():
+    """没有爬取到文章时的提示"""
+    print("\n⚠️  没有找到符合条件的文章")
+    print("可能原因:")
+    print("  1. RSS源没有更新（启用了 FEED_CACHE_FILE 时，未更新的源会被跳过）")
+    print("  2. 时间过滤太严格（可以调整 DAYS_AGO 参数）")
+    print("  3. wechat2rss服务未运行")
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="WeChat RSS → AI选题日报")
+    parser.add_argument(
+        '--replay', nargs='?', const='latest', metavar='MANIFEST',
+        help="离线回放归档的RSS原文（默认最近一次；可传日期如 20251228 或清单路径），"
+             "不访问wechat2rss，也不推送到飞书"
+    )
+    return parser.parse_args()
+
+
 def main():
     """主函数"""
+    args = parse_args()
+    
     print("\n" + "=" * 80)
     print(" " * 25 + "🤖 WeChat RSS → AI选题日报")
     print("=" * 80)
     print(f"\n⏰ 开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     try:
-        # ==================== 第1步：爬取RSS文章 ====================
-        print("\n" + "=" * 80)
-        print("📡 第1步：爬取RSS文章")
-        print("=" * 80)
+        num_shards = getattr(config, 'FETCH_SHARDS', 1)
+        run_id = new_run_id()
         
-        articles = fetch_rss_articles(
-            opml_file=config.OPML_FILE,
-            filter_24h=True  # 只获取24小时内的文章
-        )
-        
-        if not articles:
-            print("\n⚠️  没有找到符合条件的文章")
-            print("可能原因:")
-            print("  1. RSS源没有更新")
-            print("  2. 时间过滤太严格（可以调整 DAYS_AGO 参数）")
-            print("  3. wechat2rss服务未运行")
-            sys.exit(0)
-        
-        print(f"\n✅ 成功获取 {len(articles)} 篇文章")
-        
-        # 保存原始数据（可选）
-        if getattr(config, 'SAVE_RAW_DATA', False):
-            save_json(articles, "raw_articles.json", output_dir="data")
-        
-        # ==================== 第2步：清洗数据 ====================
-        print("\n" + "=" * 80)
-        print("🧹 第2步：清洗数据")
-        print("=" * 80)
-        
-        cleaned_articles = clean_articles_v2(
-            articles=articles,
-            min_word_count=getattr(config, 'MIN_WORD_COUNT', 500)
-        )
+        if num_shards > 1 and not args.replay:
+            # ==================== 第1-2步：分片爬取并清洗 ====================
+            print("\n" + "=" * 80)
+            print(f"🧩 第1-2步：分片爬取并清洗（{num_shards} 个分片）")
+            print("=" * 80)
+            
+            raw_count, cleaned_articles = run_sharded(
+                num_shards=num_shards,
+                processes=getattr(config, 'SHARD_PROCESSES', None),
+                opml_file=config.OPML_FILE,
+                min_word_count=getattr(config, 'MIN_WORD_COUNT', 500),
+                run_id=run_id
+            )
+        else:
+            raw_count, cleaned_articles = fetch_and_clean(replay=args.replay, run_id=run_id)
         
         if not cleaned_articles:
             print("\n⚠️  清洗后没有符合条件的文章")
             print("可能原因:")
             print("  1. 文章字数太少（可以调整 MIN_WORD_COUNT 参数）")
             print("  2. 广告过滤太严格")
+            print("  3. RSS源没有更新")
+            commit_feed_state(run_id, args.replay)
             sys.exit(0)
         
         print(f"\n✅ 清洗完成，剩余 {len(cleaned_articles)} 篇文章")
@@ -96,6 +206,12 @@ def main():
         # ==================== 第2.5步：保存到飞书多维表格（如果配置了）====================
         push_mode = getattr(config, 'FEISHU_PUSH_MODE', 'group')
         
+        # 回放模式只用于调试清洗和提示词，不写入飞书
+        if args.replay:
+            print("\n📼 回放模式：跳过飞书多维表格和群推送")
+            push_mode = 'none'
+        
+        bitable_failed = False
         if push_mode in ['bitable', 'both']:
             print("\n" + "=" * 80)
             print("📊 第2.5步：保存清洗后的数据到飞书多维表格")
@@ -117,8 +233,9 @@ def main():
                         check_fields=False
                     )
                 except Exception as e:
+                    bitable_failed = True
                     print(f"❌ 保存到多维表格失败: {e}")
-                    print("   继续执行后续步骤...")
+                    print("   继续执行后续步骤（不提交RSS源的增量状态，下次运行会重新处理这些文章）...")
             else:
                 print("⚠️  未配置多维表格参数，跳过保存")
                 print("   如需保存到多维表格，请配置:")
@@ -128,13 +245,16 @@ def main():
         # ==================== 第3步：AI分析（可选）====================
         # 如果只保存到多维表格，可以跳过AI分析
         if push_mode == 'bitable':
+            if not bitable_failed:
+                commit_feed_state(run_id, args.replay)
             print("\n" + "=" * 80)
             print("✅ 数据已保存到多维表格，跳过AI分析")
             print("=" * 80)
             print(f"\n📊 执行摘要:")
-            print(f"   • 原始文章: {len(articles)} 篇")
+            print(f"   • 原始文章: {raw_count} 篇")
             print(f"   • 清洗后: {len(cleaned_articles)} 篇")
             print(f"   • 已保存到飞书多维表格")
+            http_client.print_stats()
             print(f"\n⏰ 结束时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             return
         
@@ -148,12 +268,15 @@ def main():
         if ai_provider.lower() == 'deepseek':
             api_key = config.DEEPSEEK_API_KEY
             model = getattr(config, 'DEEPSEEK_MODEL', 'deepseek-chat')
+            base_url = getattr(config, 'DEEPSEEK_BASE_URL', None)
         elif ai_provider.lower() == 'claude':
             api_key = config.CLAUDE_API_KEY
             model = getattr(config, 'CLAUDE_MODEL', 'claude-3-5-sonnet-20241022')
+            base_url = getattr(config, 'CLAUDE_BASE_URL', None)
         elif ai_provider.lower() == 'openai':
             api_key = config.OPENAI_API_KEY
             model = getattr(config, 'OPENAI_MODEL', 'gpt-4-turbo-preview')
+            base_url = getattr(config, 'OPENAI_BASE_URL', None)
         else:
             print(f"❌ 不支持的AI提供商: {ai_provider}")
             sys.exit(1)
@@ -170,12 +293,20 @@ def main():
             articles=cleaned_articles,
             ai_provider=ai_provider,
             api_key=api_key,
-            model=model
+            model=model,
+            base_url=base_url,
+            client_options=getattr(config, 'AI_CLIENT', None),
+            map_reduce=getattr(config, 'AI_MAP_REDUCE', None),
+            analysis_cache=getattr(config, 'AI_ANALYSIS_CACHE', None),
+            article_encoding=getattr(config, 'AI_ARTICLE_ENCODING', None),
+            summarizer=getattr(config, 'AI_SUMMARIZER', None)
         )
         
         # 保存报告到 reports 目录
         report_filename = f"ai_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         save_json(report, report_filename, output_dir="reports")
+        if not bitable_failed:
+            commit_feed_state(run_id, args.replay)
         
         # ==================== 第4步：推送AI报告到飞书群（可选）====================
         if push_mode in ['group', 'both']:
@@ -201,6 +332,8 @@ def main():
                 except Exception as e:
                     print(f"❌ 推送到飞书失败: {e}")
                     print("   报告已保存到本地，可以手动查看")
+        elif args.replay:
+            print("\n⏩ 跳过飞书群推送（回放模式）")
         else:
             print("\n⏩ 跳过飞书群推送（当前模式：只保存到多维表格）")
         
@@ -210,11 +343,12 @@ def main():
         print("=" * 80)
         
         print(f"\n📊 执行摘要:")
-        print(f"   • 原始文章: {len(articles)} 篇")
+        print(f"   • 原始文章: {raw_count} 篇")
         print(f"   • 清洗后: {len(cleaned_articles)} 篇")
-        print(f"   • 选题灵感: {len(report.get('topic_inspirations', []))} 条")
+        print(f"   • 选题灵感: {len(report.get('inspirations', []))} 条")
         print(f"   • 深度推荐: {len(report.get('deep_reading', []))} 篇")
         print(f"   • 热点话题: {len(report.get('hot_topics', []))} 个")
+        http_client.print_stats()
         print(f"\n📁 报告文件: reports/{report_filename}")
         print(f"⏰ 结束时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
@@ -0,0 +1,331 @@
+"""
+近似去重模块 - MinHash签名 + LSH分段索引（SQLite）
+
+同一篇文章常被多个公众号转载（URL不同、开头结尾的引导语不同），精确去重识别不出来：
+- 签名：对 content_markdown 去掉链接/图片和标点后取4字shingle，计算MinHash签名，
+  两个签名相同位置取值相同的比例 ≈ 两篇文章shingle集合的Jaccard相似度
+- 索引：签名切成 bands 段，每段的哈希作为LSH的桶，相似度高的文章大概率至少有一段完全相同；
+  查询时只比较同桶的候选，历史文章到几十万篇也不需要全表扫描
+- 索引跨运行持久化，今天转载的旧文章也能识别出来；超过保留天数的记录会被清理
+"""
+
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from pathlib import Path
+
+
+NUM_PERM = 64       # 签名长度（必须是2的幂）
+SHINGLE_SIZE = 4
+
+_BIN_BITS = NUM_PERM.bit_length() - 1
+_MAX_VALUE = (1 << (64 - _BIN_BITS)) - 1
+
+# 计算签名前去掉的内容：链接和图片（转载时图片代理地址、链接经常不同）、空白和标点
+_LINK_RE = re.compile(r'!?\[[^\]]*\]\([^)]*\)')
+_NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def normalize_text(markdown):
+    """计算签名用的文本：去掉链接、图片、空白和标点，英文转小写"""
+    text = _LINK_RE.sub('', markdown or '')
+    return _NON_WORD_RE.sub('', text).lower()
+
+
+def shingle_hash(shingle):
+    """shingle的64位哈希（两个不同种子的crc32拼接，跨进程稳定）"""
+    data = shingle.encode('utf-8')
+    return (zlib.crc32(data) << 32) | zlib.crc32(data, 0x9E3779B9)
+
+
+def minhash_signature(markdown, shingle_size=SHINGLE_SIZE):
+    """
+    计算文章的MinHash签名
+
+    用 one permutation hashing：每个shingle只算一次哈希，低位决定落在哪个桶，
+    高位作为取值，每个桶取最小值；空桶从右边最近的非空桶借值（加上偏移区分），
+    避免短文章的空桶被误判为相同
+
+    Args:
+        markdown: Markdown正文
+        shingle_size: shingle长度（字符数）
+
+    Returns:
+        长度为 NUM_PERM 的整数元组（正文为空时返回None）
+    """
+    text = normalize_text(markdown)
+    if not text:
+        return None
+
+    mins = [None] * NUM_PERM
+    mask = NUM_PERM - 1
+    for shingle in {text[i:i + shingle_size] for i in range(max(1, len(text) - shingle_size + 1))}:
+        h = shingle_hash(shingle)
+        slot = h & mask
+        value = h >> _BIN_BITS
+        if mins[slot] is None or value < mins[slot]:
+            mins[slot] = value
+
+    signature = list(mins)
+    for slot in range(NUM_PERM):
+        if mins[slot] is None:
+            for offset in range(1, NUM_PERM):
+                borrowed = mins[(slot + offset) % NUM_PERM]
+                if borrowed is not None:
+                    signature[slot] = (borrowed + offset * 0x9E3779B97F4A7C15) & _MAX_VALUE
+                    break
+
+    return tuple(signature)
+
+
+def jaccard_estimate(a, b):
+    """由两个签名估计Jaccard相似度"""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def band_keys(signature, bands):
+    """把签名切成 bands 段，返回每段的哈希（LSH的桶）"""
+    rows = NUM_PERM // bands
+    return [
+        zlib.crc32(array('Q', signature[band * rows:(band + 1) * rows]).tobytes())
+        for band in range(bands)
+    ]
+
+
+class NearDupIndex:
+    """持久化的MinHash LSH索引"""
+
+    def __init__(self, db_path, threshold=0.7, bands=16, retention_days=30):
+        """
+        Args:
+            db_path: SQLite文件路径
+            threshold: Jaccard相似度不低于该值视为近似重复
+            bands: LSH分段数（必须整除 NUM_PERM；越多召回越高，候选也越多）
+            retention_days: 记录保留天数（None表示永久保留）
+        """
+        if NUM_PERM % bands:
+            raise ValueError(f"bands 必须整除 {NUM_PERM}: {bands}")
+
+        self.db_path = db_path
+        self.threshold = threshold
+        self.bands = bands
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                url TEXT UNIQUE NOT NULL,
+                signature BLOB NOT NULL,
+                author TEXT,
+                title TEXT,
+                publish_ts REAL,
+                seen_at INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS bands (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                article_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_bands ON bands(band, bucket);
+            CREATE INDEX IF NOT EXISTS idx_bands_article ON bands(article_id);
+            CREATE INDEX IF NOT EXISTS idx_articles_seen_at ON articles(seen_at);
+        """)
+
+        # 分段数变了，旧的分段索引不能用，按新的分段重建
+        stored = self._conn.execute("SELECT MAX(band) FROM bands").fetchone()[0]
+        if stored is not None and stored != bands - 1:
+            self._rebuild_bands()
+        self._conn.commit()
+
+    def _rebuild_bands(self):
+        self._conn.execute("DELETE FROM bands")
+        for article_id, blob in self._conn.execute("SELECT id, signature FROM articles").fetchall():
+            self._insert_bands(article_id, tuple(array('Q', blob)))
+
+    def _insert_bands(self, article_id, signature):
+        self._conn.executemany(
+            "INSERT INTO bands VALUES (?, ?, ?)",
+            [(band, bucket, article_id) for band, bucket in enumerate(band_keys(signature, self.bands))]
+        )
+
+    def query(self, signature):
+        """
+        查找近似重复的历史文章
+
+        Returns:
+            [{"url", "author", "title", "publish_ts", "similarity"}, ...]
+        """
+        conditions = " OR ".join(["(b.band = ? AND b.bucket = ?)"] * self.bands)
+        params = [p for band, bucket in enumerate(band_keys(signature, self.bands)) for p in (band, bucket)]
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT a.url, a.signature, a.author, a.title, a.publish_ts "
+                f"FROM bands b JOIN articles a ON a.id = b.article_id WHERE {conditions}",
+                params
+            ).fetchall()
+
+        matches = []
+        for url, blob, author, title, publish_ts in rows:
+            similarity = jaccard_estimate(signature, array('Q', blob))
+            if similarity >= self.threshold:
+                matches.append({'url': url, 'author': author, 'title': title,
+                                'publish_ts': publish_ts, 'similarity': similarity})
+        return matches
+
+    def add_many(self, entries):
+        """
+        写入文章签名（同一URL覆盖旧记录）
+
+        Args:
+            entries: [(url, signature, author, title, publish_ts), ...]
+        """
+        if not entries:
+            return
+        now = int(time.time())
+        with self._lock:
+            for url, signature, author, title, publish_ts in entries:
+                blob = array('Q', signature).tobytes()
+                row = self._conn.execute("SELECT id FROM articles WHERE url = ?", (url,)).fetchone()
+                if row:
+                    article_id = row[0]
+                    self._conn.execute("DELETE FROM bands WHERE article_id = ?", (article_id,))
+                    self._conn.execute(
+                        "UPDATE articles SET signature = ?, author = ?, title = ?, publish_ts = ?, seen_at = ? "
+                        "WHERE id = ?",
+                        (blob, author, title, publish_ts, now, article_id)
+                    )
+                else:
+                    article_id = self._conn.execute(
+                        "INSERT INTO articles (url, signature, author, title, publish_ts, seen_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (url, blob, author, title, publish_ts, now)
+                    ).lastrowid
+                self._insert_bands(article_id, signature)
+            self._prune(now)
+            self._conn.commit()
+
+    def _prune(self, now):
+        """清理超过保留天数的记录"""
+        if not self.retention_days:
+            return
+        cutoff = now - int(self.retention_days * 86400)
+        self._conn.execute(
+            "DELETE FROM bands WHERE article_id IN (SELECT id FROM articles WHERE seen_at < ?)", (cutoff,)
+        )
+        self._conn.execute("DELETE FROM articles WHERE seen_at < ?", (cutoff,))
+
+    def count(self):
+        """索引中的文章数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _canonical_key(item):
+    """簇内保留最早发布的文章（通常是原创），发布时间相同按URL排序保证结果稳定"""
+    publish_ts = item.get('publish_ts')
+    return (publish_ts if publish_ts is not None else float('inf'), item.get('url') or '')
+
+
+def remove_near_duplicates(articles, index):
+    """
+    近似去重：把转载聚成簇，每簇只保留一篇
+
+    簇内最早发布的文章作为代表；代表是以前运行时已经处理过的文章时，本次的转载全部去掉。
+    保留的文章增加 reposted_by 字段（转载了这篇文章的其他公众号）
+
+    Args:
+        articles: 文章列表（需要有 content_markdown）
+        index: NearDupIndex对象
+
+    Returns:
+        (保留的文章列表, 去掉的文章数)
+    """
+    signatures = [minhash_signature(article.get('content_markdown', '')) for article in articles]
+
+    # 并查集：节点是本批文章的下标，或者历史文章的 ('db', url)
+    parent = {}
+
+    def find(node):
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(a, b):
+        parent[find(a)] = find(b)
+
+    history = {}
+    batch_urls = {article.get('url') for article in articles}
+    buckets = {}
+
+    for i, signature in enumerate(signatures):
+        find(i)
+        if signature is None:
+            continue
+
+        # 本批内的候选（同一个桶）
+        candidates = set()
+        for key in enumerate(band_keys(signature, index.bands)):
+            candidates.update(buckets.setdefault(key, []))
+            buckets[key].append(i)
+        for j in candidates:
+            if jaccard_estimate(signature, signatures[j]) >= index.threshold:
+                union(i, j)
+
+        # 历史文章（同一URL是本文上次运行的记录，不算转载）
+        for match in index.query(signature):
+            if match['url'] in batch_urls:
+                continue
+            node = ('db', match['url'])
+            history[node] = match
+            union(i, node)
+
+    clusters = {}
+    for node in list(parent):
+        clusters.setdefault(find(node), []).append(node)
+
+    keep = set(range(len(articles)))
+    reposted_by = {}
+    for members in clusters.values():
+        if len(members) < 2:
+            continue
+        items = {node: (history[node] if isinstance(node, tuple) else articles[node]) for node in members}
+        canonical = min(members, key=lambda node: _canonical_key(items[node]))
+
+        for node in members:
+            if node != canonical and not isinstance(node, tuple):
+                keep.discard(node)
+
+        if not isinstance(canonical, tuple):
+            authors = {items[node].get('author') for node in members if node != canonical}
+            authors.discard(items[canonical].get('author'))
+            authors.discard(None)
+            reposted_by[canonical] = sorted(authors)
+
+    index.add_many([
+        (article.get('url'), signature, article.get('author'), article.get('title'), article.get('publish_ts'))
+        for article, signature in zip(articles, signatures)
+        if signature is not None and article.get('url')
+    ])
+
+    kept = []
+    for i, article in enumerate(articles):
+        if i not in keep:
+            continue
+        if reposted_by.get(i):
+            article['reposted_by'] = reposted_by[i]
+        kept.append(article)
+
+    return kept, len(articles) - len(kept)
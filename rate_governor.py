@@ -0,0 +1,193 @@
+"""
+限流模块 - 按host对RSS请求做令牌桶限速 + 并发数限制，并根据后端健康状况自适应调整
+
+自建的 wechat2rss 容器只有一个实例，并发爬取时容易被压垮而开始超时：
+- 每个host一个令牌桶（每秒请求数）和一个并发上限
+- 每个调用窗口结束时检查平均延迟和错误率：
+  变差时并发和速率减半（乘性减），健康时逐步加一（加性增）
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+
+class HostGovernor:
+    """单个host的令牌桶 + 自适应并发限制（AIMD）"""
+    
+    def __init__(self, host, max_concurrency=8, rate=10.0, min_concurrency=1, min_rate=0.5,
+                 target_latency=3.0, max_error_rate=0.2, window=10):
+        """
+        Args:
+            host: 主机名（含端口）
+            max_concurrency: 并发上限（也是初始值）
+            rate: 每秒请求数上限（也是初始值）
+            min_concurrency / min_rate: 退避的下限
+            target_latency: 平均延迟超过此值（秒）视为后端过载
+            max_error_rate: 错误率超过此值视为后端过载
+            window: 每多少次请求评估一次
+        """
+        self.host = host
+        self.max_concurrency = max_concurrency
+        self.max_rate = rate
+        self.min_concurrency = min_concurrency
+        self.min_rate = min_rate
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+        self.window = window
+        
+        self.concurrency = max_concurrency
+        self.rate = rate
+        self.in_flight = 0
+        
+        self._cond = threading.Condition()
+        self._tokens = 1.0
+        self._last_refill = time.monotonic()
+        
+        # 当前评估窗口的统计
+        self._window_latency = 0.0
+        self._window_count = 0
+        self._window_errors = 0
+        
+        # 全程统计
+        self.total_requests = 0
+        self.total_errors = 0
+        self.backoffs = 0
+        self.ramp_ups = 0
+    
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(max(1.0, self.rate), self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+    
+    def acquire(self):
+        """阻塞直到拿到一个并发槽位和一个令牌"""
+        with self._cond:
+            while True:
+                self._refill()
+                if self.in_flight < self.concurrency and self._tokens >= 1:
+                    self._tokens -= 1
+                    self.in_flight += 1
+                    return
+                
+                if self.in_flight >= self.concurrency:
+                    wait = None  # 等待其他请求结束时的通知
+                else:
+                    wait = (1 - self._tokens) / self.rate
+                self._cond.wait(timeout=wait)
+    
+    def release(self, latency, ok):
+        """
+        归还槽位并记录本次请求结果
+        
+        Args:
+            latency: 请求耗时（秒）
+            ok: 是否成功
+        """
+        with self._cond:
+            self.in_flight -= 1
+            self.total_requests += 1
+            self._window_count += 1
+            self._window_latency += latency
+            if not ok:
+                self.total_errors += 1
+                self._window_errors += 1
+            
+            if self._window_count >= self.window:
+                self._adjust()
+            
+            self._cond.notify_all()
+    
+    def _adjust(self):
+        """按窗口内的平均延迟和错误率调整限制"""
+        avg_latency = self._window_latency / self._window_count
+        error_rate = self._window_errors / self._window_count
+        
+        if avg_latency > self.target_latency or error_rate > self.max_error_rate:
+            # 后端过载：乘性减
+            self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.backoffs += 1
+        elif self.concurrency < self.max_concurrency or self.rate < self.max_rate:
+            # 后端健康：加性增
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+            self.rate = min(self.max_rate, self.rate + 1)
+            self.ramp_ups += 1
+        
+        self._window_latency = 0.0
+        self._window_count = 0
+        self._window_errors = 0
+    
+    def snapshot(self):
+        """当前限制和统计"""
+        with self._cond:
+            return {
+                'host': self.host,
+                'concurrency': self.concurrency,
+                'max_concurrency': self.max_concurrency,
+                'rate': round(self.rate, 2),
+                'max_rate': self.max_rate,
+                'requests': self.total_requests,
+                'errors': self.total_errors,
+                'backoffs': self.backoffs,
+                'ramp_ups': self.ramp_ups,
+            }
+
+
+class RateGovernor:
+    """按host管理 HostGovernor"""
+    
+    def __init__(self, **host_options):
+        """
+        Args:
+            **host_options: 每个 HostGovernor 的参数（max_concurrency、rate 等）
+        """
+        self.host_options = host_options
+        self._hosts = {}
+        self._lock = threading.Lock()
+    
+    def for_host(self, url):
+        """获取url所在host的限流器"""
+        host = urlsplit(url).netloc
+        with self._lock:
+            governor = self._hosts.get(host)
+            if governor is None:
+                governor = HostGovernor(host, **self.host_options)
+                self._hosts[host] = governor
+            return governor
+    
+    @contextmanager
+    def slot(self, url):
+        """
+        在限流下执行一次请求
+        
+        用法:
+            with governor.slot(url) as outcome:
+                ...
+                outcome['ok'] = False  # 请求失败时标记
+        """
+        governor = self.for_host(url)
+        governor.acquire()
+        outcome = {'ok': True}
+        start = time.perf_counter()
+        try:
+            yield outcome
+        except Exception:
+            outcome['ok'] = False
+            raise
+        finally:
+            governor.release(time.perf_counter() - start, outcome['ok'])
+    
+    def snapshots(self):
+        """所有host的当前限制"""
+        with self._lock:
+            governors = list(self._hosts.values())
+        return [g.snapshot() for g in governors]
+    
+    def print_summary(self):
+        """打印各host的当前限制（用于运行摘要）"""
+        for s in self.snapshots():
+            print(f"   限流 {s['host']}: 并发 {s['concurrency']}/{s['max_concurrency']}, "
+                  f"速率 {s['rate']}/{s['max_rate']} 次/秒, 请求 {s['requests']} 次, 错误 {s['errors']} 次, "
+                  f"退避 {s['backoffs']} 次, 提升 {s['ramp_ups']} 次")
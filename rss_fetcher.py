@@ -2,49 +2,113 @@
 RSS爬取模块 - 从RSS源获取文章
 """
 
+import time
+import zlib
 import feedparser
 import requests
+import http_client
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from utils import parse_opml, is_within_last_24_hours, format_datetime
+from article import Article
+from utils import parse_opml, parse_pub_timestamp, is_timestamp_within_hours, format_datetime
+from feed_cache import FeedCache
+from feed_stream import extract_articles_streaming
+from rate_governor import RateGovernor
+from feed_archive import FeedArchive
+from feed_scheduler import FeedScheduler
 
 
-def fetch_rss_feed(rss_url, timeout=10):
+# fetch_rss_feed 在源未更新（HTTP 304）时的返回值
+NOT_MODIFIED = object()
+
+
+def download_rss_feed(rss_url, timeout=10, cache=None, bid=None, governor=None):
     """
-    获取单个RSS源的内容
+    下载单个RSS源的原始内容
     
     Args:
         rss_url: RSS源地址
         timeout: 超时时间（秒）
+        cache: FeedCache对象，提供时发送条件请求（If-None-Match / If-Modified-Since）
+        bid: 公众号ID（缓存的键）
+        governor: RateGovernor对象（可选），按host限制请求速率和并发
     
     Returns:
-        feedparser解析后的对象
+        (RSS原始内容, 校验信息)：内容为bytes，源未更新时为 NOT_MODIFIED，失败时为None；
+        校验信息为 {"etag", "last_modified"}（没有时为None），由调用方在解析成功后
+        用 cache.save_validators 保存，解析失败的内容不能让下次的条件请求返回304
     """
+    use_cache = cache is not None and bid is not None
+    
     try:
-        # 使用requests先获取内容（更好的错误处理）
-        response = requests.get(rss_url, timeout=timeout)
+        headers = cache.conditional_headers(bid) if use_cache else {}
+        if governor is not None:
+            with governor.slot(rss_url) as outcome:
+                response = http_client.get(rss_url, timeout=timeout, headers=headers)
+                outcome['ok'] = response.status_code < 500 and response.status_code != 429
+        else:
+            response = http_client.get(rss_url, timeout=timeout, headers=headers)
+        
+        # 源没有更新，跳过下载和解析
+        if response.status_code == 304:
+            return NOT_MODIFIED, None
+        
         response.raise_for_status()
         
-        # 使用feedparser解析
-        feed = feedparser.parse(response.content)
-        return feed
+        validators = None
+        if response.headers.get('ETag') or response.headers.get('Last-Modified'):
+            validators = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }
+        
+        return response.content, validators
         
     except requests.RequestException as e:
         print(f"❌ 获取RSS失败: {rss_url}")
         print(f"   错误: {e}")
-        return None
+        return None, None
+
+
+def fetch_rss_feed(rss_url, timeout=10, cache=None, bid=None):
+    """
+    获取单个RSS源的内容
+    
+    Args:
+        rss_url: RSS源地址
+        timeout: 超时时间（秒）
+        cache: FeedCache对象，提供时发送条件请求（If-None-Match / If-Modified-Since）
+        bid: 公众号ID（缓存的键）
+    
+    Returns:
+        feedparser解析后的对象；源未更新时返回 NOT_MODIFIED；失败返回None
+    """
+    content, validators = download_rss_feed(rss_url, timeout, cache, bid)
+    if content is None or content is NOT_MODIFIED:
+        return content
+    
+    try:
+        # 使用feedparser解析
+        feed = feedparser.parse(content)
+        if validators and cache is not None and bid is not None:
+            cache.save_validators(bid, validators)
+        return feed
+        
     except Exception as e:
         print(f"❌ 解析RSS失败: {rss_url}")
         print(f"   错误: {e}")
         return None
 
 
-def extract_articles_from_feed(feed, account_name):
+def extract_articles_from_feed(feed, account_name, high_water_mark=None):
     """
     从feed对象中提取文章信息
     
     Args:
         feed: feedparser解析后的对象
         account_name: 公众号名称
+        high_water_mark: HighWaterMark对象（可选）。提供时只提取没见过的文章，
+            遇到已处理过的文章即停止，并把新文章记入高水位线
     
     Returns:
         文章列表
@@ -59,9 +123,15 @@ def extract_articles_from_feed(feed, account_name):
             # 提取基本信息
             title = entry.get('title', '').strip()
             link = entry.get('link', '')
+            guid = entry.get('id', '') or link
             
-            # 提取发布时间
+            # 提取发布时间（只解析一次，后续过滤和排序都用时间戳）
             pub_date_str = entry.get('published', '') or entry.get('updated', '')
+            published_ts = parse_pub_timestamp(pub_date_str)
+            
+            # 增量爬取：条目从新到旧排列，遇到已知文章后面的都处理过了
+            if high_water_mark is not None and high_water_mark.is_known(guid, link, published_ts):
+                break
             
             # 提取内容（尝试多个可能的字段）
             content_html = ''
@@ -76,18 +146,23 @@ def extract_articles_from_feed(feed, account_name):
             summary = entry.get('summary', '')
             
             # 构造文章对象
-            article = {
-                'title': title,
-                'author': account_name,
-                'url': link,
-                'publish_time_raw': pub_date_str,
-                'publish_time': format_datetime(pub_date_str) if pub_date_str else '',
-                'content_html': content_html,
-                'summary': summary
-            }
+            article = Article(
+                title=title,
+                author=account_name,
+                url=link,
+                guid=guid,
+                publish_time_raw=pub_date_str,
+                publish_time=format_datetime(pub_date_str) if pub_date_str else '',
+                publish_ts=published_ts,
+                content_html=content_html,
+                summary=summary
+            )
             
             articles.append(article)
             
+            if high_water_mark is not None:
+                high_water_mark.mark_seen(guid, link, published_ts)
+            
         except Exception as e:
             print(f"⚠️  解析文章失败: {entry.get('title', 'Unknown')}")
             print(f"   错误: {e}")
@@ -96,67 +171,333 @@ def extract_articles_from_feed(feed, account_name):
     return articles
 
 
-def fetch_rss_articles(opml_file='wechat2rss_subscriptions.opml', filter_24h=True):
+def fetch_account_articles(account, filter_24h=True, cache=None, incremental=False, parser='feedparser',
+                           governor=None, archive=None, replay=False, now_ts=None, scheduler=None):
     """
-    从OPML中的所有RSS源获取文章
+    爬取单个公众号的文章（在线程池中执行）
     
     Args:
-        opml_file: OPML文件路径
-        filter_24h: 是否只获取24小时内的文章
+        account: 公众号信息 {"name", "rss_url", "bid"}
+        filter_24h: 是否只保留24小时内的文章
+        cache: FeedCache对象（可选）
+        incremental: 是否按高水位线增量爬取（需要cache）
+        parser: 解析方式，"feedparser"（完整解析）或 "stream"（流式解析，遇到窗口外文章即停止）
+        governor: RateGovernor对象（可选）
+        archive: FeedArchive对象（可选）。下载的原文会存入归档；回放时从归档读取原文
+        replay: 是否回放模式（从 archive 读取 account["sha256"] 对应的原文，不访问网络）
+        now_ts: 24小时过滤使用的"当前时间"（默认取当前时间，回放时为归档的抓取时间）
+        scheduler: FeedScheduler对象（可选），成功轮询后记录发布历史
     
     Returns:
-        所有文章列表
+        爬取结果 {"account", "ok", "not_modified", "articles", "total", "latency"}
+    """
+    start = time.perf_counter()
+    
+    # 获取RSS内容
+    validators = None
+    if replay:
+        # 归档的原文缺失或损坏时与网络错误一样，只算这个源失败
+        try:
+            content = archive.load(account['sha256'])
+        except (OSError, EOFError, zlib.error) as e:
+            print(f"❌ 读取归档的RSS原文失败: {account['name']} ({account['sha256']})")
+            print(f"   错误: {e}")
+            content = None
+    else:
+        content, validators = download_rss_feed(
+            account['rss_url'], cache=cache, bid=account.get('bid'), governor=governor
+        )
+        if archive is not None:
+            if content is NOT_MODIFIED:
+                archive.store_not_modified(account)
+            elif content:
+                archive.store(account, content)
+    not_modified = content is NOT_MODIFIED
+    
+    result = {
+        'account': account,
+        'ok': content is not None,
+        'not_modified': not_modified,
+        'articles': [],
+        'total': 0,
+        'latency': 0.0,
+    }
+    
+    if content and not not_modified:
+        high_water_mark = None
+        if incremental and cache is not None:
+            high_water_mark = cache.get_high_water_mark(account['bid'])
+        
+        try:
+            if parser == 'stream':
+                # 流式解析时已经按时间窗口过滤；自适应轮询需要所有新条目的发布时间
+                publish_times = [] if scheduler is not None else None
+                articles, result['total'] = extract_articles_streaming(
+                    content, account['name'], filter_24h, high_water_mark, now_ts, publish_times
+                )
+            else:
+                feed = feedparser.parse(content)
+                # feedparser 不会因为格式错误抛异常，没能解析出任何条目时按解析失败处理
+                if feed.bozo and not feed.entries:
+                    raise feed.bozo_exception
+                articles = extract_articles_from_feed(feed, account['name'], high_water_mark)
+                result['total'] = len(articles)
+                
+                if scheduler is not None:
+                    scheduler.record_poll(account['bid'], [a['publish_ts'] for a in articles])
+                
+                # 过滤24小时内的文章
+                if filter_24h:
+                    articles = [
+                        article for article in articles
+                        if is_timestamp_within_hours(article['publish_ts'], hours=24, now_ts=now_ts)
+                    ]
+        except Exception as e:
+            print(f"❌ 解析RSS失败: {account['rss_url']}")
+            print(f"   错误: {e}")
+            result['ok'] = False
+            articles = []
+            high_water_mark = None
+        
+        if high_water_mark is not None and high_water_mark.new_count:
+            cache.save_high_water_mark(account['bid'], high_water_mark)
+        
+        # 解析成功后才保存校验信息，否则下次会收到304而跳过这份没处理成功的内容
+        if validators and result['ok'] and cache is not None:
+            cache.save_validators(account['bid'], validators)
+        
+        if scheduler is not None and parser == 'stream' and result['ok']:
+            scheduler.record_poll(account['bid'], publish_times)
+        
+        result['articles'] = articles
+    elif not_modified and scheduler is not None:
+        scheduler.record_poll(account['bid'], [])
+    
+    result['latency'] = time.perf_counter() - start
+    return result
+
+
+def iter_account_results(opml_file='wechat2rss_subscriptions.opml', filter_24h=True, max_workers=8,
+                         cache_file=None, incremental=False, parser='feedparser', accounts=None,
+                         rate_limit=None, archive_dir=None, replay=None, schedule=None, run_id=None,
+                         max_pending=None):
+    """
+    线程池并发爬取各公众号，按完成顺序逐个产出结果（fetch_rss_articles 和流式清洗共用）
+    
+    全部结果产出后保存RSS源缓存和归档清单，并打印爬取统计
+    
+    Args:
+        max_pending: 最多同时在途（正在爬取，或已爬完但还没被取走）的公众号数，None表示一次全部提交。
+            流式处理时用它做背压：下游处理不过来就暂停提交新的爬取，内存中的原文只和在途的公众号数有关
+        其余参数同 fetch_rss_articles
+    
+    Yields:
+        (公众号下标, fetch_account_articles 的结果)，下标是公众号在本次爬取列表中的位置
     """
     print("=" * 60)
     print("🚀 开始爬取RSS文章")
     print("=" * 60)
     
+    now_ts = None
+    archive = FeedArchive(archive_dir or 'data/archive', run_id) if (archive_dir or replay) else None
+    
     # 1. 解析OPML获取公众号列表
-    print("\n📋 解析OPML文件...")
-    accounts = parse_opml(opml_file)
-    print(f"✅ 找到 {len(accounts)} 个公众号")
+    if replay:
+        manifest = archive.load_manifest(replay)
+        now_ts = manifest['fetched_at']
+        accounts = [dict(feed, bid=bid) for bid, feed in manifest['feeds'].items()]
+        cache_file, incremental, rate_limit, schedule = None, False, None, None
+        print(f"✅ 回放 {len(accounts)} 个公众号的归档RSS")
+    elif accounts is None:
+        print("\n📋 解析OPML文件...")
+        accounts = parse_opml(opml_file)
+        print(f"✅ 找到 {len(accounts)} 个公众号")
+    else:
+        print(f"\n📋 爬取指定的 {len(accounts)} 个公众号")
     
-    # 2. 遍历每个公众号，获取文章
-    all_articles = []
+    cache = FeedCache(cache_file, run_id) if cache_file else None
+    governor = RateGovernor(**rate_limit) if rate_limit is not None else None
     
-    for i, account in enumerate(accounts, 1):
-        print(f"\n[{i}/{len(accounts)}] 正在爬取: {account['name']}")
-        print(f"   RSS: {account['rss_url']}")
-        
-        # 获取RSS内容
-        feed = fetch_rss_feed(account['rss_url'])
-        
-        if not feed:
-            print(f"   ⚠️  跳过")
-            continue
+    # 归档清单按OPML顺序记录所有公众号（包括下面按发文频率跳过的）
+    manifest_order = [a['bid'] for a in accounts]
+    
+    scheduler = None
+    if schedule is not None and cache is not None:
+        scheduler = FeedScheduler(cache, **schedule)
+        accounts, skipped = scheduler.select_due(accounts)
+        if skipped:
+            print(f"⏭️  按发文频率跳过 {len(skipped)} 个未到轮询时间的公众号，本次轮询 {len(accounts)} 个")
+            if archive is not None:
+                for account in skipped:
+                    archive.store_skipped(account)
+    
+    # 2. 并发获取每个公众号的文章
+    max_workers = max(1, min(max_workers, len(accounts) or 1))
+    print(f"\n⚡ 并发爬取（最大并发数: {max_workers}）...")
+    
+    run_start = time.perf_counter()
+    summaries = []
+    article_count = 0
+    
+    fetch_options = {
+        'filter_24h': filter_24h,
+        'cache': cache,
+        'incremental': incremental,
+        'parser': parser,
+        'governor': governor,
+        'archive': archive,
+        'replay': bool(replay),
+        'now_ts': now_ts,
+        'scheduler': scheduler,
+    }
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+        next_index = 0
         
-        # 提取文章
-        articles = extract_articles_from_feed(feed, account['name'])
-        print(f"   📄 获取到 {len(articles)} 篇文章")
+        def submit_more():
+            nonlocal next_index
+            while next_index < len(accounts) and (max_pending is None or len(pending) < max_pending):
+                future = executor.submit(fetch_account_articles, accounts[next_index], **fetch_options)
+                pending[future] = next_index
+                next_index += 1
         
-        # 过滤24小时内的文章
-        if filter_24h:
-            filtered_articles = []
-            for article in articles:
-                if article['publish_time_raw'] and is_within_last_24_hours(article['publish_time_raw']):
-                    filtered_articles.append(article)
+        submit_more()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                i = pending.pop(future)
+                account = accounts[i]
+                result = future.result()
+                
+                print(f"\n[{len(summaries) + 1}/{len(accounts)}] {account['name']} ({result['latency']:.2f}s)")
+                print(f"   RSS: {account['rss_url']}")
+                if not result['ok']:
+                    print(f"   ⚠️  跳过")
+                elif result['not_modified']:
+                    print(f"   💤 未更新（304），跳过解析")
+                else:
+                    print(f"   📄 {'解析' if parser == 'stream' else '获取到'} {result['total']} 篇{'新' if incremental and cache else ''}文章")
+                    if filter_24h:
+                        print(f"   ⏰ 24小时内: {len(result['articles'])} 篇")
+                
+                # 统计只需要耗时和状态，不保留文章
+                summaries.append({key: value for key, value in result.items() if key != 'articles'})
+                article_count += len(result['articles'])
+                yield i, result
             
-            print(f"   ⏰ 24小时内: {len(filtered_articles)} 篇")
-            all_articles.extend(filtered_articles)
+            submit_more()
+    
+    total_latency = time.perf_counter() - run_start
+    
+    if cache:
+        cache.save()
+    if archive and not replay:
+        manifest_path = archive.save_manifest(manifest_order)
+        if manifest_path:
+            print(f"\n📼 RSS原文已归档: {manifest_path}")
         else:
-            all_articles.extend(articles)
+            print("\n📼 本次没有可归档的RSS原文，不保存归档清单")
     
     # 3. 统计
     print("\n" + "=" * 60)
     print(f"✅ 爬取完成！")
-    print(f"   总文章数: {len(all_articles)}")
+    print(f"   总文章数: {article_count}")
+    print_fetch_latency_summary(summaries, total_latency)
+    http_client.print_stats()
+    if governor:
+        governor.print_summary()
+
+
+def iter_rss_articles(max_pending=16, **options):
+    """
+    流式爬取：逐篇产出文章（按公众号完成的顺序，不排序）
+    
+    Args:
+        max_pending: 最多同时在途的公众号数，见 iter_account_results
+        options: 同 fetch_rss_articles
+    
+    Yields:
+        Article
+    """
+    for _, result in iter_account_results(max_pending=max_pending, **options):
+        yield from result['articles']
+
+
+def fetch_rss_articles(opml_file='wechat2rss_subscriptions.opml', filter_24h=True, max_workers=8,
+                       cache_file=None, incremental=False, parser='feedparser', accounts=None,
+                       rate_limit=None, archive_dir=None, replay=None, schedule=None, run_id=None):
+    """
+    从OPML中的所有RSS源获取文章（线程池并发爬取）
+    
+    Args:
+        opml_file: OPML文件路径
+        filter_24h: 是否只获取24小时内的文章
+        max_workers: 最大并发请求数（1表示逐个串行爬取）
+        cache_file: RSS源缓存文件路径（ETag / Last-Modified / 高水位线），None表示不使用缓存
+        incremental: 是否增量爬取（只返回之前没处理过的文章，需要cache_file）
+        parser: RSS解析方式，"feedparser" 或 "stream"（流式解析，见 feed_stream.py）
+        accounts: 公众号列表（可选）。提供时不再解析OPML，分片执行时只爬取本分片的公众号
+        rate_limit: 按host自适应限流的参数（见 rate_governor.HostGovernor），None表示不限流
+        archive_dir: RSS原文归档目录（见 feed_archive.py），None表示不归档
+        replay: 回放的归档清单（"latest"、日期如"20251228"或清单路径）。
+            回放时从 archive_dir 读取原文，不访问网络，也不读写RSS源缓存
+        schedule: 自适应轮询参数（见 feed_scheduler.FeedScheduler），只轮询到期的源；
+            None表示每次都轮询所有源（需要cache_file）
+        run_id: 本次运行的标识（归档清单的文件名、暂存的RSS源状态的标记），分片执行时各分片相同，
+            见 feed_archive.FeedArchive 和 feed_cache.FeedCache
+    
+    Returns:
+        所有文章列表（Article）
+    """
+    results = dict(iter_account_results(
+        opml_file=opml_file, filter_24h=filter_24h, max_workers=max_workers, cache_file=cache_file,
+        incremental=incremental, parser=parser, accounts=accounts, rate_limit=rate_limit,
+        archive_dir=archive_dir, replay=replay, schedule=schedule, run_id=run_id
+    ))
+    
+    # 按OPML顺序合并，保证结果与串行爬取一致
+    all_articles = []
+    for i in sorted(results):
+        all_articles.extend(results[i]['articles'])
     
     # 按时间排序（最新的在前）
-    all_articles.sort(key=lambda x: x['publish_time_raw'], reverse=True)
+    all_articles.sort(key=lambda x: x['publish_ts'] or 0, reverse=True)
     
     return all_articles
 
 
+def print_fetch_latency_summary(results, total_latency, top_n=10):
+    """
+    打印爬取耗时统计（总耗时 + 最慢的若干个公众号）
+    
+    每个源的耗时在爬取进度中已逐条打印，这里只汇总
+    
+    Args:
+        results: fetch_account_articles 的结果列表
+        total_latency: 总耗时（秒）
+        top_n: 列出最慢的源数量
+    """
+    if not results:
+        return
+    
+    latencies = [r['latency'] for r in results]
+    failed = sum(1 for r in results if not r['ok'])
+    not_modified = sum(1 for r in results if r.get('not_modified'))
+    
+    print(f"   总耗时: {total_latency:.2f}s（各源耗时合计 {sum(latencies):.2f}s）")
+    print(f"   单源耗时: 平均 {sum(latencies) / len(latencies):.2f}s, 最慢 {max(latencies):.2f}s")
+    if not_modified:
+        print(f"   未更新源数: {not_modified}（304）")
+    if failed:
+        print(f"   失败源数: {failed}")
+    
+    print(f"   最慢的{min(top_n, len(results))}个源:")
+    for r in sorted(results, key=lambda r: r['latency'], reverse=True)[:top_n]:
+        status = "" if r['ok'] else " ❌"
+        print(f"     • {r['account']['name']}: {r['latency']:.2f}s{status}")
+
+
 # 测试代码
 if __name__ == "__main__":
     # 测试爬取
@@ -0,0 +1,71 @@
+"""
+运行参数模块 - 从config读取爬取和清洗参数，运行成功后提交RSS源状态
+
+main.py（单进程）和 sharding.py（分片执行）共用，新增的参数只需要加在这里，两种执行方式不会不一致
+"""
+
+from datetime import datetime
+
+import config
+from feed_cache import FeedCache
+
+
+def new_run_id():
+    """本次运行的标识（运行开始的时间，与归档清单的文件名格式相同）"""
+    return datetime.now().strftime("%Y%m%d_%H%M%S")
+
+
+def get_fetch_options(replay=None, run_id=None):
+    """
+    爬取参数（透传给 rss_fetcher.fetch_rss_articles）
+
+    Args:
+        replay: 回放的归档清单（None表示正常爬取）
+        run_id: 本次运行的标识，见 new_run_id
+    """
+    return {
+        'opml_file': config.OPML_FILE,
+        'filter_24h': True,  # 只获取24小时内的文章
+        'max_workers': getattr(config, 'FETCH_MAX_WORKERS', 8),
+        'cache_file': getattr(config, 'FEED_CACHE_FILE', None),
+        'incremental': getattr(config, 'INCREMENTAL_FETCH', False),
+        'parser': getattr(config, 'FEED_PARSER', 'feedparser'),
+        'rate_limit': getattr(config, 'FETCH_RATE_LIMIT', None),
+        'archive_dir': getattr(config, 'FEED_ARCHIVE_DIR', None),
+        'replay': replay,
+        'schedule': getattr(config, 'FETCH_SCHEDULE', None),
+        'run_id': run_id,
+    }
+
+
+def get_clean_options():
+    """清洗参数（透传给 data_cleaner.clean_articles_v2）"""
+    return {
+        'min_word_count': getattr(config, 'MIN_WORD_COUNT', 500),
+        'workers': getattr(config, 'CLEAN_WORKERS', 1),
+        'backend': getattr(config, 'HTML_BACKEND', 'soup'),
+        'cache_file': getattr(config, 'CLEAN_CACHE_FILE', None),
+        'cache_max_entries': getattr(config, 'CLEAN_CACHE_MAX_ENTRIES', 50000),
+        'ad_keywords_extra': getattr(config, 'AD_KEYWORDS_EXTRA', None),
+        'ad_rules_dir': getattr(config, 'AD_RULES_DIR', None),
+        'near_dup': getattr(config, 'NEAR_DUP', None),
+        'boilerplate': getattr(config, 'BOILERPLATE', None),
+    }
+
+
+def commit_feed_state(run_id, replay=None):
+    """
+    本次运行成功后提交爬取时暂存的RSS源状态（高水位线、ETag、轮询时间）
+
+    在此之前失败的运行不会推进高水位线，下次运行会重新爬取并处理这些文章
+
+    Args:
+        run_id: 本次运行的标识（与爬取时传入的相同）
+        replay: 回放的归档清单（回放不更新RSS源状态）
+    """
+    cache_file = getattr(config, 'FEED_CACHE_FILE', None)
+    if not cache_file or replay:
+        return
+    committed = FeedCache(cache_file).commit_pending(run_id)
+    if committed:
+        print(f"💾 已提交 {committed} 个RSS源的增量状态")
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+分片执行模块 - 按公众号bid的稳定哈希把账号分成N片，每片独立完成 爬取+清洗，最后合并
+
+本地多进程:
+    python sharding.py local --shards 4
+
+多节点（每个节点跑一个分片，结果写到共享目录，最后由协调节点合并）:
+    python sharding.py run --shards 4 --index 0 --output data/shards --run-id 20251228_120000
+    python sharding.py run --shards 4 --index 1 --output data/shards --run-id 20251228_120000
+    ...
+    python sharding.py merge --shards 4 --output data/shards --run-id 20251228_120000
+
+合并结果保存后才提交各分片暂存的RSS源状态（高水位线等，见 feed_cache.py），merge 需要传入同一个 --run-id
+"""
+
+import argparse
+import hashlib
+import json
+from multiprocessing import Pool
+from pathlib import Path
+
+import config
+from article import Article, json_default
+from utils import parse_opml
+from rss_fetcher import fetch_rss_articles
+from run_options import get_fetch_options, get_clean_options, new_run_id, commit_feed_state
+from data_cleaner import clean_articles_v2, deduplicate_articles, deduplicate_reposts
+
+
+def shard_of(bid, num_shards):
+    """
+    计算公众号所属的分片（稳定哈希，与进程、机器无关）
+    
+    Args:
+        bid: 公众号ID
+        num_shards: 分片总数
+    
+    Returns:
+        分片编号 [0, num_shards)
+    """
+    digest = hashlib.md5(str(bid).encode('utf-8')).hexdigest()
+    return int(digest[:8], 16) % num_shards
+
+
+def partition_accounts(accounts, num_shards):
+    """
+    把公众号列表按bid分片
+    
+    Returns:
+        长度为num_shards的列表，每个元素是该分片的公众号列表（保持OPML中的顺序）
+    """
+    shards = [[] for _ in range(num_shards)]
+    for account in accounts:
+        shards[shard_of(account['bid'], num_shards)].append(account)
+    return shards
+
+
+def shard_output_path(output_dir, shard_index, num_shards):
+    """分片结果文件路径"""
+    return Path(output_dir) / f"shard_{shard_index}_of_{num_shards}.json"
+
+
+def run_shard(shard_index, num_shards, opml_file=None, output_dir=None, min_word_count=None, fetch_options=None,
+              clean_workers=None):
+    """
+    执行一个分片：爬取并清洗本分片的公众号
+    
+    Args:
+        shard_index: 分片编号
+        num_shards: 分片总数
+        opml_file: OPML文件路径（默认 config.OPML_FILE）
+        output_dir: 结果输出目录（可选，多节点执行时用于交给协调节点合并）
+        min_word_count: 最小字数（默认 config.MIN_WORD_COUNT）
+        fetch_options: 透传给 fetch_rss_articles 的参数（默认从config读取，见 run_options.get_fetch_options）
+        clean_workers: 清洗的进程数（默认 config.CLEAN_WORKERS）
+    
+    Returns:
+        分片结果 {"shard", "num_shards", "account_count", "raw_count", "articles"}
+    """
+    opml_file = opml_file or config.OPML_FILE
+    if min_word_count is None:
+        min_word_count = getattr(config, 'MIN_WORD_COUNT', 500)
+    if fetch_options is None:
+        fetch_options = get_fetch_options()
+    if clean_workers is None:
+        clean_workers = getattr(config, 'CLEAN_WORKERS', 1)
+    
+    accounts = partition_accounts(parse_opml(opml_file), num_shards)[shard_index]
+    print(f"\n🧩 分片 {shard_index + 1}/{num_shards}: {len(accounts)} 个公众号")
+    
+    raw_articles = fetch_rss_articles(accounts=accounts, **fetch_options) if accounts else []
+    
+    clean_options = get_clean_options()
+    # 转载可能分散在不同分片，近似去重在合并后统一做（见 merge_shard_results）
+    clean_options.update(min_word_count=min_word_count, workers=clean_workers, near_dup=None)
+    articles = clean_articles_v2(raw_articles, **clean_options) if raw_articles else []
+    
+    result = {
+        'shard': shard_index,
+        'num_shards': num_shards,
+        'account_count': len(accounts),
+        'raw_count': len(raw_articles),
+        'articles': articles,
+    }
+    
+    if output_dir:
+        filepath = shard_output_path(output_dir, shard_index, num_shards)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, default=json_default)
+        print(f"✅ 分片结果已保存到: {filepath}")
+    
+    return result
+
+
+def _run_shard_worker(args):
+    """进程池入口（需要是模块级函数才能被pickle）"""
+    return run_shard(*args)
+
+
+def merge_shard_results(results):
+    """
+    合并各分片的清洗结果
+    
+    分片之间可能有同一篇文章（不同公众号转载同一链接），合并后再全局去重一次（配置了 NEAR_DUP 时还做近似去重），
+    并按发布时间排序（最新的在前）
+    
+    Args:
+        results: run_shard 返回的结果列表
+    
+    Returns:
+        (原始文章总数, 合并后的文章列表)
+    """
+    results = sorted(results, key=lambda r: r['shard'])
+    raw_count = sum(r['raw_count'] for r in results)
+    
+    articles = []
+    for result in results:
+        articles.extend(result['articles'])
+    
+    articles.sort(key=lambda x: x.get('publish_ts') or 0, reverse=True)
+    articles = deduplicate_articles(articles)
+    
+    # 转载可能分散在不同分片，近似去重放在合并之后统一做
+    near_dup = getattr(config, 'NEAR_DUP', None)
+    if near_dup:
+        articles = deduplicate_reposts(articles, near_dup)
+    
+    return raw_count, articles
+
+
+def load_shard_results(output_dir, num_shards):
+    """
+    读取各分片的结果文件
+    
+    Raises:
+        FileNotFoundError: 有分片还没有输出结果
+    """
+    results = []
+    missing = []
+    for i in range(num_shards):
+        filepath = shard_output_path(output_dir, i, num_shards)
+        if not filepath.exists():
+            missing.append(str(filepath))
+            continue
+        with open(filepath, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+        result['articles'] = [Article.from_dict(article) for article in result['articles']]
+        results.append(result)
+    
+    if missing:
+        raise FileNotFoundError(f"缺少分片结果: {', '.join(missing)}")
+    
+    return results
+
+
+def run_sharded(num_shards, processes=None, opml_file=None, min_word_count=None, output_dir=None, run_id=None):
+    """
+    本地多进程分片执行，返回值可直接交给 analyze_articles
+    
+    Args:
+        num_shards: 分片数
+        processes: 进程数（默认等于分片数）
+        opml_file: OPML文件路径（默认 config.OPML_FILE）
+        min_word_count: 最小字数（默认 config.MIN_WORD_COUNT）
+        output_dir: 分片结果输出目录（可选）
+        run_id: 本次运行的标识（默认取当前时间，见 run_options.new_run_id）
+    
+    Returns:
+        (原始文章总数, 合并后的清洗结果)
+    """
+    processes = processes or num_shards
+    # 各分片使用同一个运行标识，归档清单合并成一份
+    fetch_options = get_fetch_options(run_id=run_id or new_run_id())
+    
+    print("=" * 60)
+    print(f"🧩 分片执行: {num_shards} 个分片, {processes} 个进程")
+    print("=" * 60)
+    
+    # 进程池的工作进程不能再创建子进程，分片内串行清洗
+    tasks = [(i, num_shards, opml_file, output_dir, min_word_count, fetch_options, 1) for i in range(num_shards)]
+    with Pool(processes=processes) as pool:
+        results = pool.map(_run_shard_worker, tasks)
+    
+    raw_count, articles = merge_shard_results(results)
+    
+    print("\n" + "=" * 60)
+    print(f"✅ 分片合并完成: 原始 {raw_count} 篇, 清洗后 {len(articles)} 篇")
+    for result in sorted(results, key=lambda r: r['shard']):
+        print(f"   • 分片 {result['shard']}: {result['account_count']} 个公众号, "
+              f"原始 {result['raw_count']} 篇, 清洗后 {len(result['articles'])} 篇")
+    
+    return raw_count, articles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按bid分片执行 爬取+清洗")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    local_parser = subparsers.add_parser('local', help="本地多进程执行所有分片并合并")
+    local_parser.add_argument('--shards', type=int, required=True, help="分片数")
+    local_parser.add_argument('--processes', type=int, help="进程数（默认等于分片数）")
+    local_parser.add_argument('--output', default='data/shards', help="输出目录")
+    
+    run_parser = subparsers.add_parser('run', help="只执行一个分片（多节点部署）")
+    run_parser.add_argument('--shards', type=int, required=True, help="分片数")
+    run_parser.add_argument('--index', type=int, required=True, help="分片编号（从0开始）")
+    run_parser.add_argument('--output', default='data/shards', help="输出目录")
+    run_parser.add_argument('--run-id', help="本次运行的标识（各节点传入相同的值，RSS原文归档合并到同一个清单）")
+    
+    merge_parser = subparsers.add_parser('merge', help="合并各分片的结果")
+    merge_parser.add_argument('--shards', type=int, required=True, help="分片数")
+    merge_parser.add_argument('--output', default='data/shards', help="分片结果目录")
+    merge_parser.add_argument('--run-id', help="各分片使用的运行标识（提供时合并后提交这次运行暂存的RSS源状态）")
+    
+    args = parser.parse_args()
+    
+    if args.command == 'run':
+        run_shard(args.index, args.shards, output_dir=args.output,
+                  fetch_options=get_fetch_options(run_id=args.run_id or new_run_id()))
+        return
+    
+    if args.command == 'local':
+        args.run_id = new_run_id()
+        raw_count, articles = run_sharded(args.shards, args.processes, output_dir=args.output, run_id=args.run_id)
+    else:
+        raw_count, articles = merge_shard_results(load_shard_results(args.output, args.shards))
+        print(f"✅ 合并完成: 原始 {raw_count} 篇, 清洗后 {len(articles)} 篇")
+    
+    filepath = Path(args.output) / "merged_articles.json"
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(articles, f, ensure_ascii=False, indent=2, default=json_default)
+    print(f"✅ 合并结果已保存到: {filepath}")
+    
+    if args.run_id:
+        commit_feed_state(args.run_id)
+
+
+if __name__ == "__main__":
+    main()
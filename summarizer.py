@@ -0,0 +1,267 @@
+"""
+摘要模块 - 在本地对文章正文做抽取式摘要（TextRank），缩短发给AI的内容
+
+只取正文前2000字会丢掉文章后半部分的信息；抽取式摘要从全文中选出最有代表性的句子，
+按原文顺序拼成指定长度的摘要：
+- 句子：按段落和句末标点切分 content_markdown，去掉图片、链接地址、代码块和表格
+- 相似度：两个句子共有的字二元组（bigram）数 / (log(句长1) + log(句长2))，
+  通过倒排索引只计算有共同二元组的句子对；出现在一半以上句子中的二元组当作停用词跳过
+- 排序：在相似度图上迭代 PageRank，与标题重合多的句子有更高的初始权重
+- 选句：按得分从高到低选句子直到达到目标token数，跳过与已选句子大部分重合的句子
+- 缓存：摘要按 (参数 + 正文) 的哈希缓存在SQLite中，正文不变就不再重新计算
+"""
+
+import hashlib
+import math
+import re
+from collections import defaultdict
+
+from ai_analyzer import estimate_tokens
+from keyed_store import KeyedStore
+
+
+# 摘要算法的版本：修改切句、打分或选句的逻辑后加1，旧的摘要缓存自动失效
+SUMMARIZER_VERSION = 1
+
+DAMPING = 0.85
+MAX_ITERATIONS = 30
+TOLERANCE = 1e-4
+MIN_SENTENCE_CHARS = 6      # 去掉标点后少于这个长度的句子不参与排序
+MAX_SENTENCES = 400         # 只对前这么多句排序，避免超长文章拖慢整批
+COMMON_BIGRAM_RATIO = 0.5   # 出现在超过这个比例的句子中的二元组不计入相似度
+REDUNDANCY_RATIO = 0.7      # 与已选句子重合超过这个比例的句子不再选
+
+_FENCE_RE = re.compile(r'^```.*?^```[^\n]*$', re.S | re.M)
+_IMAGE_RE = re.compile(r'!\[[^\]]*\]\([^)]*\)')
+_LINK_RE = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+_LINE_PREFIX_RE = re.compile(r'^\s*(?:#{1,6}\s+|>\s*|[-*+]\s+|\d+[.)]\s+)+')
+_EMPHASIS_RE = re.compile(r'(\*\*|__|\*|`)')
+_SENTENCE_RE = re.compile(r'[^。！？!?；;…]+(?:[。！？!?；;…]+[”’"」』）)]*|$)')
+_NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def split_sentences(markdown):
+    """
+    把Markdown正文切成句子
+
+    Returns:
+        [(段落序号, 句子)]（句子保留原文的标点，去掉了Markdown标记）
+    """
+    text = _FENCE_RE.sub('', markdown or '')
+    text = _IMAGE_RE.sub('', text)
+    text = _LINK_RE.sub(r'\1', text)
+
+    sentences = []
+    for paragraph, line in enumerate(text.split('\n')):
+        line = line.strip()
+        if not line or line.startswith('|'):
+            continue
+        line = _EMPHASIS_RE.sub('', _LINE_PREFIX_RE.sub('', line)).strip()
+        for match in _SENTENCE_RE.finditer(line):
+            sentence = match.group().strip()
+            if sentence:
+                sentences.append((paragraph, sentence))
+    return sentences
+
+
+def sentence_bigrams(sentence):
+    """句子的字二元组集合（去掉标点和空白，英文转小写）"""
+    text = _NON_WORD_RE.sub('', sentence).lower()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def similarity_graph(bigram_sets):
+    """
+    句子相似度图（只包含有共同二元组的句子对）
+
+    Returns:
+        每个句子的邻居列表 [[(邻居序号, 权重)]]
+    """
+    count = len(bigram_sets)
+    postings = defaultdict(list)
+    for index, bigrams in enumerate(bigram_sets):
+        for bigram in bigrams:
+            postings[bigram].append(index)
+
+    # 倒排索引统计共有的二元组数：键为 i * count + j（i < j）
+    common_limit = max(2, COMMON_BIGRAM_RATIO * count)
+    overlaps = defaultdict(int)
+    for indexes in postings.values():
+        if len(indexes) < 2 or len(indexes) > common_limit:
+            continue
+        for position, i in enumerate(indexes):
+            base = i * count
+            for j in indexes[position + 1:]:
+                overlaps[base + j] += 1
+
+    log_lengths = [math.log(1 + len(bigrams)) for bigrams in bigram_sets]
+    neighbors = [[] for _ in range(count)]
+    for pair, overlap in overlaps.items():
+        i, j = divmod(pair, count)
+        weight = overlap / (log_lengths[i] + log_lengths[j])
+        neighbors[i].append((j, weight))
+        neighbors[j].append((i, weight))
+    return neighbors
+
+
+def textrank(neighbors, personalization):
+    """
+    加权PageRank
+
+    Args:
+        neighbors: similarity_graph 的结果
+        personalization: 各句子的初始权重（跳转概率，和为1）
+
+    Returns:
+        各句子的得分
+    """
+    # 每条边的转移概率预先归一化：句子i的得分按权重比例分给邻居
+    transitions = []
+    dangling_nodes = []
+    for i, edges in enumerate(neighbors):
+        total = sum(weight for _, weight in edges)
+        if total:
+            transitions.append((i, [(j, DAMPING * weight / total) for j, weight in edges]))
+        else:
+            dangling_nodes.append(i)
+
+    scores = list(personalization)
+    for _ in range(MAX_ITERATIONS):
+        # 没有邻居的句子把得分按初始权重重新分配
+        dangling = sum(scores[i] for i in dangling_nodes)
+        new_scores = [(1 - DAMPING + DAMPING * dangling) * weight for weight in personalization]
+        for i, edges in transitions:
+            score = scores[i]
+            for j, probability in edges:
+                new_scores[j] += score * probability
+        delta = sum(abs(a - b) for a, b in zip(scores, new_scores))
+        scores = new_scores
+        if delta < TOLERANCE:
+            break
+    return scores
+
+
+def summarize(markdown, target_tokens=800, title=''):
+    """
+    抽取式摘要
+
+    Args:
+        markdown: Markdown正文
+        target_tokens: 摘要的目标token数（按 ai_analyzer.estimate_tokens 估算）
+        title: 文章标题（与标题重合多的句子优先）
+
+    Returns:
+        摘要文本（原文不超过目标长度时原样返回；同一段落中的句子直接相连，不同段落之间换行）
+    """
+    if estimate_tokens(markdown or '') <= target_tokens:
+        return markdown or ''
+
+    sentences = [
+        (paragraph, sentence, bigrams)
+        for paragraph, sentence in split_sentences(markdown)
+        for bigrams in [sentence_bigrams(sentence)]
+        if len(bigrams) + 1 >= MIN_SENTENCE_CHARS
+    ][:MAX_SENTENCES]
+    if not sentences:
+        return ''
+
+    bigram_sets = [bigrams for _, _, bigrams in sentences]
+    title_bigrams = sentence_bigrams(title)
+    weights = [1 + len(bigrams & title_bigrams) / len(bigrams) for bigrams in bigram_sets]
+    total = sum(weights)
+    scores = textrank(similarity_graph(bigram_sets), [weight / total for weight in weights])
+
+    selected = []
+    covered = set()
+    used = 0
+    for index in sorted(range(len(sentences)), key=lambda i: -scores[i]):
+        _, sentence, bigrams = sentences[index]
+        tokens = estimate_tokens(sentence)
+        if used + tokens > target_tokens:
+            continue
+        if len(bigrams & covered) > REDUNDANCY_RATIO * len(bigrams):
+            continue
+        selected.append(index)
+        covered |= bigrams
+        used += tokens
+
+    parts = []
+    last_paragraph = None
+    for index in sorted(selected):
+        paragraph, sentence, _ = sentences[index]
+        if parts and paragraph != last_paragraph:
+            parts.append('\n')
+        parts.append(sentence)
+        last_paragraph = paragraph
+    return ''.join(parts)
+
+
+class Summarizer:
+    """带持久化缓存的摘要器（同样的正文和参数只计算一次）"""
+
+    def __init__(self, target_tokens=800, cache_file=None, max_entries=50000):
+        """
+        Args:
+            target_tokens: 每篇摘要的目标token数
+            cache_file: 摘要缓存的SQLite文件（None表示不缓存）
+            max_entries: 最多缓存的摘要数
+        """
+        self.target_tokens = target_tokens
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.fingerprint = f"{SUMMARIZER_VERSION}:{target_tokens}"
+        self._store = None
+
+        if cache_file:
+            self._store = KeyedStore(cache_file, 'summaries', [('summary', 'TEXT')], self.fingerprint, max_entries)
+            if self._store.purged:
+                print(f"   ♻️  摘要参数已变化，清除 {self._store.purged} 条旧摘要")
+
+    def make_key(self, title, markdown):
+        """缓存键 = sha256(摘要参数 + 标题 + 正文)"""
+        digest = hashlib.sha256(self.fingerprint.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update((title or '').encode('utf-8'))
+        digest.update(b'\0')
+        digest.update((markdown or '').encode('utf-8'))
+        return digest.hexdigest()
+
+    def summarize_many(self, items):
+        """
+        批量摘要（先查缓存，只计算未命中的）
+
+        Args:
+            items: [(标题, Markdown正文)]
+
+        Returns:
+            与 items 一一对应的摘要列表
+        """
+        # 不需要摘要的短文章不查缓存
+        results = [markdown if estimate_tokens(markdown or '') <= self.target_tokens else None
+                   for _, markdown in items]
+        pending = {}
+        for index, (title, markdown) in enumerate(items):
+            if results[index] is None:
+                pending.setdefault(self.make_key(title, markdown), []).append(index)
+
+        cached = self._store.get_many(pending) if self._store else {}
+        fresh = {}
+        for key, indexes in pending.items():
+            if key in cached:
+                summary = cached[key][0]
+            else:
+                title, markdown = items[indexes[0]]
+                summary = fresh[key] = summarize(markdown, self.target_tokens, title)
+            for index in indexes:
+                results[index] = summary
+
+        self.hits += len(cached)
+        self.misses += len(fresh)
+        if self._store:
+            self._store.put_many({key: (summary,) for key, summary in fresh.items()})
+        return results
+
+    def close(self):
+        if self._store:
+            self._store.close()
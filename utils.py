@@ -2,10 +2,22 @@
 工具函数模块
 """
 
-from datetime import datetime, timedelta
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from pathlib import Path
 import pytz
 import xml.etree.ElementTree as ET
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 
 def parse_opml(opml_file):
     """
@@ -44,48 +56,85 @@ def parse_opml(opml_file):
     return accounts
 
 
-def is_within_last_24_hours(pub_date_str):
+# 统一使用的时区（只创建一次）
+SHANGHAI_TZ = pytz.timezone('Asia/Shanghai')
+
+
+@lru_cache(maxsize=4096)
+def parse_pub_date(pub_date_str):
     """
-    判断文章发布时间是否在最近24小时内
+    解析发布时间字符串（带缓存，同一字符串只解析一次）
     
     Args:
-        pub_date_str: 发布时间字符串（RSS格式）
+        pub_date_str: 发布时间字符串，支持：
+            "Wed, 28 Dec 2025 15:30:00 +0800"（RFC 2822，RSS 2.0标准）
+            "2025-12-28T15:30:00+08:00"（ISO 8601）
     
     Returns:
-        bool: True表示在24小时内
+        上海时区的datetime对象，无法解析时返回None
     """
+    if not pub_date_str:
+        return None
+    
     try:
-        # RSS常见时间格式：
-        # "Wed, 28 Dec 2025 15:30:00 +0800"
-        # "2025-12-28T15:30:00+08:00"
-        
-        # 尝试解析RFC 2822格式（RSS 2.0标准）
+        pub_date = parsedate_to_datetime(pub_date_str)
+    except (TypeError, ValueError):
         try:
-            from email.utils import parsedate_to_datetime
-            pub_date = parsedate_to_datetime(pub_date_str)
-        except:
-            # 尝试ISO 8601格式
             pub_date = datetime.fromisoformat(pub_date_str.replace('Z', '+00:00'))
-        
-        # 获取当前时间（带时区）
-        now = datetime.now(pytz.timezone('Asia/Shanghai'))
-        
-        # 确保pub_date有时区信息
-        if pub_date.tzinfo is None:
-            pub_date = pytz.timezone('Asia/Shanghai').localize(pub_date)
-        else:
-            # 转换到上海时区
-            pub_date = pub_date.astimezone(pytz.timezone('Asia/Shanghai'))
-        
-        # 计算时间差
-        time_diff = now - pub_date
-        
-        # 判断是否在24小时内
-        return timedelta(hours=0) <= time_diff <= timedelta(hours=24)
-        
-    except Exception as e:
-        print(f"⚠️  时间解析失败: {pub_date_str}, 错误: {e}")
+        except ValueError as e:
+            print(f"⚠️  时间解析失败: {pub_date_str}, 错误: {e}")
+            return None
+    
+    # 没有时区信息的按上海时间处理
+    if pub_date.tzinfo is None:
+        return SHANGHAI_TZ.localize(pub_date)
+    return pub_date.astimezone(SHANGHAI_TZ)
+
+
+def parse_pub_timestamp(pub_date_str):
+    """
+    解析发布时间为Unix时间戳
+    
+    Args:
+        pub_date_str: 发布时间字符串
+    
+    Returns:
+        int时间戳，无法解析时返回None
+    """
+    pub_date = parse_pub_date(pub_date_str)
+    return int(pub_date.timestamp()) if pub_date else None
+
+
+def is_timestamp_within_hours(pub_ts, hours=24, now_ts=None):
+    """
+    判断时间戳是否在最近N小时内（纯整数比较）
+    
+    Args:
+        pub_ts: 发布时间戳
+        hours: 时间窗口（小时）
+        now_ts: 当前时间戳（默认取当前时间，回放历史数据时可指定）
+    
+    Returns:
+        bool
+    """
+    if pub_ts is None:
         return False
+    if now_ts is None:
+        now_ts = time.time()
+    return now_ts - hours * 3600 <= pub_ts <= now_ts
+
+
+def is_within_last_24_hours(pub_date_str):
+    """
+    判断文章发布时间是否在最近24小时内
+    
+    Args:
+        pub_date_str: 发布时间字符串（RSS格式）
+    
+    Returns:
+        bool: True表示在24小时内
+    """
+    return is_timestamp_within_hours(parse_pub_timestamp(pub_date_str), hours=24)
 
 
 def format_datetime(pub_date_str):
@@ -98,26 +147,10 @@ def format_datetime(pub_date_str):
     Returns:
         格式化后的时间字符串: "2025-12-28 15:30:00"
     """
-    try:
-        # 尝试解析
-        try:
-            from email.utils import parsedate_to_datetime
-            pub_date = parsedate_to_datetime(pub_date_str)
-        except:
-            pub_date = datetime.fromisoformat(pub_date_str.replace('Z', '+00:00'))
-        
-        # 转换到上海时区
-        if pub_date.tzinfo is None:
-            pub_date = pytz.timezone('Asia/Shanghai').localize(pub_date)
-        else:
-            pub_date = pub_date.astimezone(pytz.timezone('Asia/Shanghai'))
-        
-        # 格式化
-        return pub_date.strftime("%Y-%m-%d %H:%M:%S")
-        
-    except Exception as e:
-        print(f"⚠️  时间格式化失败: {pub_date_str}, 错误: {e}")
+    pub_date = parse_pub_date(pub_date_str)
+    if pub_date is None:
         return pub_date_str
+    return pub_date.strftime("%Y-%m-%d %H:%M:%S")
 
 
 def extract_bid_from_url(url):
@@ -138,6 +171,64 @@ def extract_bid_from_url(url):
         return None
 
 
+def load_json_file(filepath, default=None):
+    """
+    读取JSON文件（用于持久化的缓存/状态文件）
+    
+    Args:
+        filepath: 文件路径
+        default: 文件不存在或损坏时的返回值
+    
+    Returns:
+        解析后的数据
+    """
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        print(f"⚠️  读取文件失败，使用默认值: {filepath}, 错误: {e}")
+        return default
+
+
+def save_json_file(data, filepath):
+    """
+    原子写入JSON文件（先写临时文件再替换，避免中途退出写坏文件）
+    
+    Args:
+        data: 要保存的数据
+        filepath: 文件路径
+    """
+    path = Path(filepath)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def file_lock(filepath):
+    """
+    跨进程文件锁（分片执行时多个进程读写同一个状态文件；不支持fcntl的平台上退化为无锁）
+    
+    Args:
+        filepath: 要保护的文件路径（锁文件为同目录下的 <文件名>.lock）
+    """
+    if fcntl is None:
+        yield
+        return
+    Path(filepath).parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{filepath}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
 # 测试代码
 if __name__ == "__main__":
     # 测试OPML解析